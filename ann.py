@@ -0,0 +1,317 @@
+"""
+Approximate nearest-neighbor search for CineMatch.
+
+The precomputed neighbor table only answers "movies like this movie". To score
+ad-hoc query vectors (a blend of several seeds, a free-text tag query, ...)
+without a brute-force pass over every movie, this module provides a small,
+pure-NumPy IVF (inverted file) index:
+
+1. the sparse bag-of-words vectors are reduced with ``TruncatedSVD`` and
+   L2-normalised, so dot products approximate cosine similarity;
+2. spherical k-means splits the catalog into ``n_lists`` clusters;
+3. a query only scores the movies of its ``n_probe`` closest clusters;
+4. optionally, the best ``n × refine`` candidates are re-scored exactly with the
+   sparse vectors, which recovers most of the recall lost to the SVD.
+
+The index is stored in its own artifact store next to the neighbor index. The
+embeddings, by far its largest array, are stored in ``EMBEDDING_PRECISION``
+(uint8 with a per-row scale and offset by default, see :mod:`quantize`) and
+scanned without decoding them first.
+
+Usage:
+    python ann.py --index artifacts/index.store --output artifacts/ann.store
+"""
+
+from typing import Iterable, NamedTuple, Optional, Tuple
+import argparse
+import logging
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+import config
+from artifact_store import open_store, write_store
+from neighbors import top_n
+from quantize import PRECISIONS, Matrix, QuantizedMatrix, open_matrix, pack_matrix
+from telemetry import stage
+
+logger = logging.getLogger(__name__)
+
+
+class AnnIndex(NamedTuple):
+    """
+    IVF index over reduced, L2-normalised movie embeddings.
+
+    Attributes:
+        components (np.ndarray): SVD projection, shape ``(d, vocabulary)``.
+        embeddings (Matrix): Unit-length movie embeddings, shape ``(N, d)``;
+            a float32 array or a :class:`~quantize.QuantizedMatrix`.
+        centroids (np.ndarray): Unit-length cluster centroids, shape ``(L, d)``.
+        list_offsets (np.ndarray): Start of each cluster in ``list_rows``, ``(L + 1,)``.
+        list_rows (np.ndarray): Movie row positions grouped by cluster, ``(N,)``.
+        vectors (Optional[sp.csr_matrix]): L2-normalised sparse movie vectors
+            used to re-score candidates exactly.
+    """
+
+    components: np.ndarray
+    embeddings: Matrix
+    centroids: np.ndarray
+    list_offsets: np.ndarray
+    list_rows: np.ndarray
+    vectors: Optional[sp.csr_matrix] = None
+
+    def embed(self, vectors: sp.spmatrix) -> np.ndarray:
+        """
+        Project sparse bag-of-words vectors into the embedding space.
+
+        Args:
+            vectors (sp.spmatrix): Rows in the vectorizer's vocabulary.
+
+        Returns:
+            np.ndarray: Unit-length float32 embeddings, one row per input row.
+        """
+        return _unit_rows(np.asarray(vectors @ self.components.T, dtype=np.float32))
+
+    def search(
+        self,
+        query: np.ndarray,
+        n: int,
+        n_probe: int = config.ANN_PROBES,
+        exclude: Iterable[int] = (),
+        sparse_query: Optional[sp.spmatrix] = None,
+        refine: int = config.ANN_REFINE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the movies closest to a query embedding.
+
+        Args:
+            query (np.ndarray): Query embedding, shape ``(d,)``; need not be
+                unit-length (e.g. a weighted sum of movie embeddings).
+            n (int): Number of results wanted.
+            n_probe (int): Number of clusters scanned.
+            exclude (Iterable[int]): Row positions that must not be returned.
+            sparse_query (Optional[sp.spmatrix]): The query as a ``(1, vocabulary)``
+                sparse vector. When given (and :attr:`vectors` is loaded), the
+                best ``n * refine`` candidates are re-scored exactly.
+            refine (int): Candidate multiplier for exact re-scoring.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row positions and cosine scores
+                (approximate unless refined), best-first.
+        """
+        exclude = np.fromiter(exclude, dtype=np.int64)
+        refining = sparse_query is not None and self.vectors is not None and refine > 1
+
+        with stage("score"):
+            query = np.asarray(query, dtype=np.float32)
+            n_probe = min(n_probe, len(self.centroids))
+            probes = np.argpartition(self.centroids @ query, -n_probe)[-n_probe:]
+
+            candidates = np.concatenate([
+                self.list_rows[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes
+            ])
+            if isinstance(self.embeddings, QuantizedMatrix):
+                scores = self.embeddings.dot(candidates, query)
+            else:
+                scores = self.embeddings[candidates] @ query
+
+        with stage("topk"):
+            excluded = np.flatnonzero(np.isin(candidates, exclude))
+            local, local_scores = top_n(scores, n * refine if refining else n, exclude=excluded)
+            candidates = candidates[local].astype(np.int32)
+        if not refining:
+            return candidates, local_scores
+
+        with stage("score"):
+            exact = np.asarray((self.vectors[candidates] @ sparse_query.T).todense()).ravel()
+        with stage("topk"):
+            local, local_scores = top_n(exact, n)
+        return candidates[local], local_scores
+
+    def query(
+        self,
+        movie_idx: int,
+        n: int,
+        n_probe: int = config.ANN_PROBES,
+        refine: int = config.ANN_REFINE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-``n`` neighbors of the movie at ``movie_idx``, excluding itself."""
+        return self.search(
+            self.embeddings[movie_idx], n, n_probe, exclude=(movie_idx,),
+            sparse_query=self.vectors[movie_idx] if self.vectors is not None else None,
+            refine=refine,
+        )
+
+    def extend(self, vectors: sp.spmatrix) -> "AnnIndex":
+        """
+        Append movies without refitting the SVD or the clusters.
+
+        New movies are projected with the existing components and filed under
+        their closest centroid, so the cost is proportional to the number of
+        new movies (plus an O(N) regrouping of the cluster lists).
+
+        Args:
+            vectors (sp.spmatrix): L2-normalised sparse vectors of the new movies.
+
+        Returns:
+            AnnIndex: A new index covering the old and new movies, without
+                :attr:`vectors` (attach the combined matrix when loading).
+        """
+        embeddings = self.embed(vectors)
+        assignment = np.empty(len(self.embeddings) + len(embeddings), dtype=np.int64)
+        assignment[self.list_rows] = np.repeat(
+            np.arange(len(self.centroids)), np.diff(self.list_offsets)
+        )
+        assignment[len(self.embeddings):] = np.argmax(embeddings @ self.centroids.T, axis=1)
+        list_rows, list_offsets = _cluster_lists(assignment, len(self.centroids))
+        return AnnIndex(
+            components=self.components,
+            embeddings=np.vstack([np.asarray(self.embeddings), embeddings]),
+            centroids=self.centroids,
+            list_offsets=list_offsets,
+            list_rows=list_rows,
+        )
+
+
+_ARRAY_FIELDS = ("components", "embeddings", "centroids", "list_offsets", "list_rows")
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _cluster_lists(assignment: np.ndarray, n_lists: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Group row positions by cluster: ``(list_rows, list_offsets)``."""
+    list_rows = np.argsort(assignment, kind="stable").astype(np.int32)
+    list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignment, minlength=n_lists), out=list_offsets[1:])
+    return list_rows, list_offsets
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Build
+# ─────────────────────────────────────────────────────────────────────────────
+
+def build_ann_index(
+    vectors: sp.spmatrix,
+    n_components: int = config.ANN_COMPONENTS,
+    n_lists: int = config.ANN_LISTS,
+    iterations: int = 10,
+    seed: int = 0,
+) -> AnnIndex:
+    """
+    Build an IVF index from sparse movie vectors.
+
+    Args:
+        vectors (sp.spmatrix): L2-normalised movie vectors, one row per movie.
+        n_components (int): Embedding dimensionality after TruncatedSVD.
+        n_lists (int): Number of k-means clusters.
+        iterations (int): Spherical k-means iterations.
+        seed (int): Random seed for SVD and centroid initialisation.
+
+    Returns:
+        AnnIndex: The built index.
+    """
+    from sklearn.decomposition import TruncatedSVD
+
+    n_rows = vectors.shape[0]
+    n_components = min(n_components, vectors.shape[1] - 1)
+    n_lists = max(1, min(n_lists, n_rows))
+
+    svd = TruncatedSVD(n_components=n_components, random_state=seed)
+    embeddings = _unit_rows(svd.fit_transform(vectors).astype(np.float32))
+
+    rng = np.random.default_rng(seed)
+    centroids = embeddings[rng.choice(n_rows, n_lists, replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(embeddings @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, embeddings)
+        # Empty clusters keep their previous centroid
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = _unit_rows(sums)
+    assignment = np.argmax(embeddings @ centroids.T, axis=1)
+
+    list_rows, list_offsets = _cluster_lists(assignment, n_lists)
+
+    return AnnIndex(
+        components=svd.components_.astype(np.float32),
+        embeddings=embeddings,
+        centroids=centroids.astype(np.float32),
+        list_offsets=list_offsets,
+        list_rows=list_rows,
+        vectors=sp.csr_matrix(vectors),
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Persistence
+# ─────────────────────────────────────────────────────────────────────────────
+
+def save_ann_index(index: AnnIndex, path: str, precision: str = config.EMBEDDING_PRECISION) -> None:
+    """
+    Write an ANN index to an artifact store (the sparse vectors stay in the neighbor store).
+
+    Args:
+        index (AnnIndex): The index to save.
+        path (str): Destination store path.
+        precision (str): Storage precision of the embeddings (see :mod:`quantize`).
+    """
+    arrays = {f"ann.{name}": getattr(index, name) for name in _ARRAY_FIELDS if name != "embeddings"}
+    arrays.update(pack_matrix("ann.embeddings", index.embeddings, precision))
+    write_store(
+        path,
+        arrays,
+        {"kind": "ann", "n_movies": len(index.embeddings),
+         "n_components": index.embeddings.shape[1], "n_lists": len(index.centroids),
+         "embedding_precision": precision},
+    )
+
+
+def load_ann_index(path: str, vectors: Optional[sp.csr_matrix] = None) -> AnnIndex:
+    """
+    Memory-map an ANN index written by :func:`save_ann_index`.
+
+    Args:
+        path (str): Path to the ANN store.
+        vectors (Optional[sp.csr_matrix]): Normalised movie vectors (usually
+            :attr:`neighbors.NeighborIndex.vectors`) to enable exact re-scoring.
+
+    Returns:
+        AnnIndex: The loaded index.
+    """
+    store = open_store(path)
+    arrays = {name: store[f"ann.{name}"] for name in _ARRAY_FIELDS if name != "embeddings"}
+    return AnnIndex(**arrays, embeddings=open_matrix(store, "ann.embeddings"), vectors=vectors)
+
+
+def main() -> None:
+    """Build the ANN index from the vectors in a neighbor index store."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--index", default=config.INDEX_FILE)
+    parser.add_argument("--output", default=config.ANN_FILE)
+    parser.add_argument("--components", type=int, default=config.ANN_COMPONENTS)
+    parser.add_argument("--lists", type=int, default=config.ANN_LISTS)
+    parser.add_argument("--precision", choices=PRECISIONS, default=config.EMBEDDING_PRECISION)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    started = time.perf_counter()
+    vectors = open_store(args.index).csr("vectors")
+    index = build_ann_index(vectors, n_components=args.components, n_lists=args.lists)
+    save_ann_index(index, args.output, precision=args.precision)
+    logger.info(
+        f"Built ANN index ({index.embeddings.shape[1]} dims, {len(index.centroids)} lists) "
+        f"for {len(index.embeddings)} movies in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,603 @@
+"""
+Headless HTTP recommendation API for CineMatch.
+
+A small asynchronous JSON service over :class:`engine.RecommendationEngine`,
+built on Tornado (already installed with Streamlit). The artifacts are loaded
+once per process and shared by every request; a newly published version is
+loaded in the background and swapped in without a restart (see
+:mod:`reloader`). Single and blend responses are cached per artifact version
+(see :mod:`result_cache`).
+
+Endpoints:
+    GET  /recommend?title=Avatar&k=5[&mode=approx][&movie_id=19995][&rerank=1]
+    GET  /recommend/blend?title=Avatar&title=Aliens[&weights=2,1][&aggregate=max][&rerank=1]
+    POST /recommend/batch   {"queries": [{"title": "Avatar", "exclude": [440]}, ...], "k": 5}
+    GET  /search?q=avat[&limit=10]  typeahead: best matching display labels
+    GET  /health            artifact version, reload counters and catalog size
+    GET  /metrics           served version, result cache counters, request counts,
+                            p50/p99 latency per endpoint and per-stage telemetry
+    GET  /metrics/prometheus  the same telemetry in the Prometheus text format
+
+Every response carries a ``Server-Timing`` header with the time spent in each
+stage (lookup, score, topk, rerank, materialize). ``rerank=1`` re-ranks the
+candidates with popularity, rating, recency and diversity (see
+:mod:`rerank`). Started with ``--allow-profiling``,
+any request accepts ``profile=1`` and returns a sampling profile of itself
+under ``"profile"``.
+
+With ``--workers N`` a launcher loads the artifacts once, binds the port and
+forks N worker processes that share the loaded engine copy-on-write (see
+:func:`prefork`); the kernel spreads connections across them.
+
+Usage:
+    python api.py --port 8000
+    python api.py --port 8000 --workers 4
+"""
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import socket
+import time
+
+import numpy as np
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+import config
+from engine import (
+    AmbiguousTitleError,
+    ArtifactLoadError,
+    MovieNotFoundError,
+    RecommendationEngine,
+)
+from reloader import EngineReloader
+from result_cache import ResultCache, ResultKey, result_key
+from telemetry import (
+    SamplingProfiler,
+    begin_trace,
+    current_trace,
+    end_trace,
+    registry,
+    server_timing,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ApiError(tornado.web.HTTPError):
+    """HTTP error whose message is returned in the JSON body."""
+
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(status_code, "%s", message)
+        self.message = message
+
+
+class LatencyRecorder:
+    """
+    Request counters and a rolling window of latencies for one endpoint.
+
+    Args:
+        window (int): Number of recent latencies kept for percentiles.
+    """
+
+    def __init__(self, window: int = config.API_LATENCY_WINDOW) -> None:
+        self.requests = 0
+        self.errors = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        """Record one request."""
+        self.requests += 1
+        self.errors += error
+        self._latencies.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters and p50/p99 latency in milliseconds over the window."""
+        summary: Dict[str, Any] = {"requests": self.requests, "errors": self.errors}
+        if self._latencies:
+            p50, p99 = np.percentile(np.fromiter(self._latencies, dtype=np.float64), [50, 99])
+            summary.update(p50_ms=round(p50 * 1000, 3), p99_ms=round(p99 * 1000, 3))
+        return summary
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Handlers
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BaseHandler(tornado.web.RequestHandler):
+    """JSON responses, error mapping and per-endpoint latency recording."""
+
+    def initialize(
+        self,
+        reloader: EngineReloader,
+        metrics: Dict[str, LatencyRecorder],
+        cache: Optional[ResultCache],
+        allow_profiling: bool = config.API_ALLOW_PROFILING,
+    ) -> None:
+        self.reloader = reloader
+        self.metrics = metrics
+        self.cache = cache
+        self.allow_profiling = allow_profiling
+        self._profiler: Optional[SamplingProfiler] = None
+
+    def prepare(self) -> None:
+        self._started = time.perf_counter()
+        self._trace = begin_trace()
+        # Pin the engine for the whole request; a reload only affects later ones
+        self.engine: RecommendationEngine = self.reloader.current
+        self.set_header("X-Artifact-Version", self.engine.version)
+        if self.get_query_argument("profile", "") not in ("", "0"):
+            if not self.allow_profiling:
+                raise ApiError(403, "Profiling is disabled; start the API with --allow-profiling")
+            self._profiler = SamplingProfiler().start()
+
+    def on_finish(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        recorder = self.metrics.setdefault(self.request.path, LatencyRecorder())
+        recorder.record(elapsed, error=self.get_status() >= 400)
+        registry.observe("request_seconds", elapsed, path=self.request.path)
+        registry.incr("requests", path=self.request.path, status=str(self.get_status()))
+        end_trace(self._trace)
+
+    def write_json(self, payload: Any, status: int = 200) -> None:
+        stages = current_trace()
+        if stages:
+            self.set_header("Server-Timing", server_timing(stages))
+        if self._profiler is not None and isinstance(payload, dict):
+            payload = {**payload, "profile": self._profiler.stop().summary()}
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(payload))
+
+    def write_error(self, status_code: int, **kwargs: Any) -> None:
+        # Messages travel in the JSON body; the status line keeps the standard reason
+        exc = kwargs.get("exc_info", (None, None, None))[1]
+        message = exc.message if isinstance(exc, ApiError) else self._reason
+        self.write_json({"error": message}, status=status_code)
+
+    def cached(self, key: Callable[[], ResultKey], compute: Callable[[], Any]) -> Any:
+        """
+        Serve ``compute()`` from the result cache when possible.
+
+        Args:
+            key (Callable[[], ResultKey]): Builds the cache key; may raise the
+                engine's lookup errors, like ``compute``.
+            compute (Callable[[], Any]): Produces the JSON-serialisable response.
+        """
+        if self.cache is None:
+            return compute()
+        key = key()
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.put(key, value)
+        return value
+
+    def rerank_signature(self, rerank: bool) -> Optional[str]:
+        """Re-ranking part of a result cache key."""
+        return self.engine.reranker.weights.signature if rerank else None
+
+    def seed_ids(self, titles: List[str], movie_id: Optional[int] = None) -> np.ndarray:
+        """TMDB ids of the seed movies, raising the engine's lookup errors."""
+        return self.engine.catalog.movie_ids[
+            [self.engine.resolve(title, movie_id) for title in titles]
+        ]
+
+    @staticmethod
+    def parse_query_ints(k: Any, movie_id: Any) -> Tuple[int, Optional[int]]:
+        """
+        Parse a query's ``k`` and optional ``movie_id``.
+
+        Raises:
+            ApiError: 400 when either is not an integer.
+        """
+        try:
+            return int(k), int(movie_id) if movie_id not in (None, "") else None
+        except (TypeError, ValueError):
+            raise ApiError(400, "'k' and 'movie_id' must be integers")
+
+    def query_result(
+        self,
+        title: Optional[str],
+        k: Any = config.NUM_RECOMMENDATIONS,
+        mode: str = config.RECOMMENDATION_MODE,
+        movie_id: Any = None,
+        rerank: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Answer one recommendation query.
+
+        Raises:
+            ApiError: 400 for invalid input, 404 for unknown
+                movies and 409 for ambiguous titles.
+        """
+        if not title:
+            raise ApiError(400, "'title' is required")
+        k, movie_id = self.parse_query_ints(k, movie_id)
+
+        try:
+            recommendations = self.cached(
+                lambda: result_key(
+                    self.engine.version, self.seed_ids([title], movie_id), k, mode,
+                    rerank=self.rerank_signature(rerank),
+                ),
+                lambda: [
+                    rec._asdict()
+                    for rec in self.engine.recommend(
+                        title, k=k, mode=mode, movie_id=movie_id, rerank=rerank
+                    )
+                ],
+            )
+        except MovieNotFoundError as e:
+            raise ApiError(404, str(e))
+        except AmbiguousTitleError as e:
+            raise ApiError(409, str(e))
+        except ValueError as e:
+            raise ApiError(400, str(e))
+
+        return {
+            "title": title,
+            "k": k,
+            "mode": mode,
+            "rerank": rerank,
+            "recommendations": recommendations,
+        }
+
+
+class RecommendHandler(BaseHandler):
+    """``GET /recommend?title=&k=&mode=&movie_id=&rerank=``"""
+
+    def get(self) -> None:
+        self.write_json({
+            "version": self.engine.version,
+            **self.query_result(
+                self.get_query_argument("title", None),
+                self.get_query_argument("k", config.NUM_RECOMMENDATIONS),
+                self.get_query_argument("mode", config.RECOMMENDATION_MODE),
+                self.get_query_argument("movie_id", None),
+                self.get_query_argument("rerank", "") not in ("", "0"),
+            ),
+        })
+
+
+class BlendRecommendHandler(BaseHandler):
+    """``GET /recommend/blend?title=A&title=B[&weights=2,1][&aggregate=max][&rerank=1]&k=``"""
+
+    def get(self) -> None:
+        titles = self.get_query_arguments("title")
+        if not titles:
+            raise ApiError(400, "At least one 'title' is required")
+        try:
+            k = int(self.get_query_argument("k", config.NUM_RECOMMENDATIONS))
+            weights = self.get_query_argument("weights", None)
+            weights = [float(w) for w in weights.split(",")] if weights else None
+        except ValueError:
+            raise ApiError(400, "'k' must be an integer and 'weights' comma-separated numbers")
+        aggregate = self.get_query_argument("aggregate", config.BLEND_AGGREGATION)
+        mode = self.get_query_argument("mode", config.RECOMMENDATION_MODE)
+        rerank = self.get_query_argument("rerank", "") not in ("", "0")
+
+        try:
+            recommendations = self.cached(
+                lambda: result_key(
+                    self.engine.version, self.seed_ids(titles), k, mode, aggregate, weights,
+                    rerank=self.rerank_signature(rerank),
+                ),
+                lambda: [
+                    rec._asdict()
+                    for rec in self.engine.recommend_blend(
+                        titles, k=k, weights=weights, aggregate=aggregate, mode=mode,
+                        rerank=rerank,
+                    )
+                ],
+            )
+        except MovieNotFoundError as e:
+            raise ApiError(404, str(e))
+        except AmbiguousTitleError as e:
+            raise ApiError(409, str(e))
+        except ValueError as e:
+            raise ApiError(400, str(e))
+
+        self.write_json({
+            "version": self.engine.version,
+            "titles": titles,
+            "weights": weights,
+            "aggregate": aggregate,
+            "k": k,
+            "mode": mode,
+            "rerank": rerank,
+            "recommendations": recommendations,
+        })
+
+
+class BatchRecommendHandler(BaseHandler):
+    """
+    ``POST /recommend/batch``
+
+    The body holds ``queries`` (titles, or objects with ``title`` and/or
+    ``movie_id`` and optional ``k``, ``mode`` and ``exclude`` TMDB ids) plus
+    request-wide ``k``/``mode`` defaults. Queries sharing ``k`` and ``mode``
+    are answered by one :meth:`engine.RecommendationEngine.recommend_batch`
+    call. Results come back in query order; a failed query yields an ``error``
+    entry instead of failing the whole batch.
+    """
+
+    def post(self) -> None:
+        try:
+            body = json.loads(self.request.body or b"{}")
+            queries = body["queries"]
+            if not isinstance(queries, list):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            raise ApiError(400, "Body must be JSON with a 'queries' list")
+        if len(queries) > config.API_MAX_BATCH:
+            raise ApiError(400, f"At most {config.API_MAX_BATCH} queries per batch")
+
+        results: List[Dict[str, Any]] = [{} for _ in queries]
+        groups: Dict[Tuple[int, Any], List[Tuple[int, Union[str, int], List[int]]]] = {}
+        for position, query in enumerate(queries):
+            if isinstance(query, str):
+                query = {"title": query}
+            if not isinstance(query, dict) or not (query.get("title") or query.get("movie_id")):
+                results[position] = {"status": 400, "error": "Query needs a 'title' or 'movie_id'"}
+                continue
+            try:
+                k, movie_id = self.parse_query_ints(
+                    query.get("k", body.get("k", config.NUM_RECOMMENDATIONS)), query.get("movie_id")
+                )
+            except ApiError as e:
+                results[position] = {"status": e.status_code, "error": e.message}
+                continue
+            try:
+                exclude = [int(excluded) for excluded in query.get("exclude", ())]
+            except (TypeError, ValueError):
+                results[position] = {"status": 400, "error": "'exclude' must be a list of integers"}
+                continue
+            seed = movie_id if movie_id is not None else query["title"]
+            key = (k, query.get("mode", body.get("mode", config.RECOMMENDATION_MODE)))
+            groups.setdefault(key, []).append((position, seed, exclude))
+
+        for (k, mode), members in groups.items():
+            try:
+                answers = self.engine.recommend_batch(
+                    [seed for _, seed, _ in members], k=k, mode=mode,
+                    exclude=[exclude for _, _, exclude in members],
+                )
+            except (TypeError, ValueError) as e:
+                answers = [ApiError(400, str(e))] * len(members)
+            for (position, seed, _), answer in zip(members, answers):
+                results[position] = self._batch_entry(seed, k, mode, answer)
+
+        self.write_json({"version": self.engine.version, "results": results})
+
+    @staticmethod
+    def _batch_entry(seed: Union[str, int], k: int, mode: Any, answer: Any) -> Dict[str, Any]:
+        """Render one query's recommendations or error as a result entry."""
+        query = {"movie_id": seed} if isinstance(seed, int) else {"title": seed}
+        if isinstance(answer, ApiError):
+            return {**query, "status": answer.status_code, "error": answer.message}
+        if isinstance(answer, MovieNotFoundError):
+            return {**query, "status": 404, "error": str(answer)}
+        if isinstance(answer, AmbiguousTitleError):
+            return {**query, "status": 409, "error": str(answer)}
+        return {**query, "k": k, "mode": mode,
+                "recommendations": [rec._asdict() for rec in answer]}
+
+
+class SearchHandler(BaseHandler):
+    """``GET /search?q=&limit=``"""
+
+    def get(self) -> None:
+        query = self.get_query_argument("q", "")
+        try:
+            limit = int(self.get_query_argument("limit", config.SEARCH_RESULTS))
+        except ValueError:
+            raise ApiError(400, "'limit' must be an integer")
+        if not 0 < limit <= config.SEARCH_MAX_RESULTS:
+            raise ApiError(400, f"'limit' must be between 1 and {config.SEARCH_MAX_RESULTS}")
+        self.write_json({
+            "version": self.engine.version,
+            "q": query,
+            "matches": self.engine.search_titles(query, limit=limit),
+        })
+
+
+class HealthHandler(BaseHandler):
+    """``GET /health``"""
+
+    def get(self) -> None:
+        self.write_json({
+            "status": "ok",
+            **self.reloader.status(),
+            "movies": len(self.engine.catalog),
+            "approx": self.engine.ann is not None,
+        })
+
+
+class MetricsHandler(BaseHandler):
+    """``GET /metrics``"""
+
+    def get(self) -> None:
+        self.write_json({
+            "artifact": self.reloader.status(),
+            "result_cache": self.cache.stats() if self.cache is not None else None,
+            **{path: recorder.snapshot() for path, recorder in self.metrics.items()},
+            "telemetry": registry.snapshot(),
+        })
+
+
+class PrometheusHandler(BaseHandler):
+    """``GET /metrics/prometheus``"""
+
+    def get(self) -> None:
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.finish(registry.prometheus())
+
+
+def make_app(
+    reloader: EngineReloader,
+    cache: Optional[ResultCache] = None,
+    allow_profiling: bool = config.API_ALLOW_PROFILING,
+) -> tornado.web.Application:
+    """
+    Build the Tornado application around a loaded engine.
+
+    Args:
+        reloader (EngineReloader): Holder of the engine serving new requests.
+        cache (Optional[ResultCache]): Cache of single and blend responses.
+        allow_profiling (bool): Honour ``profile=1`` on requests.
+
+    Returns:
+        tornado.web.Application: The routed application.
+    """
+    if cache is not None:
+        registry.register("result_cache", cache.stats)
+    context = {"reloader": reloader, "metrics": {}, "cache": cache, "allow_profiling": allow_profiling}
+    return tornado.web.Application([
+        (r"/recommend", RecommendHandler, context),
+        (r"/recommend/batch", BatchRecommendHandler, context),
+        (r"/recommend/blend", BlendRecommendHandler, context),
+        (r"/search", SearchHandler, context),
+        (r"/health", HealthHandler, context),
+        (r"/metrics", MetricsHandler, context),
+        (r"/metrics/prometheus", PrometheusHandler, context),
+    ])
+
+
+def prefork(
+    host: str,
+    port: int,
+    root: str,
+    workers: int = config.API_WORKERS,
+    reload_interval: float = config.RELOAD_INTERVAL,
+) -> Tuple[EngineReloader, List[socket.socket]]:
+    """
+    Load the artifacts once, bind the port and fork the worker processes.
+
+    Everything loaded before the fork is shared by the workers: the artifacts
+    are read-only memory maps backed by the page cache, and the structures
+    derived from them are built here (:meth:`engine.RecommendationEngine.warm`)
+    and shared copy-on-write. ``gc.freeze`` keeps the garbage collector from
+    writing to, and so un-sharing, the pages of those objects. A version
+    published later is loaded by each worker on its own.
+
+    The launcher never returns: it restarts workers that die and exits when
+    they all have. Each worker returns, and must create anything that does not
+    survive a fork (event loop, threads, SQLite connections) itself.
+
+    Args:
+        host (str): Address to bind.
+        port (int): Port to bind.
+        root (str): Artifact root directory.
+        workers (int): Worker processes; 0 starts one per CPU.
+        reload_interval (float): Seconds between checks for a new version.
+
+    Returns:
+        Tuple[EngineReloader, List[socket.socket]]: In each worker, the
+            shared reloader (not yet started) and the listening sockets.
+
+    Raises:
+        ArtifactLoadError: If the artifacts cannot be loaded.
+    """
+    reloader = EngineReloader(root, reload_interval)
+    reloader.current.warm()
+    sockets = tornado.netutil.bind_sockets(port, address=host)
+    gc.freeze()
+    tornado.process.fork_processes(workers)
+    return reloader, sockets
+
+
+async def serve(
+    host: str,
+    port: int,
+    root: str,
+    reload_interval: float = config.RELOAD_INTERVAL,
+    cache: Optional[ResultCache] = None,
+    allow_profiling: bool = config.API_ALLOW_PROFILING,
+    reloader: Optional[EngineReloader] = None,
+    sockets: Optional[List[socket.socket]] = None,
+) -> None:
+    """
+    Load the artifacts, watch for new versions and serve until cancelled.
+
+    Forked workers pass the ``reloader`` and ``sockets`` from :func:`prefork`
+    instead of loading and binding their own.
+    """
+    reloader = reloader or EngineReloader(root, reload_interval)
+    if reload_interval > 0:
+        reloader.start()
+    app = make_app(reloader, cache, allow_profiling)
+    if sockets is None:
+        app.listen(port, address=host)
+    else:
+        tornado.httpserver.HTTPServer(app).add_sockets(sockets)
+    logger.info(
+        f"Serving artifact version {reloader.current.version} on http://{host}:{port} "
+        f"(pid {os.getpid()})"
+    )
+    try:
+        if sockets is None:
+            # Single process: serve until cancelled
+            await asyncio.Event().wait()
+        else:
+            # Forked worker: exit when the launcher is killed instead of lingering as an orphan
+            launcher = os.getppid()
+            while os.getppid() == launcher:
+                await asyncio.sleep(1.0)
+    finally:
+        reloader.stop()
+
+
+def main() -> None:
+    """Run the recommendation API."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--reload-interval", type=float, default=config.RELOAD_INTERVAL,
+                        help="seconds between checks for a new artifact version (0 disables)")
+    parser.add_argument("--result-cache-size", type=int, default=config.RESULT_CACHE_MAX_ENTRIES,
+                        help="responses cached in memory (0 disables)")
+    parser.add_argument("--result-cache-file", default=config.RESULT_CACHE_FILE,
+                        help="SQLite file shared by all servers ('' for memory only)")
+    parser.add_argument("--allow-profiling", action="store_true", default=config.API_ALLOW_PROFILING,
+                        help="let requests ask for a sampling profile with profile=1")
+    parser.add_argument("--workers", type=int, default=config.API_WORKERS,
+                        help="server processes sharing one artifact load (0 = one per CPU)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    try:
+        reloader, sockets = None, None
+        if args.workers != 1:
+            reloader, sockets = prefork(
+                args.host, args.port, args.artifacts, args.workers, args.reload_interval
+            )
+        cache = None
+        if args.result_cache_size > 0 or args.result_cache_file:
+            cache = ResultCache(
+                args.result_cache_size, args.result_cache_file or None, namespace="api"
+            )
+        asyncio.run(serve(
+            args.host, args.port, args.artifacts, args.reload_interval, cache, args.allow_profiling,
+            reloader, sockets,
+        ))
+    except ArtifactLoadError as e:
+        raise SystemExit(str(e))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
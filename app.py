@@ -9,16 +9,25 @@ Author: Ahmed Ziada
 Dataset: TMDB 5000 Movies & Credits
 """
 
-from typing import Tuple, List
-import pickle
-import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, NamedTuple, Tuple, List, Optional, Union
 import logging
-import zipfile
+import os
+import time
 import streamlit as st
-import requests
-import pandas as pd
 
 import config
+from catalog import load_title_list
+from manifest import artifact_paths
+from poster_cache import PosterCache
+from result_cache import ResultCache, ResultKey, result_key
+from telemetry import SamplingProfiler, registry, stage, trace
+
+# scipy, requests and the artifacts are loaded lazily, off the first paint
+if TYPE_CHECKING:
+    from engine import RecommendationEngine
+    from reloader import EngineReloader
+    from search import TitleSearchIndex
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Logging Configuration
@@ -66,6 +75,10 @@ st.markdown("""
     50%  { transform: translate(-50%, -50%) scale(1.18); opacity: 0.26; }
     100% { transform: translate(-50%, -50%) scale(1);    opacity: 0.16; }
 }
+@keyframes shimmer {
+    from { background-position: 200% 0; }
+    to   { background-position: -200% 0; }
+}
 
 /* ══════════════════════════════════════════
    BASE
@@ -164,7 +177,9 @@ section[data-testid="stSidebar"] { display: none; }
     font-weight: 500;
 }
 
-[data-testid="stSelectbox"] > div > div {
+[data-testid="stTextInput"] > div > div,
+[data-testid="stSelectbox"] > div > div,
+[data-testid="stMultiSelect"] > div > div {
     background: rgba(124,58,237,0.06) !important;
     border: 1px solid rgba(192,132,252,0.22) !important;
     border-radius: 10px !important;
@@ -173,8 +188,12 @@ section[data-testid="stSidebar"] { display: none; }
     font-size: 0.97rem !important;
     transition: border-color 0.3s, box-shadow 0.3s;
 }
+[data-testid="stTextInput"] > div > div:hover,
+[data-testid="stTextInput"] > div > div:focus-within,
 [data-testid="stSelectbox"] > div > div:hover,
-[data-testid="stSelectbox"] > div > div:focus-within {
+[data-testid="stSelectbox"] > div > div:focus-within,
+[data-testid="stMultiSelect"] > div > div:hover,
+[data-testid="stMultiSelect"] > div > div:focus-within {
     border-color: rgba(192,132,252,0.55) !important;
     box-shadow: 0 0 0 3px rgba(124,58,237,0.12) !important;
 }
@@ -263,6 +282,8 @@ section[data-testid="stSidebar"] { display: none; }
 .movie-card:nth-child(3) { animation-delay: 0.18s; }
 .movie-card:nth-child(4) { animation-delay: 0.25s; }
 .movie-card:nth-child(5) { animation-delay: 0.32s; }
+/* Re-rendered as posters arrive: do not replay the entrance */
+.cards-row.settled .movie-card { animation: none; opacity: 1; }
 
 .movie-card:hover {
     transform: translateY(-7px) scale(1.02);
@@ -291,6 +312,12 @@ section[data-testid="stSidebar"] { display: none; }
 .movie-card:hover .poster-wrap img {
     transform: scale(1.06);
 }
+/* Poster still being resolved */
+.poster-wrap.loading {
+    background: linear-gradient(90deg, #1a1028 25%, #2a1a40 50%, #1a1028 75%);
+    background-size: 200% 100%;
+    animation: shimmer 1.4s linear infinite;
+}
 /* Bottom fade */
 .poster-wrap::after {
     content: '';
@@ -356,128 +383,270 @@ except (KeyError, FileNotFoundError):
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-import zipfile
-import pickle
-import streamlit as st
-import os
+def _load_reloader() -> "EngineReloader":
+    from reloader import EngineReloader
 
-@st.cache_data(show_spinner=False)
-def load_data():
-    # التأكد من وجود الملفات
-    if not os.path.exists("movie_list.pkl") or not os.path.exists("similarity.zip"):
-        st.error("Missing data files. Make sure 'movie_list.pkl' and 'similarity.zip' exist.")
-        return None, None
-        
+    return EngineReloader().start()
+
+
+@st.cache_resource(show_spinner=False)
+def load_data() -> "Future[EngineReloader]":
+    """
+    Start loading the recommendation engine over the current artifact version.
+    
+    Files are taken from the current version in the artifact manifest, or from
+    the legacy ``movie_list.pkl`` + ``artifacts/index.store`` layout. Loading
+    (including the numpy/scipy imports it needs) runs on a background thread so
+    the page renders meanwhile; newly published versions are then loaded in the
+    background and picked up by the next script run, without restarting the app.
+    
+    Cached as a shared resource rather than data: the neighbor arrays are
+    read-only memory maps and must not be copied into every session.
+    
+    Returns:
+        Future[EngineReloader]: Resolves to the holder of the current engine.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine-loader")
+    future = executor.submit(_load_reloader)
+    executor.shutdown(wait=False)
+    return future
+
+
+def get_engine(wait: bool = True) -> Optional["RecommendationEngine"]:
+    """
+    Return the loaded engine, stopping the script if it could not be loaded.
+    
+    Args:
+        wait (bool): Block until loading has finished.
+    
+    Returns:
+        Optional[RecommendationEngine]: The engine, or None if it is still
+            loading and ``wait`` is False.
+    """
+    future = load_data()
+    if not (wait or future.done()):
+        return None
     try:
-        # قراءة الداتا بتاعة الأفلام
-        with open("movie_list.pkl", "rb") as f:
-            movies = pickle.load(f)
-            
-        # قراءة مصفوفة التشابه من الملف المضغوط مباشرة
-        with zipfile.ZipFile("similarity.zip", "r") as z:
-            with z.open("similarity.pkl") as f:
-                similarity = pickle.load(f)
-                
-        return movies, similarity
-    except Exception as exc:
-        st.error(f"Failed to load data: {exc}")
-        return None, None
-    except Exception as exc:
-        logger.error(f"Unexpected error loading data: {exc}")
-        st.error(f"An unexpected error occurred while loading data: {exc}")
-        return None, None
-
-
-@st.cache_data(show_spinner=False, ttl=config.CACHE_TTL)
-def fetch_movie_poster(movie_id: int) -> str:
+        return future.result().current
+    except Exception as e:
+        from engine import ArtifactLoadError  # already imported by the loader
+
+        if not isinstance(e, ArtifactLoadError):
+            raise
+        logger.error(f"Failed to load required data files: {e}")
+        message = config.ERROR_MISSING_DATA_FILE if e.missing else config.ERROR_CORRUPT_DATA_FILE
+        st.error(message.format(file=e.path))
+        st.stop()
+
+
+@st.cache_resource(show_spinner=False)
+def _build_title_index(path: str) -> "TitleSearchIndex":
+    from search import TitleSearchIndex
+
+    labels, ranked = load_title_list(path)
+    return TitleSearchIndex(labels, ranked=ranked)
+
+
+def get_title_index(engine: Optional["RecommendationEngine"]) -> Optional["TitleSearchIndex"]:
+    """
+    Title search index of the artifact version being served.
+    
+    Built once per version from the precomputed ``titles.json``, so the picker
+    works before the engine has loaded; legacy artifacts without one use the
+    engine's own index. Once the engine is loaded, the titles come from the
+    version it serves, not a newer one published since.
+    
+    Args:
+        engine (Optional[RecommendationEngine]): The engine, if already loaded.
+    
+    Returns:
+        Optional[TitleSearchIndex]: The index, or None if it needs the engine
+            and that is still loading.
+    """
+    path = (engine.paths if engine is not None else artifact_paths()).get("titles")
+    if path is not None and os.path.exists(path):
+        return _build_title_index(path)
+    return engine.title_index if engine is not None else None
+
+
+@st.cache_resource(show_spinner=False)
+def get_poster_cache() -> PosterCache:
+    """Open the persistent poster cache shared by all sessions and processes."""
+    return PosterCache(config.POSTER_CACHE_FILE)
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache() -> ResultCache:
+    """Open the recommendation cache: a per-process LRU over a shared SQLite file."""
+    cache = ResultCache(path=config.RESULT_CACHE_FILE, namespace="app")
+    registry.register("result_cache", cache.stats)
+    return cache
+
+
+def fetch_movie_posters(movie_ids: Tuple[int, ...]) -> Tuple[List[str], bool]:
     """
-    Fetch movie poster URL from TMDB API.
+    Fetch poster URLs for a list of movies, from the poster cache or TMDB.
     
     Args:
-        movie_id (int): The TMDB movie ID.
+        movie_ids (Tuple[int, ...]): The TMDB movie IDs.
     
     Returns:
-        str: URL of the movie poster, or placeholder image if unavailable.
+        Tuple[List[str], bool]: Poster URL for each movie, or placeholder image
+            if unavailable, and whether every poster was definitively resolved
+            (no timeouts or transient errors).
     """
+    from posters import poster_url, resolve_poster_paths
+
+    paths, failed = resolve_poster_paths(movie_ids, api_key, cache=get_poster_cache())
+    return [poster_url(paths.get(movie_id)) for movie_id in movie_ids], not failed
+
+
+class RecommendationList(NamedTuple):
+    """
+    Recommendations of one request, before their posters are known.
+    
+    Attributes:
+        key (ResultKey): Result cache key of the request.
+        titles (List[str]): Recommended titles, best first.
+        movie_ids (List[int]): Their TMDB ids.
+        posters (Optional[List[str]]): Poster URLs when the whole response came
+            from the result cache, None when they still have to be resolved.
+    """
+    key: ResultKey
+    titles: List[str]
+    movie_ids: List[int]
+    posters: Optional[List[str]]
+
+
+def find_recommendations(
+    movie_title: Union[str, List[str]], 
+    engine: "RecommendationEngine",
+    num_recommendations: int = config.NUM_RECOMMENDATIONS,
+    mode: str = config.RECOMMENDATION_MODE,
+    aggregate: str = config.BLEND_AGGREGATION,
+    rerank: bool = config.RERANK_RESULTS
+) -> Optional[RecommendationList]:
+    """
+    Find the movies most similar to the selected movie(s), without their posters.
+    
+    Responses are cached by seed TMDB ids, ``k``, mode, aggregation and
+    artifact version (see :mod:`result_cache`), so popular seeds skip both the
+    neighbor query and the poster lookups.
+    
+    Args:
+        movie_title (Union[str, List[str]]): Title or display label of the
+            movie to find recommendations for, or several to blend.
+        engine (RecommendationEngine): Loaded recommendation engine.
+        num_recommendations (int): Number of recommendations to return.
+        mode (str): ``"exact"`` for the precomputed/brute-force neighbors, or
+            ``"approx"`` to search the ANN index.
+        aggregate (str): How several movies are blended: ``"sum"`` (average
+            similarity) or ``"max"`` (similarity to the closest one).
+        rerank (bool): Re-rank the most similar movies by popularity, rating,
+            recency and diversity (see :mod:`rerank`).
+    
+    Returns:
+        Optional[RecommendationList]: The recommendations, or None if the
+            movie was not found (a warning has been shown).
+    """
+    from engine import AmbiguousTitleError, MovieNotFoundError
+
+    single = isinstance(movie_title, str)
     try:
-        response = requests.get(
-            f"{config.BASE_URL}{movie_id}",
-            params={"api_key": api_key, "language": "en-US"},
-            timeout=config.API_TIMEOUT,
+        logger.info(f"Finding recommendations for: {movie_title}")
+        seeds = [movie_title] if single else movie_title
+        key = result_key(
+            engine.version,
+            engine.catalog.movie_ids[[engine.resolve(title) for title in seeds]],
+            num_recommendations, mode, aggregate=None if single else aggregate,
+            rerank=engine.reranker.weights.signature if rerank else None,
         )
-        response.raise_for_status()
-        poster_path = response.json().get("poster_path")
-        
-        if poster_path:
-            logger.debug(f"Successfully fetched poster for movie ID {movie_id}")
-            return f"{config.IMAGE_BASE_URL}{poster_path}"
-    
-    except requests.exceptions.Timeout:
-        logger.warning(f"Timeout fetching poster for movie ID {movie_id}")
-    except requests.exceptions.HTTPError as e:
-        logger.warning(f"HTTP error fetching poster for movie ID {movie_id}: {e}")
+        cached = get_result_cache().get(key)
+        if cached is not None:
+            logger.info(f"Serving cached recommendations for: {movie_title}")
+            return RecommendationList(key, cached["titles"], [], cached["posters"])
+
+        if single:
+            recommendations = engine.recommend(
+                movie_title, k=num_recommendations, mode=mode, rerank=rerank
+            )
+        else:
+            recommendations = engine.recommend_blend(
+                movie_title, k=num_recommendations, aggregate=aggregate, mode=mode, rerank=rerank
+            )
+    except AmbiguousTitleError as e:
+        logger.warning(f"Ambiguous movie title: {e}")
+        st.warning(config.ERROR_AMBIGUOUS_TITLE.format(
+            movie=e.title, ids=", ".join(map(str, e.movie_ids))
+        ))
+        return None
+    except MovieNotFoundError as e:
+        logger.warning(f"Movie not found in dataset: {e.query}")
+        st.warning(config.ERROR_MOVIE_NOT_FOUND.format(movie=e.query))
+        return None
     except Exception as e:
-        logger.warning(f"Error fetching poster for movie ID {movie_id}: {e}")
+        logger.error(f"Error generating recommendations: {e}")
+        st.error(f"An error occurred while generating recommendations: {e}")
+        return None
     
-    logger.debug(f"Using placeholder image for movie ID {movie_id}")
-    return config.PLACEHOLDER_IMAGE
+    logger.info(f"Generated {len(recommendations)} recommendations")
+    return RecommendationList(
+        key,
+        [rec.title for rec in recommendations],
+        [rec.movie_id for rec in recommendations],
+        None,
+    )
+
+
+def cache_recommendations(found: RecommendationList, posters: List[str]) -> None:
+    """Store a response whose posters were all definitively resolved."""
+    get_result_cache().put(found.key, {"titles": found.titles, "posters": posters})
 
 
 def get_recommendations(
-    movie_title: str, 
-    movies_df: pd.DataFrame, 
-    similarity_matrix: any
+    movie_title: Union[str, List[str]], 
+    engine: "RecommendationEngine",
+    num_recommendations: int = config.NUM_RECOMMENDATIONS,
+    mode: str = config.RECOMMENDATION_MODE,
+    aggregate: str = config.BLEND_AGGREGATION,
+    rerank: bool = config.RERANK_RESULTS
 ) -> Tuple[List[str], List[str]]:
     """
-    Generate movie recommendations based on similarity to a selected movie.
+    Generate movie recommendations and wait for all of their posters.
     
     Args:
-        movie_title (str): Title of the movie to find recommendations for.
-        movies_df (pd.DataFrame): DataFrame containing movie information.
-        similarity_matrix (any): Similarity scores matrix.
+        movie_title (Union[str, List[str]]): Title or display label of the
+            movie to find recommendations for, or several to blend.
+        engine (RecommendationEngine): Loaded recommendation engine.
+        num_recommendations (int): Number of recommendations to return.
+        mode (str): ``"exact"`` or ``"approx"``, as for :func:`find_recommendations`.
+        aggregate (str): ``"sum"`` or ``"max"``, as for :func:`find_recommendations`.
+        rerank (bool): Re-rank the candidates, as for :func:`find_recommendations`.
     
     Returns:
         Tuple[List[str], List[str]]: Tuple of (movie titles, poster URLs) for
             the top N recommendations. Returns empty lists if movie not found.
     """
-    try:
-        # Find the index of the selected movie
-        movie_idx_series = movies_df[movies_df["title"] == movie_title].index
-        if len(movie_idx_series) == 0:
-            logger.warning(f"Movie not found in dataset: {movie_title}")
-            st.warning(config.ERROR_MOVIE_NOT_FOUND.format(movie=movie_title))
-            return [], []
-        
-        movie_idx = movie_idx_series[0]
-        logger.info(f"Finding recommendations for: {movie_title}")
-        
-        # Calculate similarity scores and sort
-        similarity_scores = enumerate(similarity_matrix[movie_idx])
-        sorted_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
-        
-        # Get top recommendations (skip the first one as it's the movie itself)
-        recommended_titles: List[str] = []
-        recommended_posters: List[str] = []
-        
-        for idx, _ in sorted_scores[1:config.NUM_RECOMMENDATIONS + 1]:
-            movie_row = movies_df.iloc[idx]
-            recommended_titles.append(movie_row["title"])
-            recommended_posters.append(fetch_movie_poster(movie_row["movie_id"]))
-        
-        logger.info(f"Generated {len(recommended_titles)} recommendations")
-        return recommended_titles, recommended_posters
-    
-    except Exception as e:
-        logger.error(f"Error generating recommendations: {e}")
-        st.error(f"An error occurred while generating recommendations: {e}")
+    found = find_recommendations(movie_title, engine, num_recommendations, mode, aggregate, rerank)
+    if found is None:
         return [], []
-
+    if found.posters is not None:
+        return found.titles, found.posters
+    
+    recommended_posters, complete = fetch_movie_posters(tuple(found.movie_ids))
+    # Placeholders standing in for timed-out posters must not be served for a day
+    if complete:
+        cache_recommendations(found, recommended_posters)
+    return found.titles, recommended_posters
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Main Application UI
 # ─────────────────────────────────────────────────────────────────────────────
 
+BLEND_OPTIONS = {"sum": "Average of all", "max": "Closest to any"}
+
+
 def render_hero_section() -> None:
     """Render the hero/header section of the application."""
     st.markdown("""
@@ -490,6 +659,45 @@ def render_hero_section() -> None:
     """, unsafe_allow_html=True)
 
 
+def _render_cards_heading(selected_movie: str) -> None:
+    st.markdown('<p class="section-heading">Recommended for You</p>', unsafe_allow_html=True)
+    st.markdown(
+        f'<p class="section-sub">Based on &nbsp;·&nbsp; {selected_movie}</p>',
+        unsafe_allow_html=True
+    )
+
+
+def cards_html(titles: List[str], posters: List[Optional[str]], settled: bool = False) -> str:
+    """
+    Build the HTML of a row of recommendation cards.
+    
+    Args:
+        titles (List[str]): Recommended movie titles.
+        posters (List[Optional[str]]): Poster URL per title, or None while it
+            is still being resolved (a loading placeholder is shown).
+        settled (bool): The row is already on screen; skip the entrance animation.
+    
+    Returns:
+        str: One ``cards-row`` element.
+    """
+    cards = []
+    for rank, (title, poster) in enumerate(zip(titles, posters), 1):
+        if poster is None:
+            poster_html = '<div class="poster-wrap loading"></div>'
+        else:
+            poster_html = f'''<div class="poster-wrap">
+                    <img src="{poster}" alt="{title}" loading="lazy"/>
+                </div>'''
+        cards.append(f"""
+            <div class="movie-card">
+                <span class="rank-badge">#{rank}</span>
+                {poster_html}
+                <div class="movie-card-title">{title}</div>
+            </div>""")
+    row_class = "cards-row settled" if settled else "cards-row"
+    return f'<div class="{row_class}">{"".join(cards)}</div>'
+
+
 def render_recommendation_cards(
     titles: List[str],
     posters: List[str],
@@ -503,26 +711,81 @@ def render_recommendation_cards(
         posters (List[str]): List of poster URLs.
         selected_movie (str): The original movie selected by the user.
     """
-    st.markdown('<p class="section-heading">Recommended for You</p>', unsafe_allow_html=True)
-    st.markdown(
-        f'<p class="section-sub">Based on &nbsp;·&nbsp; {selected_movie}</p>',
-        unsafe_allow_html=True
-    )
+    _render_cards_heading(selected_movie)
+    st.markdown(cards_html(titles, posters), unsafe_allow_html=True)
 
-    # Build HTML for recommendation cards
-    cards_html = '<div class="cards-row">'
-    for rank, (title, poster) in enumerate(zip(titles, posters), 1):
-        cards_html += f"""
-            <div class="movie-card">
-                <span class="rank-badge">#{rank}</span>
-                <div class="poster-wrap">
-                    <img src="{poster}" alt="{title}" loading="lazy"/>
-                </div>
-                <div class="movie-card-title">{title}</div>
-            </div>"""
-    cards_html += "</div>"
+
+def stream_recommendation_cards(
+    found: RecommendationList,
+    selected_movie: str,
+    started: float,
+) -> Tuple[float, float]:
+    """
+    Render the cards at once and fill in each poster as soon as it resolves.
+    
+    Titles and ranks come from the local catalog, so the row is shown before
+    any TMDB request; every resolved poster (or placeholder, for a failed or
+    late one) then re-renders the row in place. A response whose posters were
+    all resolved is stored in the result cache, as with
+    :func:`get_recommendations`.
     
-    st.markdown(cards_html, unsafe_allow_html=True)
+    Args:
+        found (RecommendationList): The recommendations to show.
+        selected_movie (str): The original movie selected by the user.
+        started (float): ``time.perf_counter()`` when the request began.
+    
+    Returns:
+        Tuple[float, float]: Seconds from ``started`` to the first render of
+            the row (time to first result) and to its last poster (time to
+            complete).
+    """
+    _render_cards_heading(selected_movie)
+    row = st.empty()
+    posters: List[Optional[str]] = (
+        list(found.posters) if found.posters is not None else [None] * len(found.titles)
+    )
+    with stage("render"):
+        row.markdown(cards_html(found.titles, posters), unsafe_allow_html=True)
+    first_result = time.perf_counter() - started
+    if found.posters is not None:
+        return first_result, first_result
+
+    from posters import iter_poster_paths, poster_url
+
+    # A movie listed twice gets its poster on every card
+    positions: Dict[int, List[int]] = {}
+    for i, movie_id in enumerate(found.movie_ids):
+        positions.setdefault(int(movie_id), []).append(i)
+    complete = True
+    with stage("posters"):
+        for movie_id, poster_path, resolved in iter_poster_paths(
+            found.movie_ids, api_key, cache=get_poster_cache()
+        ):
+            complete &= resolved
+            url = poster_url(poster_path)
+            for i in positions[movie_id]:
+                posters[i] = url
+            row.markdown(cards_html(found.titles, posters, settled=True), unsafe_allow_html=True)
+    # Placeholders standing in for timed-out posters must not be served for a day
+    if complete:
+        cache_recommendations(found, posters)
+    return first_result, time.perf_counter() - started
+
+
+def render_diagnostics(show_stats: bool, profiler: Optional[SamplingProfiler]) -> None:
+    """
+    Render the telemetry asked for with ``?stats=1`` and ``?profile=1``.
+
+    Args:
+        show_stats (bool): Show the process-wide stage histograms and counters.
+        profiler (Optional[SamplingProfiler]): Profile of the last request, if one ran.
+    """
+    if profiler is not None:
+        with st.expander("Profile of this request"):
+            st.json(profiler.summary())
+    if show_stats:
+        with st.expander("Telemetry"):
+            st.json(registry.snapshot())
 
 
 def main() -> None:
@@ -530,24 +793,64 @@ def main() -> None:
     # Render hero section
     render_hero_section()
     
-    # Load data
-    logger.info("Loading application data...")
-    movies, similarity = load_data()
+    # Diagnostics are opt-in per page load: ?stats=1 and/or ?profile=1
+    params = st.experimental_get_query_params()
+    show_stats = params.get("stats", ["0"])[0] not in ("", "0")
+    want_profile = params.get("profile", ["0"])[0] not in ("", "0")
+    profiler: Optional[SamplingProfiler] = None
     
-    # Check if data loaded successfully
-    if movies is None or similarity is None:
-        logger.error("Failed to load required data files")
-        return
+    # Start loading data; the picker only needs the precomputed title list
+    logger.info("Loading application data...")
+    # One engine for the whole run, even if a reload lands halfway through
+    engine = get_engine(wait=False)
+    title_index = get_title_index(engine)
+    if title_index is None:
+        engine = get_engine()
+        title_index = engine.title_index
     
     # Render search interface
     st.markdown('<div class="search-wrapper">', unsafe_allow_html=True)
-    st.markdown('<p class="search-label">Choose a movie</p>', unsafe_allow_html=True)
+    blend = st.checkbox("Blend several movies", value=False)
+    st.markdown(
+        f'<p class="search-label">Choose {"movies" if blend else "a movie"}</p>',
+        unsafe_allow_html=True
+    )
     
-    selected_movie = st.selectbox(
-        label="Select a movie",
-        options=sorted(movies["title"].values),
+    # Only the best matches reach the browser, not the whole catalog
+    query = st.text_input(
+        label="Search titles",
+        placeholder="Search titles…",
         label_visibility="collapsed",
     )
+    options = title_index.search(query)
+    if not options:
+        st.caption(f"No movies match “{query}”.")
+    
+    aggregate = config.BLEND_AGGREGATION
+    if blend:
+        # Picked seeds stay selectable while the search moves on
+        seeds = st.session_state.get("blend_seeds", [])
+        selected_movie = st.multiselect(
+            label="Select movies",
+            options=list(dict.fromkeys(seeds + options)),
+            default=seeds,
+            max_selections=config.MAX_BLEND_SEEDS,
+            label_visibility="collapsed",
+        )
+        st.session_state["blend_seeds"] = selected_movie
+        blend_label = st.radio(
+            label="Blend by",
+            options=list(BLEND_OPTIONS.values()),
+            index=list(BLEND_OPTIONS).index(config.BLEND_AGGREGATION),
+            horizontal=True,
+        )
+        aggregate = next(key for key, label in BLEND_OPTIONS.items() if label == blend_label)
+    else:
+        selected_movie = st.selectbox(
+            label="Select a movie",
+            options=options,
+            label_visibility="collapsed",
+        )
     
     st.markdown("</div>", unsafe_allow_html=True)
     
@@ -557,23 +860,52 @@ def main() -> None:
         find_btn = st.button("✦  Find Recommendations")
     
     # Handle recommendation request
-    if find_btn:
+    if find_btn and not selected_movie:
+        st.warning("Pick at least one movie to blend.")
+    elif find_btn:
         logger.info(f"User requested recommendations for: {selected_movie}")
-        with st.spinner("Curating your watchlist…"):
-            recommended_titles, recommended_posters = get_recommendations(
-                selected_movie, 
-                movies, 
-                similarity
-            )
+        started = time.perf_counter()
+        label = selected_movie if isinstance(selected_movie, str) else " + ".join(selected_movie)
+        milestones: Optional[Tuple[float, float]] = None
+        with trace() as stages:
+            profiler = SamplingProfiler().start() if want_profile else None
+            if config.STREAM_RESULTS:
+                # Only the neighbor query runs under the spinner; posters fill in afterwards
+                with st.spinner("Curating your watchlist…"):
+                    found = find_recommendations(selected_movie, engine or get_engine(), aggregate=aggregate)
+                if found is not None and found.titles:
+                    milestones = stream_recommendation_cards(found, label, started)
+            else:
+                with st.spinner("Curating your watchlist…"):
+                    recommended_titles, recommended_posters = get_recommendations(
+                        selected_movie, 
+                        engine or get_engine(),
+                        aggregate=aggregate
+                    )
+                if recommended_titles:
+                    with stage("render"):
+                        render_recommendation_cards(recommended_titles, recommended_posters, label)
+                    elapsed = time.perf_counter() - started
+                    milestones = (elapsed, elapsed)
+            
+            if milestones is None:
+                logger.warning(f"No recommendations generated for: {selected_movie}")
+            if profiler is not None:
+                profiler.stop()
         
-        if recommended_titles:
-            render_recommendation_cards(
-                recommended_titles,
-                recommended_posters,
-                selected_movie
+        if milestones is not None:
+            first_result, complete = milestones
+            registry.observe("response_seconds", first_result, milestone="first_result")
+            registry.observe("response_seconds", complete, milestone="complete")
+            logger.info(
+                f"Time to first result {first_result * 1000:.1f} ms, "
+                f"to complete {complete * 1000:.1f} ms"
             )
-        else:
-            logger.warning(f"No recommendations generated for: {selected_movie}")
+        if stages:
+            breakdown = ", ".join(f"{name} {ms:.2f} ms" for name, ms in stages.items())
+            logger.info(f"Request stages: {breakdown}")
+    
+    render_diagnostics(show_stats, profiler)
 
 
 if __name__ == "__main__":
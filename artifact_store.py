@@ -0,0 +1,281 @@
+"""
+Memory-mapped artifact store for CineMatch.
+
+Model artifacts (neighbor tables, movie vectors, ...) are written into a single
+raw binary file that every process maps read-only with ``numpy.memmap``. Pages
+are shared through the OS page cache, so opening a store is near-instant and
+costs no private memory no matter how large the catalog is.
+
+File layout (all integers little-endian)::
+
+    offset 0   8 bytes   magic  b"CMSTORE\\0"
+    offset 8   uint32    format version
+    offset 12  uint32    header length in bytes
+    offset 16  ...       UTF-8 JSON header
+    ...        ...       array payloads, each aligned to 64 bytes
+
+The JSON header has two keys: ``arrays`` maps each array name to its ``dtype``
+string, ``shape`` and absolute byte ``offset``; ``meta`` holds free-form build
+metadata.
+"""
+
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC: bytes = b"CMSTORE\0"
+FORMAT_VERSION: int = 1
+ALIGNMENT: int = 64
+
+_PREAMBLE = struct.Struct("<8sII")
+
+
+class ArtifactFormatError(ValueError):
+    """Raised when a file is not a readable CineMatch artifact store."""
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writing
+# ─────────────────────────────────────────────────────────────────────────────
+
+class StoreWriter:
+    """
+    Incrementally fill a new artifact store through writable memory maps.
+
+    The layout is fixed up front from the declared array specs, so large
+    arrays can be streamed to disk block by block instead of being held in
+    memory. The file is created next to its destination and only renamed into
+    place by :meth:`commit`, so readers never observe a partial store.
+
+    Usage::
+
+        with StoreWriter(path, {"ids": (np.int32, (n, k))}, meta) as writer:
+            writer["ids"][0:100] = ...
+    """
+
+    def __init__(
+        self,
+        path: str,
+        specs: Mapping[str, Tuple[Any, Tuple[int, ...]]],
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.path = path
+        self._specs = {name: (np.dtype(dtype), tuple(shape)) for name, (dtype, shape) in specs.items()}
+        self._arrays: Dict[str, np.ndarray] = {}
+
+        # The header size depends on the offsets it contains, so lay the payloads
+        # out after a generous estimate and grow it until the header fits.
+        header_room = ALIGNMENT
+        while True:
+            offset = _align(_PREAMBLE.size + header_room)
+            entries = {}
+            for name, (dtype, shape) in self._specs.items():
+                entries[name] = {"dtype": dtype.str, "shape": list(shape), "offset": offset}
+                offset = _align(offset + dtype.itemsize * int(np.prod(shape)))
+            header = json.dumps({"arrays": entries, "meta": meta or {}}).encode("utf-8")
+            if len(header) <= header_room:
+                break
+            header_room = _align(len(header))
+        self._entries = entries
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".store")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            f.truncate(offset)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            dtype, shape = self._specs[name]
+            if 0 in shape:
+                self._arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                self._arrays[name] = np.memmap(
+                    self._tmp_path, dtype=dtype, mode="r+",
+                    offset=self._entries[name]["offset"], shape=shape,
+                )
+        return self._arrays[name]
+
+    def commit(self) -> None:
+        """Flush every array to disk and atomically move the store into place."""
+        for arr in self._arrays.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+        self._arrays.clear()
+        with open(self._tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.chmod(self._tmp_path, 0o644)
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Discard the partially written store."""
+        self._arrays.clear()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+    def __enter__(self) -> "StoreWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def write_store(
+    path: str,
+    arrays: Mapping[str, np.ndarray],
+    meta: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Write arrays and metadata to ``path`` atomically.
+
+    The file is written next to its destination and renamed into place, so
+    readers see either the previous store or the complete new one.
+
+    Args:
+        path (str): Destination file path.
+        arrays (Mapping[str, np.ndarray]): Named arrays to store.
+        meta (Optional[Dict[str, Any]]): JSON-serialisable build metadata.
+    """
+    specs = {name: (arr.dtype, arr.shape) for name, arr in arrays.items()}
+    with StoreWriter(path, specs, meta) as writer:
+        for name, arr in arrays.items():
+            writer[name][...] = arr
+
+
+def pack_csr(name: str, matrix: Any) -> Dict[str, np.ndarray]:
+    """
+    Split a sparse matrix into the flat arrays the store can hold.
+
+    The matrix shape must also be recorded in the store metadata under
+    ``"<name>.shape"`` (see :func:`csr_meta`).
+
+    Args:
+        name (str): Prefix for the array names.
+        matrix (scipy.sparse.spmatrix): Matrix to pack.
+
+    Returns:
+        Dict[str, np.ndarray]: ``data``, ``indices`` and ``indptr`` arrays.
+    """
+    matrix = matrix.tocsr()
+    return {
+        f"{name}.data": matrix.data,
+        f"{name}.indices": matrix.indices.astype(np.int32, copy=False),
+        f"{name}.indptr": matrix.indptr.astype(np.int64, copy=False),
+    }
+
+
+def csr_meta(name: str, matrix: Any) -> Dict[str, Any]:
+    """Return the metadata entry that accompanies :func:`pack_csr`."""
+    return {f"{name}.shape": list(matrix.shape)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reading
+# ─────────────────────────────────────────────────────────────────────────────
+
+class ArtifactStore(Mapping[str, np.ndarray]):
+    """
+    Read-only view of an artifact store file.
+
+    Arrays are mapped lazily on first access and behave like regular
+    read-only NumPy arrays.
+
+    Attributes:
+        path (str): Path of the underlying file.
+        version (int): Format version the file was written with.
+        meta (Dict[str, Any]): Build metadata stored in the header.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise ArtifactFormatError(f"{path}: file too short for a store header")
+            magic, version, header_len = _PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise ArtifactFormatError(f"{path}: not a CineMatch artifact store")
+            if version > FORMAT_VERSION:
+                raise ArtifactFormatError(
+                    f"{path}: store format v{version} is newer than supported "
+                    f"v{FORMAT_VERSION}"
+                )
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        self.version = version
+        self.meta: Dict[str, Any] = header.get("meta", {})
+        self._entries: Dict[str, Dict[str, Any]] = header["arrays"]
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            entry = self._entries[name]
+            dtype = np.dtype(entry["dtype"])
+            shape = tuple(entry["shape"])
+            if 0 in shape:
+                # numpy.memmap refuses zero-length mappings
+                arr = np.empty(shape, dtype=dtype)
+                arr.flags.writeable = False
+            else:
+                arr = np.memmap(
+                    self.path, dtype=dtype, mode="r",
+                    offset=entry["offset"], shape=shape,
+                )
+            self._arrays[name] = arr
+        return self._arrays[name]
+
+    def csr(self, name: str) -> Any:
+        """
+        Rebuild a sparse CSR matrix stored with :func:`pack_csr`, without copying.
+
+        Args:
+            name (str): Prefix the matrix was packed under.
+
+        Returns:
+            scipy.sparse.csr_matrix: Matrix backed by the mapped arrays.
+        """
+        import scipy.sparse as sp
+
+        return sp.csr_matrix(
+            (self[f"{name}.data"], self[f"{name}.indices"], self[f"{name}.indptr"]),
+            shape=tuple(self.meta[f"{name}.shape"]),
+            copy=False,
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"ArtifactStore({self.path!r}, arrays={list(self._entries)})"
+
+
+def open_store(path: str) -> ArtifactStore:
+    """
+    Open an artifact store for memory-mapped, read-only access.
+
+    Args:
+        path (str): Path to the store file.
+
+    Returns:
+        ArtifactStore: Mapping of array names to memory-mapped arrays.
+
+    Raises:
+        ArtifactFormatError: If the file is not a supported artifact store.
+    """
+    return ArtifactStore(path)
@@ -0,0 +1,116 @@
+"""
+Approximate vs exact recommendation benchmark.
+
+Vectorizes the tags of ``movie_list.pkl``, builds the ANN index and compares it
+with exact brute-force cosine search: recall@K against the exact neighbors and
+per-query latency (p50/p99) for several ``n_probe``/``refine`` settings.
+
+Usage:
+    python benchmarks/bench_ann.py --k 10 --probes 4 8 16 32 --refine 1 5
+"""
+
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+from ann import build_ann_index  # noqa: E402
+from neighbors import normalize_vectors, top_n, vectorize_tags  # noqa: E402
+
+
+def measure(query: Callable[[int], np.ndarray], rows: np.ndarray) -> Dict[str, Any]:
+    """Run ``query`` for every row and return its results and latency percentiles."""
+    results, latencies = [], []
+    for row in rows:
+        started = time.perf_counter()
+        results.append(query(int(row)))
+        latencies.append(time.perf_counter() - started)
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "results": results,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def recall(results: List[np.ndarray], truth: List[np.ndarray]) -> float:
+    """Mean fraction of the exact top-K found by each approximate query."""
+    return float(np.mean([
+        len(np.intersect1d(found, expected)) / len(expected)
+        for found, expected in zip(results, truth)
+    ]))
+
+
+def main() -> None:
+    """Build the ANN index over the shipped catalog and report recall and latency."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--movies", default=config.MOVIE_LIST_FILE)
+    parser.add_argument("--k", type=int, default=config.NUM_RECOMMENDATIONS * 2)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--components", type=int, default=config.ANN_COMPONENTS)
+    parser.add_argument("--lists", type=int, default=config.ANN_LISTS)
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--refine", type=int, nargs="+", default=[1, config.ANN_REFINE])
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.movies, "rb") as f:
+        movies = pickle.load(f)
+    vectors = normalize_vectors(vectorize_tags(movies["tags"]))
+
+    started = time.perf_counter()
+    ann = build_ann_index(vectors, n_components=args.components, n_lists=args.lists)
+    build_s = time.perf_counter() - started
+    print(
+        f"{vectors.shape[0]} movies, {ann.embeddings.shape[1]} dims, "
+        f"{len(ann.centroids)} lists, built in {build_s:.1f}s"
+    )
+
+    rows = np.random.default_rng(0).choice(
+        vectors.shape[0], min(args.queries, vectors.shape[0]), replace=False
+    )
+
+    def exact(row: int) -> np.ndarray:
+        scores = (vectors @ vectors[row].T).toarray().ravel()
+        return top_n(scores, args.k, exclude=[row])[0]
+
+    baseline = measure(exact, rows)
+    truth = baseline["results"]
+    report: List[Dict[str, Any]] = [{
+        "mode": "exact", "n_probe": None, "refine": None, "recall": 1.0,
+        "p50_ms": baseline["p50_ms"], "p99_ms": baseline["p99_ms"],
+    }]
+    for refine in args.refine:
+        for n_probe in args.probes:
+            run = measure(lambda row: ann.query(row, args.k, n_probe, refine)[0], rows)
+            report.append({
+                "mode": "approx", "n_probe": n_probe, "refine": refine,
+                "recall": round(recall(run["results"], truth), 3),
+                "p50_ms": run["p50_ms"], "p99_ms": run["p99_ms"],
+            })
+
+    print(f"{'mode':>7} {'probes':>6} {'refine':>6} {f'recall@{args.k}':>10} "
+          f"{'p50 ms':>7} {'p99 ms':>7}")
+    for entry in report:
+        print(
+            f"{entry['mode']:>7} {entry['n_probe'] or '-':>6} {entry['refine'] or '-':>6} "
+            f"{entry['recall']:>10.3f} {entry['p50_ms']:>7.3f} {entry['p99_ms']:>7.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"n_movies": vectors.shape[0], "k": args.k, "build_s": round(build_s, 3),
+                       "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+HTTP API load test.
+
+Starts ``api.py`` in a subprocess (or targets ``--url``), sends single and
+batch recommendation requests for random catalog titles at a fixed
+concurrency, and reports throughput plus client-side p50/p99 latency next to
+the server's own ``/metrics``.
+
+Usage:
+    python benchmarks/bench_api.py --requests 2000 --concurrency 16
+"""
+
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError  # noqa: E402
+
+import config  # noqa: E402
+
+
+async def wait_ready(client: AsyncHTTPClient, url: str, timeout: float = 60.0) -> None:
+    """Poll ``/health`` until the server answers."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.fetch(f"{url}/health")
+            return
+        except (ConnectionError, OSError, HTTPClientError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def load(
+    client: AsyncHTTPClient,
+    url: str,
+    titles: List[str],
+    requests: int,
+    concurrency: int,
+    batch: int,
+    k: int,
+    mode: str,
+) -> Dict[str, Any]:
+    """Send ``requests`` requests from ``concurrency`` workers and time each one."""
+    rng = np.random.default_rng(0)
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            picks = [titles[i] for i in rng.integers(len(titles), size=batch)]
+            if batch == 1:
+                query = urllib.parse.urlencode({"title": picks[0], "k": k, "mode": mode})
+                request = {"request": f"{url}/recommend?{query}"}
+            else:
+                request = {
+                    "request": f"{url}/recommend/batch", "method": "POST",
+                    "body": json.dumps({"queries": picks, "k": k, "mode": mode}),
+                }
+            started = time.perf_counter()
+            try:
+                await client.fetch(**request)
+            except HTTPClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {
+        "batch": batch,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "requests_per_s": round(requests / elapsed, 1),
+        "queries_per_s": round(requests * batch / elapsed, 1),
+        "p50_ms": round(float(p50), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every configured load level against the server."""
+    from engine import RecommendationEngine
+
+    titles = RecommendationEngine.from_artifacts(args.artifacts).catalog.sorted_labels
+    client = AsyncHTTPClient(max_clients=max(args.concurrency))
+    await wait_ready(client, args.url)
+
+    results = []
+    for batch in args.batch:
+        for concurrency in args.concurrency:
+            results.append(await load(
+                client, args.url, titles, args.requests, concurrency, batch, args.k, args.mode
+            ))
+    metrics = json.loads((await client.fetch(f"{args.url}/metrics")).body)
+    return {"results": results, "server_metrics": metrics}
+
+
+def main() -> None:
+    """Start the API (unless ``--url`` is given) and load-test it."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=config.API_PORT + 1)
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 32],
+                        help="queries per request; 1 uses GET /recommend")
+    parser.add_argument("--k", type=int, default=config.NUM_RECOMMENDATIONS)
+    parser.add_argument("--mode", default=config.RECOMMENDATION_MODE)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    server: Optional[subprocess.Popen] = None
+    if args.url is None:
+        args.url = f"http://{config.API_HOST}:{args.port}"
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "api.py"),
+             "--port", str(args.port), "--artifacts", args.artifacts],
+            cwd=ROOT, stderr=subprocess.DEVNULL,
+        )
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{'batch':>5} {'conc':>4} {'req/s':>8} {'queries/s':>9} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'errors':>6}")
+    for r in report["results"]:
+        print(
+            f"{r['batch']:>5} {r['concurrency']:>4} {r['requests_per_s']:>8.0f} "
+            f"{r['queries_per_s']:>9.0f} {r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['errors']:>6}"
+        )
+    print("server:", json.dumps(report["server_metrics"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Batch recommendation throughput benchmark.
+
+Compares queries/sec of a per-title loop over ``RecommendationEngine.recommend``
+with a single ``recommend_batch`` call, on the current artifacts, for a small
+``k`` (answered from the neighbor table), a ``k`` above the stored K (scored
+exactly from the vectors) and with per-query exclusion lists.
+
+Usage:
+    python benchmarks/bench_batch.py --queries 5000 --k 10 100
+"""
+
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+from engine import RecommendationEngine  # noqa: E402
+
+
+def timed(fn: Any, repeat: int) -> float:
+    """Best wall-clock time of ``repeat`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    """Run loop-vs-batch comparisons and print queries/sec."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, nargs="+", default=[10, config.MAX_RECOMMENDATIONS])
+    parser.add_argument("--exclude", type=int, default=20,
+                        help="TMDB ids excluded per query in the exclusion runs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    engine = RecommendationEngine.from_artifacts(args.artifacts)
+    rng = np.random.default_rng(0)
+    rows = rng.integers(len(engine.catalog), size=args.queries)
+    labels = [engine.catalog.labels[row] for row in rows]
+    seen = [
+        engine.catalog.movie_ids[rng.integers(len(engine.catalog), size=args.exclude)].tolist()
+        for _ in rows
+    ]
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'k':>4} {'exclude':>7} {'loop q/s':>10} {'batch q/s':>10} {'speedup':>8}")
+    for k in args.k:
+        for exclude in (None, seen):
+            if exclude is None:
+                def loop() -> None:
+                    for label in labels:
+                        engine.recommend(label, k=k)
+            else:
+                # The per-call path has no exclusions: over-fetch and filter
+                def loop() -> None:
+                    for label, skip in zip(labels, exclude):
+                        skip = set(skip)
+                        recs = engine.recommend(label, k=min(k + len(skip), config.MAX_RECOMMENDATIONS))
+                        [rec for rec in recs if rec.movie_id not in skip][:k]
+
+            loop_s = timed(loop, args.repeat)
+            batch_s = timed(lambda: engine.recommend_batch(labels, k=k, exclude=exclude), args.repeat)
+            results.append({
+                "k": k,
+                "exclude": args.exclude if exclude else 0,
+                "queries": args.queries,
+                "loop_qps": round(args.queries / loop_s, 1),
+                "batch_qps": round(args.queries / batch_s, 1),
+            })
+            r = results[-1]
+            print(f"{k:>4} {r['exclude']:>7} {r['loop_qps']:>10.0f} {r['batch_qps']:>10.0f} "
+                  f"{r['batch_qps'] / r['loop_qps']:>7.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Multi-seed blend latency benchmark.
+
+Measures p50/p99 latency of ``RecommendationEngine.recommend_blend`` for
+several seed counts and both aggregations, next to single-seed
+``recommend`` queries answered from the neighbor table (``k`` ≤ K) and by
+exact scoring (``k`` > K), on the current artifacts.
+
+Usage:
+    python benchmarks/bench_blend.py --seeds 2 3 5 10 --queries 500
+"""
+
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+from engine import RecommendationEngine  # noqa: E402
+
+
+def percentiles(fn: Callable[[int], Any], queries: int) -> Dict[str, float]:
+    """Call ``fn(i)`` for ``i`` in ``range(queries)`` and return p50/p99 in ms."""
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - started)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {"p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3)}
+
+
+def main() -> None:
+    """Time single-seed and blended queries and print a latency table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[2, 3, 5, config.MAX_BLEND_SEEDS])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=config.NUM_RECOMMENDATIONS)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    engine = RecommendationEngine.from_artifacts(args.artifacts)
+    labels = engine.catalog.labels
+    rng = np.random.default_rng(0)
+    seeds = rng.integers(len(labels), size=(args.queries, max(args.seeds)))
+
+    results: List[Dict[str, Any]] = [
+        {"query": f"single k={args.k}",
+         **percentiles(lambda i: engine.recommend(labels[seeds[i, 0]], k=args.k), args.queries)},
+        {"query": f"single k={engine.neighbors.k + 1} (exact)",
+         **percentiles(lambda i: engine.recommend(labels[seeds[i, 0]], k=engine.neighbors.k + 1),
+                       args.queries)},
+    ]
+    for n_seeds in args.seeds:
+        for aggregate in ("sum", "max"):
+            results.append({
+                "query": f"blend {n_seeds} seeds, {aggregate}",
+                **percentiles(
+                    lambda i: engine.recommend_blend(
+                        labels[seeds[i, :n_seeds]].tolist(), k=args.k, aggregate=aggregate
+                    ),
+                    args.queries,
+                ),
+            })
+
+    print(f"{'query':<28} {'p50 ms':>7} {'p99 ms':>7}")
+    for r in results:
+        print(f"{r['query']:<28} {r['p50_ms']:>7.3f} {r['p99_ms']:>7.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"n_movies": len(labels), "k": args.k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Neighbor index build benchmark.
+
+Builds a top-K index from synthetic sparse bag-of-words vectors at several
+catalog sizes and worker counts, each run in a fresh subprocess, and reports
+wall-clock time and peak RSS (of the parent process and of the largest worker).
+
+Usage:
+    python benchmarks/bench_build.py --sizes 5000 20000 50000 100000 --workers 1 4
+"""
+
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+
+
+def synthetic_vectors(n_rows: int, vocabulary: int, nnz_per_row: int, seed: int = 0) -> Any:
+    """
+    Generate a sparse count matrix shaped like the CountVectorizer output.
+
+    Term frequencies follow a Zipf-like distribution, so popular terms are
+    shared by many movies as they are in the real tags.
+    """
+    import numpy as np
+    import scipy.sparse as sp
+
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    cols = rng.choice(vocabulary, size=n_rows * nnz_per_row, p=weights).astype(np.int32)
+    rows = np.repeat(np.arange(n_rows, dtype=np.int32), nnz_per_row)
+    data = np.ones(len(cols), dtype=np.float32)
+    return sp.csr_matrix((data, (rows, cols)), shape=(n_rows, vocabulary))
+
+
+def run_one(n_rows: int, workers: int, block_size: int, k: int) -> Dict[str, Any]:
+    """Build one index in this process and return its measurements."""
+    from neighbors import build_neighbor_store
+
+    vectors = synthetic_vectors(n_rows, config.VECTORIZER_MAX_FEATURES, nnz_per_row=30)
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        build_neighbor_store(
+            vectors, os.path.join(tmp, "index.store"),
+            k=k, block_size=block_size, workers=workers,
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "n": n_rows,
+        "workers": workers,
+        "block_size": block_size,
+        "k": k,
+        "wall_s": round(elapsed, 3),
+        "rows_per_s": round(n_rows / elapsed, 1),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_worker_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def main() -> None:
+    """Run the benchmark matrix, one subprocess per configuration."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000, 50000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--block-size", type=int, default=config.NEIGHBOR_BLOCK_SIZE)
+    parser.add_argument("--k", type=int, default=config.NEIGHBOR_K)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_one(args.sizes[0], args.workers[0], args.block_size, args.k)))
+        return
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'N':>8} {'workers':>7} {'wall s':>8} {'rows/s':>9} {'RSS MB':>8} {'worker MB':>9}")
+    for n_rows in args.sizes:
+        for workers in args.workers:
+            out = subprocess.run(
+                [sys.executable, __file__, "--single",
+                 "--sizes", str(n_rows), "--workers", str(workers),
+                 "--block-size", str(args.block_size), "--k", str(args.k)],
+                check=True, capture_output=True, text=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(
+                f"{result['n']:>8} {result['workers']:>7} {result['wall_s']:>8.2f} "
+                f"{result['rows_per_s']:>9.0f} {result['peak_rss_mb']:>8.0f} "
+                f"{result['peak_worker_rss_mb']:>9.0f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
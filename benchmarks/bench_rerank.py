@@ -0,0 +1,89 @@
+"""
+Hybrid re-ranking micro-benchmark.
+
+Retrieves the ``--candidates`` most similar movies of randomly drawn seeds from
+the current artifacts and times :meth:`rerank.Reranker.rerank` on them, for
+each candidate pool size, result count ``k`` and set of diversity vectors (ANN
+embeddings, sparse bag-of-words rows, or none). Retrieval is not timed.
+
+Besides latency it reports what the re-ranking changes: the share of the top
+``k`` that differs from pure similarity, and the mean popularity, rating and
+recency priors of the results before and after.
+
+Usage:
+    python benchmarks/bench_rerank.py --candidates 50 500 --k 5 20
+"""
+
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+from engine import RecommendationEngine  # noqa: E402
+from rerank import FEATURES, Reranker, RerankWeights  # noqa: E402
+
+
+def main() -> None:
+    """Benchmark re-ranking over the current artifacts."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[config.RERANK_CANDIDATES, 500])
+    parser.add_argument("--k", type=int, nargs="+", default=[config.NUM_RECOMMENDATIONS, 20])
+    parser.add_argument("--seeds", type=int, default=500)
+    parser.add_argument("--diversity", type=float, default=config.RERANK_DIVERSITY)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    engine = RecommendationEngine.from_artifacts(args.artifacts)
+    features = engine.reranker.features
+    seeds = np.random.default_rng(0).choice(len(engine.catalog), min(args.seeds, len(engine.catalog)), replace=False)
+    vector_sets = {
+        "ann": engine.ann.embeddings if engine.ann is not None else None,
+        "sparse": engine.neighbors.vectors,
+        "none": None,
+    }
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'vectors':<7} {'M':>5} {'k':>4} {'p50 us':>8} {'p99 us':>8} {'changed':>8} "
+          + " ".join(f"{name:>17}" for name in FEATURES))
+    for m in args.candidates:
+        candidates = [engine.neighbors.query(int(seed), m) for seed in seeds]
+        for label, vectors in vector_sets.items():
+            if vectors is None and label != "none":
+                continue
+            reranker = Reranker(features, vectors, RerankWeights(diversity=args.diversity, candidates=m))
+            for k in args.k:
+                latencies, changed, before, after = [], 0.0, [], []
+                for rows, scores in candidates:
+                    started = time.perf_counter()
+                    picked, _ = reranker.rerank(rows, scores, k)
+                    latencies.append(time.perf_counter() - started)
+                    changed += 1 - len(np.intersect1d(picked, rows[:k])) / k
+                    before.append(features[rows[:k]].mean(axis=0))
+                    after.append(features[picked].mean(axis=0))
+                p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+                shift = {
+                    name: [round(float(b), 3), round(float(a), 3)]
+                    for name, b, a in zip(FEATURES, np.mean(before, axis=0), np.mean(after, axis=0))
+                }
+                results.append({"vectors": label, "candidates": m, "k": k,
+                                "p50_us": round(float(p50), 1), "p99_us": round(float(p99), 1),
+                                "changed": round(changed / len(candidates), 3), "features": shift})
+                print(f"{label:<7} {m:>5} {k:>4} {p50:>8.0f} {p99:>8.0f} {changed / len(candidates):>8.2f} "
+                      + " ".join(f"{b:>8.3f}->{a:<7.3f}" for b, a in shift.values()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Typeahead title search micro-benchmark.
+
+Builds :class:`search.TitleSearchIndex` over the current catalog's labels,
+padded with synthetic titles (random recombinations of their words) up to
+``--sizes`` entries, and reports build time, index size and p50/p99 lookup
+latency for three kinds of queries on randomly drawn targets:
+
+* prefix: the first 1-12 characters of the title, as typed;
+* typo: the first two words with one character dropped or swapped;
+* accent-free: the full title, lowercased and without accents.
+
+``hit@N`` is the share of queries whose target is among the returned labels.
+
+Usage:
+    python benchmarks/bench_search.py --sizes 5000 100000 --queries 2000
+"""
+
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+from catalog import load_title_list  # noqa: E402
+from engine import RecommendationEngine  # noqa: E402
+from manifest import artifact_paths  # noqa: E402
+from search import TitleSearchIndex, normalize_title  # noqa: E402
+
+
+def synthetic_labels(labels: List[str], size: int, rng: np.random.Generator) -> List[str]:
+    """Pad ``labels`` to ``size`` unique titles made of their words."""
+    words = [word for label in labels for word in label.split()]
+    result, seen = list(labels[:size]), set(labels[:size])
+    while len(result) < size:
+        title = " ".join(rng.choice(words, size=rng.integers(1, 6)))
+        if title not in seen:
+            seen.add(title)
+            result.append(title)
+    return result
+
+
+def typo(text: str, rng: np.random.Generator) -> str:
+    """Drop or swap one character of the first two words."""
+    text = " ".join(text.split()[:2])
+    if len(text) < 4:
+        return text
+    i = int(rng.integers(1, len(text) - 2))
+    if rng.random() < 0.5:
+        return text[:i] + text[i + 1:]
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def measure(index: TitleSearchIndex, queries: List[str], targets: List[str], limit: int) -> Dict[str, float]:
+    """Latency percentiles and hit rate of ``queries``."""
+    latencies, hits = [], 0
+    for query, target in zip(queries, targets):
+        started = time.perf_counter()
+        results = index.search(query, limit)
+        latencies.append(time.perf_counter() - started)
+        hits += target in results
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {"p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3),
+            "hit_rate": round(hits / len(queries), 3)}
+
+
+def main() -> None:
+    """Benchmark title search at several catalog sizes."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 100_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=config.SEARCH_RESULTS)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    titles_path = artifact_paths(args.artifacts).get("titles")
+    if titles_path and os.path.exists(titles_path):
+        base, _ = load_title_list(titles_path)
+    else:
+        base = RecommendationEngine.from_artifacts(args.artifacts).catalog.ranked_labels
+
+    rng = np.random.default_rng(0)
+    kinds: Dict[str, Callable[[str], str]] = {
+        "prefix": lambda label: label[:int(rng.integers(1, 13))],
+        "typo": lambda label: typo(label, rng),
+        "accent-free": normalize_title,
+    }
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'titles':>8} {'build s':>8} {'index MB':>9} {'query':<12} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {f'hit@{args.limit}':>7}")
+    for size in args.sizes:
+        labels = synthetic_labels(base, size, rng)
+        started = time.perf_counter()
+        index = TitleSearchIndex(labels, popularity=rng.random(size))
+        build_s = time.perf_counter() - started
+        index_mb = (index._postings.nbytes + index._indptr.nbytes) / 1e6
+
+        targets = [labels[i] for i in rng.integers(size, size=args.queries)]
+        for kind, make_query in kinds.items():
+            stats = measure(index, [make_query(t) for t in targets], targets, args.limit)
+            results.append({"titles": size, "build_s": round(build_s, 3),
+                            "index_mb": round(index_mb, 2), "query": kind, **stats})
+            print(f"{size:>8} {build_s:>8.2f} {index_mb:>9.1f} {kind:<12} "
+                  f"{stats['p50_ms']:>7.3f} {stats['p99_ms']:>7.3f} {stats['hit_rate']:>7.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Cold-start benchmark for the Streamlit app.
+
+Every measurement runs in a fresh interpreter, so module imports are cold
+(the OS page cache is not dropped):
+
+* ``python -X importtime -c "import app"``: total import time of ``app.py``
+  and the modules it pulls in, largest first, plus which heavy modules
+  (scipy, sklearn, requests, the engine) were imported at all;
+* first paint: the first script run of the app under Streamlit's ``AppTest``,
+  i.e. the time until the hero, picker and button are rendered;
+* engine ready: importing the engine and loading the current artifacts, the
+  work the app now does on a background thread.
+
+With ``--budget-ms`` the script exits non-zero when the median first paint
+exceeds the budget, so it can guard against regressions in CI.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 1500
+"""
+
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported only when a recommendation is requested (or on the loader thread)
+DEFERRED_MODULES = ("engine", "reloader", "scipy", "sklearn", "requests", "posters")
+
+FIRST_PAINT = """
+import json, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=300)
+at.secrets["TMDB_API_KEY"] = "benchmark"
+imported = time.perf_counter()
+at.run()
+painted = time.perf_counter()
+assert not at.exception, [e.value for e in at.exception]
+print(json.dumps({
+    "streamlit_import_s": imported - started,
+    "first_paint_s": painted - imported,
+    "options": len(at.selectbox[0].options) if at.selectbox else 0,
+}))
+"""
+
+ENGINE_READY = """
+import json, time
+started = time.perf_counter()
+from reloader import EngineReloader
+imported = time.perf_counter()
+EngineReloader()
+print(json.dumps({"import_s": imported - started, "load_s": time.perf_counter() - imported}))
+"""
+
+
+def run_python(args: List[str]) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter in the repository root."""
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Profile ``import <module>`` with ``-X importtime``.
+
+    Returns:
+        Tuple[float, List[Tuple[str, float]], List[str]]: Total ms, ms of each
+            module imported directly by it (largest first) and the deferred
+            modules that were imported anyway.
+    """
+    stderr = run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+    total, children, imported = 0.0, [], set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        imported.add(name.split(".")[0])
+        if name == module:
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            children.append((name, int(cumulative) / 1000))
+    children.sort(key=lambda child: -child[1])
+    return total, children, sorted(imported.intersection(DEFERRED_MODULES))
+
+
+def median(values: List[float]) -> float:
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main() -> None:
+    """Measure app import time, first paint and engine load in fresh processes."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="largest imports to list")
+    parser.add_argument("--budget-ms", type=float, help="fail if median first paint exceeds this")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    profiles = [import_profile("app") for _ in range(args.runs)]
+    paints = [json.loads(run_python(["-c", FIRST_PAINT]).stdout.splitlines()[-1])
+              for _ in range(args.runs)]
+    engines = [json.loads(run_python(["-c", ENGINE_READY]).stdout.splitlines()[-1])
+               for _ in range(args.runs)]
+
+    _, children, deferred = profiles[-1]
+    results: Dict[str, Any] = {
+        "runs": args.runs,
+        "import_app_ms": round(median([total for total, _, _ in profiles]), 1),
+        "largest_imports_ms": {name: round(ms, 1) for name, ms in children[:args.top]},
+        "deferred_modules_imported": deferred,
+        "streamlit_import_ms": round(median([p["streamlit_import_s"] for p in paints]) * 1000, 1),
+        "first_paint_ms": round(median([p["first_paint_s"] for p in paints]) * 1000, 1),
+        "picker_options": paints[-1]["options"],
+        "engine_import_ms": round(median([e["import_s"] for e in engines]) * 1000, 1),
+        "engine_load_ms": round(median([e["load_s"] for e in engines]) * 1000, 1),
+    }
+
+    print(f"import app                    {results['import_app_ms']:>8.1f} ms")
+    for name, ms in results["largest_imports_ms"].items():
+        print(f"  {name:<28} {ms:>8.1f} ms")
+    print(f"deferred imported             {', '.join(deferred) or 'none'}")
+    print(f"streamlit import              {results['streamlit_import_ms']:>8.1f} ms  (once per server)")
+    print(f"first paint                   {results['first_paint_ms']:>8.1f} ms  "
+          f"({results['picker_options']} picker options)")
+    print(f"engine import + load          {results['engine_import_ms']:>8.1f} + "
+          f"{results['engine_load_ms']:.1f} ms  (background)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.budget_ms is not None and results["first_paint_ms"] > args.budget_ms:
+        sys.exit(f"First paint {results['first_paint_ms']:.0f} ms exceeds the "
+                 f"{args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Offline benchmark suite for the recommendation hot path and data loading.
+
+Runs without network access or TMDB credentials, against the current
+artifacts (``movie_list.pkl`` or ``catalog.store`` plus the neighbor index)
+and against synthetic artifact versions of several catalog sizes:
+
+* engine: in a fresh interpreter per catalog, the cold import and load time of
+  :class:`engine.RecommendationEngine`, RSS after loading and peak RSS, and
+  p50/p99 latency of single, blend and batch queries;
+* posters: :func:`posters.resolve_poster_paths` for recommendation-sized
+  batches against a local stub TMDB server with injected latency (and
+  optional errors), cold and from a warm :class:`poster_cache.PosterCache`,
+  and :func:`posters.iter_poster_paths` (cold), which the app streams into
+  the cards: time to the first poster as well as to the last.
+
+Synthetic versions are written with the same writers as ``build_index.py``
+(random top-K neighbor tables, no vectors), so they load exactly like real
+ones. Results go to JSON (``--output``); ``--baseline`` prints the relative
+change of every metric against an earlier run.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes 5000 50000 200000 --output bench.json
+    python benchmarks/bench_suite.py --baseline bench.json
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+
+# Metrics where a larger value is an improvement, for --baseline
+HIGHER_IS_BETTER = ("per_s",)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Synthetic Artifacts
+# ─────────────────────────────────────────────────────────────────────────────
+
+def write_synthetic_version(root: str, n_movies: int, k: int = config.NEIGHBOR_K, seed: int = 0) -> str:
+    """
+    Publish a synthetic artifact version of ``n_movies`` movies under ``root``.
+
+    Returns:
+        str: The version string.
+    """
+    from catalog import save_catalog, save_title_list
+    from manifest import new_version, write_manifest
+    from neighbors import NeighborIndex, save_neighbor_index
+
+    rng = np.random.default_rng(seed)
+    version = new_version()
+    version_dir = os.path.join(root, version)
+    os.makedirs(version_dir)
+
+    movie_ids = rng.choice(10 * n_movies, size=n_movies, replace=False).astype(np.int64) + 1
+    titles = [f"Synthetic Movie {i}" for i in range(n_movies)]
+    popularity = rng.pareto(1.5, size=n_movies).astype(np.float32)
+    catalog = save_catalog(
+        os.path.join(version_dir, "catalog.store"), titles, movie_ids,
+        {"popularity": popularity}, meta={"version": version},
+    )
+    save_title_list(catalog, os.path.join(version_dir, "titles.json"))
+
+    # Random neighbors that never include the movie itself, best-first
+    offsets = rng.integers(1, n_movies, size=(n_movies, k))
+    ids = ((np.arange(n_movies)[:, None] + offsets) % n_movies).astype(np.int32)
+    scores = -np.sort(-rng.random((n_movies, k), dtype=np.float32), axis=1)
+    save_neighbor_index(NeighborIndex(ids, scores), os.path.join(version_dir, "index.store"))
+
+    write_manifest(
+        version, {"catalog": "catalog.store", "titles": "titles.json", "index": "index.store"},
+        meta={"synthetic": True, "n_movies": n_movies}, root=root,
+    )
+    return version
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Engine (runs in a fresh interpreter)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def current_rss_mb() -> float:
+    """Resident set size of this process, from /proc (0 where unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return 0.0
+
+
+def percentiles(fn: Callable[[int], Any], runs: int) -> Dict[str, float]:
+    """p50/p99 wall-clock milliseconds of ``fn(i)`` over ``runs`` calls."""
+    latencies = np.empty(runs)
+    for i in range(runs):
+        started = time.perf_counter()
+        fn(i)
+        latencies[i] = time.perf_counter() - started
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {"p50_ms": round(float(p50), 4), "p99_ms": round(float(p99), 4)}
+
+
+def run_engine(root: str, queries: int, batch_size: int, k: int) -> Dict[str, Any]:
+    """Load the artifacts under ``root`` in this process and time queries."""
+    started = time.perf_counter()
+    from engine import RecommendationEngine
+
+    imported = time.perf_counter()
+    engine = RecommendationEngine.from_artifacts(root)
+    loaded = time.perf_counter()
+    rss_loaded = current_rss_mb()
+
+    rng = np.random.default_rng(0)
+    n_movies = len(engine.catalog)
+    labels = [engine.catalog.labels[row] for row in rng.integers(n_movies, size=queries)]
+    movie_ids = engine.catalog.movie_ids[rng.integers(n_movies, size=(queries, batch_size))].tolist()
+
+    single = percentiles(lambda i: engine.recommend(labels[i], k=k), queries)
+    blend = percentiles(
+        lambda i: engine.recommend_blend([labels[i], labels[i - 1], labels[i - 2]], k=k),
+        queries,
+    )
+    batches = max(queries // batch_size, 10)
+    batch = percentiles(lambda i: engine.recommend_batch(movie_ids[i], k=k), batches)
+
+    return {
+        "version": engine.version,
+        "movies": n_movies,
+        "neighbors_k": engine.neighbors.k,
+        "import_s": round(imported - started, 4),
+        "load_s": round(loaded - imported, 4),
+        "rss_loaded_mb": round(rss_loaded, 1),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "single": single,
+        "blend3": blend,
+        f"batch{batch_size}": {
+            **batch,
+            "queries_per_s": round(batch_size / (batch["p50_ms"] / 1000), 1),
+        },
+    }
+
+
+def engine_in_subprocess(root: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run :func:`run_engine` in a fresh interpreter, so imports and pages are cold."""
+    out = subprocess.run(
+        [sys.executable, __file__, "--engine-worker", root,
+         "--queries", str(args.queries), "--batch-size", str(args.batch_size), "--k", str(args.k)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Posters
+# ─────────────────────────────────────────────────────────────────────────────
+
+class StubTMDBHandler(BaseHTTPRequestHandler):
+    """``GET /3/movie/<id>`` answering after an injected delay."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+
+    def do_GET(self) -> None:
+        time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0.0))
+        if random.random() < self.error_rate:
+            self.send_error(503)
+            return
+        movie_id = self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+        body = json.dumps({"id": int(movie_id), "poster_path": f"/{movie_id}.jpg"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_stub_tmdb(latency: float, jitter: float, error_rate: float) -> ThreadingHTTPServer:
+    """Serve a stub TMDB movie endpoint on a free local port, on a daemon thread."""
+    handler = type("Handler", (StubTMDBHandler,), {
+        "latency": latency, "jitter": jitter, "error_rate": error_rate,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-tmdb", daemon=True).start()
+    return server
+
+
+def run_posters(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Time poster resolution for batches of ``config.NUM_RECOMMENDATIONS`` movies."""
+    from poster_cache import PosterCache
+    from posters import iter_poster_paths, resolve_poster_paths
+
+    results = []
+    batch = config.NUM_RECOMMENDATIONS
+    for latency_ms in args.tmdb_latency_ms:
+        server = start_stub_tmdb(latency_ms / 1000, args.tmdb_jitter_ms / 1000, args.tmdb_error_rate)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/3/movie/"
+        batches = [list(range(i * batch + 1, (i + 1) * batch + 1)) for i in range(args.poster_batches)]
+        failed = 0
+
+        def resolve(i: int, cache: Optional[PosterCache] = None) -> None:
+            nonlocal failed
+            failed += len(resolve_poster_paths(batches[i], "benchmark", base_url=base_url, cache=cache)[1])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PosterCache(os.path.join(tmp, "posters.sqlite3"))
+            cold = percentiles(lambda i: resolve(i, cache), args.poster_batches)
+            cold_failed, failed = failed, 0
+            warm = percentiles(lambda i: resolve(i, cache), args.poster_batches)
+            warm_failed = failed
+
+        # Streamed, on ids no earlier pass has fetched
+        first = np.empty(args.poster_batches)
+        last = np.empty(args.poster_batches)
+        for i, movie_ids in enumerate(batches):
+            started = time.perf_counter()
+            for n, _ in enumerate(iter_poster_paths(
+                [movie_id + 10_000_000 for movie_id in movie_ids], "benchmark", base_url=base_url
+            )):
+                if n == 0:
+                    first[i] = time.perf_counter() - started
+            last[i] = time.perf_counter() - started
+        first_p50, first_p99, last_p50, last_p99 = np.concatenate([
+            np.percentile(first, [50, 99]), np.percentile(last, [50, 99]),
+        ]) * 1000
+        server.shutdown()
+        server.server_close()
+
+        results.append({
+            "tmdb_latency_ms": latency_ms,
+            "tmdb_jitter_ms": args.tmdb_jitter_ms,
+            "tmdb_error_rate": args.tmdb_error_rate,
+            "batch": batch,
+            "cold": {**cold, "failed": cold_failed},
+            "warm_cache": {**warm, "failed": warm_failed},
+            "streamed": {
+                "first_p50_ms": round(float(first_p50), 4), "first_p99_ms": round(float(first_p99), 4),
+                "p50_ms": round(float(last_p50), 4), "p99_ms": round(float(last_p99), 4),
+            },
+        })
+    return results
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reporting
+# ─────────────────────────────────────────────────────────────────────────────
+
+def flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    """Numeric metrics of a results document, keyed by their path."""
+    metrics: Dict[str, float] = {}
+    for entry in results["engine"]:
+        for name, value in entry.items():
+            if isinstance(value, dict):
+                for metric, number in value.items():
+                    metrics[f"engine/{entry['label']}/{name}.{metric}"] = number
+            elif isinstance(value, (int, float)) and name.endswith(("_s", "_mb")):
+                metrics[f"engine/{entry['label']}/{name}"] = value
+    for entry in results["posters"]:
+        for phase in ("cold", "warm_cache", "streamed"):
+            for metric, value in entry.get(phase, {}).items():
+                if metric.endswith("_ms"):
+                    metrics[f"posters/{entry['tmdb_latency_ms']}ms/{phase}.{metric}"] = value
+    return metrics
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the relative change of every metric present in both runs."""
+    current, before = flatten(results), flatten(baseline)
+    print(f"\n{'metric':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(current.keys() & before.keys()):
+        old, new = before[name], current[name]
+        change = (new - old) / old * 100 if old else 0.0
+        better = change > 0 if name.endswith(HIGHER_IS_BETTER) else change < 0
+        flag = "" if abs(change) < 5 else (" better" if better else " WORSE")
+        print(f"{name:<52} {old:>10.4g} {new:>10.4g} {change:>+7.1f}%{flag}")
+
+
+def print_engine(entry: Dict[str, Any], batch_size: int) -> None:
+    batch = entry[f"batch{batch_size}"]
+    print(
+        f"{entry['label']:>10} {entry['movies']:>8} {entry['load_s'] * 1000:>8.1f} "
+        f"{entry['rss_loaded_mb']:>7.0f} {entry['peak_rss_mb']:>7.0f} "
+        f"{entry['single']['p50_ms']:>7.3f} {entry['single']['p99_ms']:>7.3f} "
+        f"{entry['blend3']['p50_ms']:>7.3f} {entry['blend3']['p99_ms']:>7.3f} "
+        f"{batch['p50_ms']:>7.2f} {batch['p99_ms']:>7.2f}"
+    )
+
+
+def main() -> None:
+    """Run the engine and poster benchmarks and report them as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR,
+                        help="current artifacts to include ('' to skip)")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[5000, 50_000, 200_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--k", type=int, default=config.NUM_RECOMMENDATIONS)
+    parser.add_argument("--tmdb-latency-ms", type=float, nargs="*", default=[20.0, 100.0])
+    parser.add_argument("--tmdb-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--tmdb-error-rate", type=float, default=0.0)
+    parser.add_argument("--poster-batches", type=int, default=50)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--engine-worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine_worker:
+        print(json.dumps(run_engine(args.engine_worker, args.queries, args.batch_size, args.k)))
+        return
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {name: value for name, value in vars(args).items() if name != "engine_worker"},
+        },
+        "engine": [],
+        "posters": [],
+    }
+
+    print(f"{'catalog':>10} {'movies':>8} {'load ms':>8} {'RSS MB':>7} {'peak MB':>7} "
+          f"{'1 p50':>7} {'1 p99':>7} {'3 p50':>7} {'3 p99':>7} "
+          f"{f'{args.batch_size} p50':>7} {f'{args.batch_size} p99':>7}")
+    if args.artifacts:
+        entry = {"label": "current", **engine_in_subprocess(args.artifacts, args)}
+        results["engine"].append(entry)
+        print_engine(entry, args.batch_size)
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as root:
+            write_synthetic_version(root, size)
+            entry = {"label": str(size), **engine_in_subprocess(root, args)}
+        results["engine"].append(entry)
+        print_engine(entry, args.batch_size)
+
+    if args.tmdb_latency_ms:
+        results["posters"] = run_posters(args)
+        print(f"\n{'TMDB ms':>8} {'cold p50':>9} {'cold p99':>9} {'warm p50':>9} {'warm p99':>9} "
+              f"{'1st p50':>9} {'1st p99':>9} {'failed':>7}")
+        for entry in results["posters"]:
+            cold, warm, streamed = entry["cold"], entry["warm_cache"], entry["streamed"]
+            print(f"{entry['tmdb_latency_ms']:>8.0f} {cold['p50_ms']:>9.2f} {cold['p99_ms']:>9.2f} "
+                  f"{warm['p50_ms']:>9.3f} {warm['p99_ms']:>9.3f} "
+                  f"{streamed['first_p50_ms']:>9.2f} {streamed['first_p99_ms']:>9.2f} "
+                  f"{cold['failed'] + warm['failed']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Multi-process serving benchmark.
+
+For each ``--workers`` count, starts ``api.py --workers N`` (result cache off,
+so every request reaches the engine), drives ``GET /recommend`` for random
+catalog titles from ``--clients`` load-generating processes for
+``--duration`` seconds, and reports requests/s, its scaling relative to the
+first worker count, client-side p50/p99 latency and the memory of every
+worker, read from ``/proc/<pid>/smaps_rollup``:
+
+* ``rss``: resident pages, counting shared ones in full;
+* ``pss``: resident pages with each shared page split between the processes
+  mapping it, so PSS summed over the workers is what they really cost;
+* ``private``: pages no other process maps.
+
+With the artifacts shared, private memory per worker stays flat as workers
+are added and total PSS grows far slower than N x RSS. Throughput can only
+scale while there are idle cores for the workers and the clients.
+
+Linux only (``/proc``).
+
+Usage:
+    python benchmarks/bench_workers.py --workers 1 2 4 --clients 8
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+
+MB = 1 << 20
+
+
+def child_pids(pid: int) -> List[int]:
+    """Processes whose parent is ``pid``."""
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The parent pid is the second field after the parenthesised command name
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            found.append(int(entry))
+    return sorted(found)
+
+
+def memory(pid: int) -> Dict[str, int]:
+    """RSS, PSS and private bytes of a process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0]) * 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def wait_ready(port: int, launcher: int, workers: int, timeout: float = 60.0) -> List[int]:
+    """Wait until every worker is forked and the port answers; return the worker pids."""
+    expected = workers or os.cpu_count()
+    deadline = time.monotonic() + timeout
+    while True:
+        pids = [launcher] if workers == 1 else child_pids(launcher)
+        if len(pids) == expected:
+            try:
+                conn = http.client.HTTPConnection(config.API_HOST, port, timeout=5)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    return pids
+            except OSError:
+                pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"server on port {port} did not start {expected} workers")
+        time.sleep(0.2)
+
+
+def client(port: int, titles: List[str], duration: float, k: int, seed: int) -> Tuple[List[float], int]:
+    """Send requests back to back for ``duration`` seconds; return latencies and errors."""
+    rng = np.random.default_rng(seed)
+    latencies: List[float] = []
+    errors = 0
+    until = time.monotonic() + duration
+    while time.monotonic() < until:
+        query = urllib.parse.urlencode({"title": titles[rng.integers(len(titles))], "k": k})
+        started = time.perf_counter()
+        # A new connection per request, so the kernel spreads the load over the workers
+        conn = http.client.HTTPConnection(config.API_HOST, port, timeout=30)
+        try:
+            conn.request("GET", f"/recommend?{query}")
+            response = conn.getresponse()
+            response.read()
+            errors += response.status != 200
+        except OSError:
+            errors += 1
+        finally:
+            conn.close()
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def run_level(args: argparse.Namespace, workers: int, titles: List[str]) -> Dict[str, Any]:
+    """Start a server with ``workers`` processes, load it and measure it."""
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "api.py"), "--port", str(args.port),
+         "--artifacts", args.artifacts, "--workers", str(workers),
+         "--result-cache-size", "0", "--result-cache-file", ""],
+        cwd=ROOT, stderr=subprocess.DEVNULL,
+    )
+    pids: List[int] = []
+    try:
+        pids = wait_ready(args.port, server.pid, workers)
+        with multiprocessing.Pool(args.clients) as pool:
+            outcomes = pool.starmap(client, [
+                (args.port, titles, args.duration, args.k, seed) for seed in range(args.clients)
+            ])
+        usage = [memory(pid) for pid in pids]
+    finally:
+        # Stop the launcher first, or it would restart the workers
+        server.terminate()
+        server.wait()
+        for pid in pids:
+            if pid != server.pid:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    latencies = [latency for run, _ in outcomes for latency in run]
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {
+        "workers": workers,
+        "cpus": os.cpu_count(),
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in outcomes),
+        "requests_per_s": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(float(p50), 3),
+        "p99_ms": round(float(p99), 3),
+        **{f"{name}_mb_per_worker": round(np.mean([u[name] for u in usage]) / MB, 1)
+           for name in ("rss", "pss", "private")},
+        "pss_mb_total": round(sum(u["pss"] for u in usage) / MB, 1),
+    }
+
+
+def main() -> None:
+    """Load-test the API at each worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--port", type=int, default=config.API_PORT + 2)
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="load-generating processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per level")
+    parser.add_argument("--k", type=int, default=config.NUM_RECOMMENDATIONS)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    from engine import RecommendationEngine
+
+    labels = RecommendationEngine.from_artifacts(args.artifacts).catalog.sorted_labels
+    rng = np.random.default_rng(0)
+    titles = [labels[i] for i in rng.choice(len(labels), min(1000, len(labels)), replace=False)]
+
+    results: List[Dict[str, Any]] = []
+    baseline: Optional[float] = None
+    print(f"cpus: {os.cpu_count()}, clients: {args.clients}")
+    print(f"{'workers':>7} {'req/s':>8} {'scaling':>7} {'p50 ms':>7} {'p99 ms':>7} {'errors':>6} "
+          f"{'rss MB':>7} {'pss MB':>7} {'priv MB':>7} {'pss total':>9}")
+    for workers in args.workers:
+        r = run_level(args, workers, titles)
+        baseline = baseline or r["requests_per_s"]
+        r["scaling"] = round(r["requests_per_s"] / baseline, 2)
+        results.append(r)
+        print(
+            f"{workers:>7} {r['requests_per_s']:>8.0f} {r['scaling']:>7.2f} {r['p50_ms']:>7.2f} "
+            f"{r['p99_ms']:>7.2f} {r['errors']:>6} {r['rss_mb_per_worker']:>7.1f} "
+            f"{r['pss_mb_per_worker']:>7.1f} {r['private_mb_per_worker']:>7.1f} {r['pss_mb_total']:>9.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""
+Offline artifact build pipeline for CineMatch.
+
+Reproduces the preprocessing of notebook.ipynb as a script, without its memory
+blow-ups:
+
+* the TMDB CSVs are read in chunks, and each JSON column of a chunk is decoded
+  with a single ``json.loads`` call instead of ``ast.literal_eval`` per row;
+* movies and credits are joined on the TMDB id (the notebook's join on title
+  pairs up remakes that share a title);
+* the bag-of-words matrix stays sparse end to end, and neighbors are computed
+  in row blocks (see :mod:`neighbors`).
+
+Peak memory is therefore bounded by one CSV chunk, the sparse matrix and one
+block of ``block_size × column_block_size`` scores per worker, never by a dense
+N×vocabulary or N×N array; neighbor blocks are streamed into the store on disk.
+
+Each run writes a new version directory and publishes it through the manifest
+(see :mod:`manifest`), recording the vocabulary, input/output hashes and build
+time. Neighbor scores and ANN embeddings are stored in low precision (see
+:mod:`quantize`); before publishing, :func:`check_ranking_drift` compares them
+with the notebook's exact float64 similarities, and the build is refused if
+quantization costs more than ``QUANTIZATION_MAX_DRIFT`` of recall where it can
+reorder results, or moves a neighbor score by more than
+``QUANTIZATION_MAX_SCORE_ERROR``.
+
+Usage:
+    python build_index.py --movies-csv tmdb_5000_movies.csv \\
+        --credits-csv tmdb_5000_credits.csv
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import config
+from manifest import file_sha256, new_version, write_manifest
+from ann import AnnIndex, build_ann_index, load_ann_index, save_ann_index
+from catalog import save_catalog, save_title_list
+from neighbors import NeighborIndex, build_neighbor_store
+from quantize import PRECISIONS, QuantizationDriftError, ranking_recall
+
+logger = logging.getLogger(__name__)
+
+NUM_CAST: int = 3
+
+# Numeric movie columns kept as catalog fields (see catalog.MovieCatalog.field);
+# release_year is derived from the CSV's release_date
+CATALOG_FIELDS: Tuple[str, ...] = ("popularity", "vote_average", "vote_count", "release_year")
+_FIELD_COLUMNS: Tuple[str, ...] = ("popularity", "vote_average", "vote_count", "release_date")
+
+# Sampled movies scored at once by the accuracy check (each row is N float64)
+_CHECK_BLOCK_SIZE: int = 64
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Parsing
+# ─────────────────────────────────────────────────────────────────────────────
+
+def parse_json_column(column: pd.Series) -> List[list]:
+    """
+    Decode a column of JSON list strings with a single parser call.
+
+    Args:
+        column (pd.Series): Strings such as ``'[{"id": 28, "name": "Action"}]'``.
+
+    Returns:
+        List[list]: The decoded list for every row (empty for missing values).
+    """
+    return json.loads("[" + ",".join(column.fillna("[]")) + "]")
+
+
+def _names(items: List[dict], limit: Optional[int] = None) -> List[str]:
+    """Collapse the ``name`` of each item into a single token, as the notebook did."""
+    return [item["name"].replace(" ", "") for item in items[:limit]]
+
+
+def _directors(crew: List[dict]) -> List[str]:
+    return [member["name"].replace(" ", "") for member in crew if member.get("job") == "Director"]
+
+
+def read_credit_tags(path: str, chunk_size: int) -> Dict[int, str]:
+    """
+    Reduce the credits CSV to the cast/director tokens of every movie.
+
+    Args:
+        path (str): Path to ``tmdb_5000_credits.csv``.
+        chunk_size (int): Rows parsed at once.
+
+    Returns:
+        Dict[int, str]: Space-separated cast and director tokens per TMDB id.
+    """
+    credit_tags: Dict[int, str] = {}
+    for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=["movie_id", "cast", "crew"]):
+        casts = parse_json_column(chunk["cast"])
+        crews = parse_json_column(chunk["crew"])
+        for movie_id, cast, crew in zip(chunk["movie_id"], casts, crews):
+            credit_tags[int(movie_id)] = " ".join(_names(cast, NUM_CAST) + _directors(crew))
+    return credit_tags
+
+
+def field_columns(chunk: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Decode the :data:`CATALOG_FIELDS` of a movies CSV chunk as float32 columns.
+
+    ``release_year`` is fractional (mid-2009 is about 2009.5). Missing or
+    unparseable values become 0.
+
+    Args:
+        chunk (pd.DataFrame): Rows of ``tmdb_5000_movies.csv`` with the
+            ``_FIELD_COLUMNS``.
+
+    Returns:
+        Dict[str, np.ndarray]: One column per catalog field.
+    """
+    dates = pd.to_datetime(chunk["release_date"], errors="coerce", format="%Y-%m-%d")
+    columns = {
+        "release_year": dates.dt.year + (dates.dt.dayofyear - 1) / 365.25,
+        **{
+            name: pd.to_numeric(chunk[name], errors="coerce")
+            for name in CATALOG_FIELDS if name in chunk
+        },
+    }
+    return {name: columns[name].fillna(0).to_numpy(np.float32) for name in CATALOG_FIELDS}
+
+
+def iter_movie_chunks(
+    movies_path: str,
+    credit_tags: Dict[int, str],
+    chunk_size: int,
+    stem: Optional[Callable[[str], str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the movies CSV as ``movie_id``/``title``/``tags`` chunks, plus the
+    :data:`CATALOG_FIELDS` columns.
+
+    Args:
+        movies_path (str): Path to ``tmdb_5000_movies.csv``.
+        credit_tags (Dict[int, str]): Output of :func:`read_credit_tags`.
+        chunk_size (int): Rows parsed at once.
+        stem (Optional[Callable[[str], str]]): Word stemmer applied to every token.
+
+    Yields:
+        pd.DataFrame: One chunk of movies that have credits and an overview.
+    """
+    columns = ["id", "title", "overview", "genres", "keywords", *_FIELD_COLUMNS]
+    for chunk in pd.read_csv(movies_path, chunksize=chunk_size, usecols=columns):
+        chunk = chunk.dropna(subset=["title", "overview"])
+        chunk = chunk[chunk["id"].isin(credit_tags.keys())]
+        if chunk.empty:
+            continue
+
+        genres = parse_json_column(chunk["genres"])
+        keywords = parse_json_column(chunk["keywords"])
+        tags = [
+            " ".join([overview, *_names(g), *_names(k), credit_tags[int(movie_id)]]).lower()
+            for movie_id, overview, g, k in zip(chunk["id"], chunk["overview"], genres, keywords)
+        ]
+        if stem is not None:
+            tags = [" ".join(stem(word) for word in tag.split()) for tag in tags]
+
+        yield pd.DataFrame({
+            "movie_id": chunk["id"].astype("int64").to_numpy(),
+            "title": chunk["title"].to_numpy(),
+            "tags": tags,
+            **field_columns(chunk),
+        })
+
+
+def catalog_fields(movies: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Return the :data:`CATALOG_FIELDS` columns a movie list has (older lists have none)."""
+    return {
+        name: movies[name].fillna(0).to_numpy(np.float32)
+        for name in CATALOG_FIELDS if name in movies
+    }
+
+
+def load_stemmer() -> Callable[[str], str]:
+    """Return NLTK's Porter stemmer, which produced the shipped movie_list.pkl tags."""
+    try:
+        from nltk.stem.porter import PorterStemmer
+    except ImportError:
+        raise SystemExit("--stem needs NLTK: pip install nltk")
+    return PorterStemmer().stem
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Accuracy Check
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _precision(matrix: Any) -> str:
+    return getattr(matrix, "precision", "float32")
+
+
+def _ann_top_k(ann: AnnIndex, rows: np.ndarray, k: int) -> np.ndarray:
+    """Unrefined ANN top-``k`` of each movie in ``rows``, padded with ``-1``."""
+    found = np.full((len(rows), k), -1, dtype=np.int64)
+    for i, row in enumerate(rows):
+        ids = ann.search(ann.embeddings[row], k, exclude=(row,))[0]
+        found[i, :len(ids)] = ids
+    return found
+
+
+def _blend_top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Top-``k`` of the equal-weight ``"sum"`` blend of each consecutive pair of
+    rows, aggregated from their stored lists as
+    :meth:`neighbors.NeighborIndex.query_blend` does without vectors; padded
+    with ``-1``.
+    """
+    found = np.full((len(ids) // 2, k), -1, dtype=np.int64)
+    for i in range(len(found)):
+        candidates, inverse = np.unique(ids[2 * i:2 * i + 2], return_inverse=True)
+        blended = np.bincount(inverse.ravel(), weights=np.ravel(scores[2 * i:2 * i + 2]))
+        top = candidates[np.argsort(-blended, kind="stable")[:k]]
+        found[i, :len(top)] = top
+    return found
+
+
+def check_ranking_drift(
+    vectors: sp.csr_matrix,
+    index: NeighborIndex,
+    ann: Optional[Tuple[AnnIndex, AnnIndex]] = None,
+    k: int = config.QUANTIZATION_RECALL_K,
+    sample: int = config.QUANTIZATION_SAMPLE,
+    max_drift: float = config.QUANTIZATION_MAX_DRIFT,
+    max_score_error: float = config.QUANTIZATION_MAX_SCORE_ERROR,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Compare the rankings of the stored artifacts with the float64 baseline.
+
+    The baseline is notebook.ipynb's: exact float64 cosine similarities of the
+    bag-of-words vectors. Drift is only measured where quantization can
+    reorder results:
+
+    * neighbor scores are quantized per row, which never reorders a row, so
+      its table is checked on blends of pairs of sampled movies aggregated
+      from their stored lists (the blend served without vectors), ranked by
+      the stored scores against the same blend of the exact scores; the
+      largest error of a stored score must also stay within
+      ``max_score_error``;
+    * the ANN index is searched unrefined (so the refinement cannot hide
+      quantization errors) at full precision and as stored, and compared
+      by recall@k against the exact top-k.
+
+    Args:
+        vectors (sp.csr_matrix): L2-normalised movie vectors.
+        index (NeighborIndex): The neighbor index as written to the store.
+        ann (Optional[Tuple[AnnIndex, AnnIndex]]): The ANN index at full
+            precision and as written to the store, if one was built.
+        k (int): Ranking depth compared.
+        sample (int): Number of movies checked.
+        max_drift (float): Largest recall@k loss accepted.
+        max_score_error (float): Largest neighbor score error accepted.
+        seed (int): Random seed of the sample.
+
+    Returns:
+        Dict[str, Any]: Recall at full precision and as stored, drift and,
+            for the neighbor table, the largest score error, per artifact.
+
+    Raises:
+        QuantizationDriftError: If any artifact drifts more than ``max_drift``
+            or a neighbor score is off by more than ``max_score_error``.
+    """
+    n_rows = len(index)
+    rows = np.sort(np.random.default_rng(seed).choice(n_rows, min(sample, n_rows), replace=False))
+    k = min(k, index.k)
+    normed = sp.csr_matrix(vectors, dtype=np.float64)
+
+    baseline = np.empty((len(rows), k), dtype=np.int64)
+    exact = np.empty((len(rows), index.k), dtype=np.float64)
+    for start in range(0, len(rows), _CHECK_BLOCK_SIZE):
+        block_rows = rows[start:start + _CHECK_BLOCK_SIZE]
+        block = (normed @ normed[block_rows].toarray().T).T
+        block[np.arange(len(block_rows)), block_rows] = -np.inf
+        baseline[start:start + len(block_rows)] = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        exact[start:start + len(block_rows)] = np.take_along_axis(block, index.ids[block_rows], axis=1)
+
+    ids, scores = index.ids[rows], index.scores[rows]
+    exact_blend = _blend_top_k(ids, exact, k)
+    report: Dict[str, Any] = {"k": k, "sample": len(rows)}
+    report["neighbors"] = {
+        "precision": _precision(index.scores),
+        "recall_full": ranking_recall(exact_blend, _blend_top_k(ids, exact.astype(np.float32), k)),
+        "recall_stored": ranking_recall(exact_blend, _blend_top_k(ids, scores, k)),
+        "max_score_error": float(np.abs(scores - exact).max()) if scores.size else 0.0,
+    }
+    if ann is not None:
+        full, stored = ann
+        report["ann"] = {
+            "precision": _precision(stored.embeddings),
+            "recall_full": ranking_recall(baseline, _ann_top_k(full, rows, k)),
+            "recall_stored": ranking_recall(baseline, _ann_top_k(stored, rows, k)),
+        }
+
+    drifted = []
+    for name in ("neighbors", "ann"):
+        if name in report:
+            entry = report[name]
+            entry["drift"] = round(max(entry["recall_full"] - entry["recall_stored"], 0.0), 6)
+            logger.info(
+                f"{name}: recall@{k} {entry['recall_stored']:.4f} as stored ({entry['precision']}) "
+                f"vs {entry['recall_full']:.4f} at full precision over {len(rows)} movies"
+            )
+            if entry["drift"] > max_drift:
+                drifted.append(f"{name} lost {entry['drift']:.4f} recall@{k} ({entry['precision']})")
+            if entry.get("max_score_error", 0.0) > max_score_error:
+                drifted.append(
+                    f"{name} scores are off by up to {entry['max_score_error']:.4f} ({entry['precision']})"
+                )
+    if drifted:
+        raise QuantizationDriftError("Quantized artifacts drift too far from float64: " + "; ".join(drifted))
+    return report
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Build
+# ─────────────────────────────────────────────────────────────────────────────
+
+def build(
+    movies_csv: str,
+    credits_csv: str,
+    output_dir: str = config.ARTIFACT_DIR,
+    k: int = config.NEIGHBOR_K,
+    block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+    chunk_size: int = config.BUILD_CHUNK_SIZE,
+    workers: int = config.BUILD_WORKERS,
+    stem: bool = False,
+    ann: bool = False,
+    score_precision: str = config.SCORE_PRECISION,
+    embedding_precision: str = config.EMBEDDING_PRECISION,
+    max_drift: float = config.QUANTIZATION_MAX_DRIFT,
+    max_score_error: float = config.QUANTIZATION_MAX_SCORE_ERROR,
+) -> str:
+    """
+    Build and publish a new artifact version from the TMDB CSVs.
+
+    Args:
+        movies_csv (str): Path to ``tmdb_5000_movies.csv``.
+        credits_csv (str): Path to ``tmdb_5000_credits.csv``.
+        output_dir (str): Artifact root directory.
+        k (int): Neighbors kept per movie.
+        block_size (int): Query rows scored at once.
+        chunk_size (int): CSV rows parsed at once.
+        workers (int): Processes used to score neighbor blocks.
+        stem (bool): Porter-stem tag words (requires NLTK).
+        ann (bool): Also build the approximate-search index.
+        score_precision (str): Storage precision of the neighbor scores.
+        embedding_precision (str): Storage precision of the ANN embeddings.
+        max_drift (float): Largest recall@K loss to quantization accepted.
+        max_score_error (float): Largest quantization error of a neighbor
+            score accepted.
+
+    Returns:
+        str: The published version.
+
+    Raises:
+        QuantizationDriftError: If the quantized artifacts drift too far from
+            the float64 baseline; nothing is published.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    credit_tags = read_credit_tags(credits_csv, chunk_size)
+    movies = pd.concat(
+        iter_movie_chunks(movies_csv, credit_tags, chunk_size, load_stemmer() if stem else None),
+        ignore_index=True,
+    )
+    del credit_tags
+    timings["parse_s"] = time.perf_counter() - started
+
+    vectorizer = CountVectorizer(
+        max_features=config.VECTORIZER_MAX_FEATURES,
+        stop_words="english",
+    )
+    vectors = vectorizer.fit_transform(movies["tags"])
+    timings["vectorize_s"] = time.perf_counter() - started - timings["parse_s"]
+
+    version = new_version()
+    version_dir = os.path.join(output_dir, version)
+    os.makedirs(version_dir)
+
+    index = build_neighbor_store(
+        vectors, os.path.join(version_dir, "index.store"),
+        k=k, block_size=block_size, workers=workers, meta={"version": version},
+        precision=score_precision,
+    )
+    timings["neighbors_s"] = time.perf_counter() - started - sum(timings.values())
+
+    files = {
+        "movies": "movie_list.pkl",
+        "catalog": "catalog.store",
+        "titles": "titles.json",
+        "index": "index.store",
+        "vocabulary": "vocabulary.json",
+    }
+    ann_indexes = None
+    if ann:
+        ann_index = build_ann_index(index.vectors)
+        save_ann_index(ann_index, os.path.join(version_dir, "ann.store"), precision=embedding_precision)
+        ann_indexes = (ann_index, load_ann_index(os.path.join(version_dir, "ann.store")))
+        files["ann"] = "ann.store"
+        timings["ann_s"] = time.perf_counter() - started - sum(timings.values())
+
+    try:
+        quantization = check_ranking_drift(
+            index.vectors, index, ann_indexes, max_drift=max_drift, max_score_error=max_score_error
+        )
+    except QuantizationDriftError:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    timings["check_s"] = time.perf_counter() - started - sum(timings.values())
+
+    with open(os.path.join(version_dir, "movie_list.pkl"), "wb") as f:
+        pickle.dump(movies, f)
+    catalog = save_catalog(
+        os.path.join(version_dir, "catalog.store"),
+        movies["title"].tolist(), movies["movie_id"].to_numpy(), catalog_fields(movies),
+        meta={"version": version},
+    )
+    save_title_list(catalog, os.path.join(version_dir, "titles.json"))
+    with open(os.path.join(version_dir, "vocabulary.json"), "w") as f:
+        json.dump({
+            "max_features": config.VECTORIZER_MAX_FEATURES,
+            "stop_words": "english",
+            "stem": stem,
+            "vocabulary": {term: int(col) for term, col in vectorizer.vocabulary_.items()},
+        }, f)
+
+    manifest = write_manifest(
+        version,
+        files,
+        meta={
+            "builder": "build_index",
+            "n_movies": len(movies),
+            "k": index.k,
+            "vocabulary_size": len(vectorizer.vocabulary_),
+            "inputs": {
+                os.path.basename(path): file_sha256(path)
+                for path in (movies_csv, credits_csv)
+            },
+            "quantization": quantization,
+            "timings": {name: round(value, 3) for name, value in timings.items()},
+        },
+        root=output_dir,
+    )
+    logger.info(
+        f"Published {version}: {manifest['n_movies']} movies, top-{manifest['k']}, "
+        f"{manifest['vocabulary_size']} terms in {time.perf_counter() - started:.1f}s"
+    )
+    return version
+
+
+def main() -> None:
+    """Build artifacts from the TMDB 5000 CSV files."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--movies-csv", required=True)
+    parser.add_argument("--credits-csv", required=True)
+    parser.add_argument("--output-dir", default=config.ARTIFACT_DIR)
+    parser.add_argument("--k", type=int, default=config.NEIGHBOR_K)
+    parser.add_argument("--block-size", type=int, default=config.NEIGHBOR_BLOCK_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=config.BUILD_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=config.BUILD_WORKERS)
+    parser.add_argument("--stem", action="store_true", help="Porter-stem tags (needs NLTK)")
+    parser.add_argument("--ann", action="store_true", help="also build the ANN index")
+    parser.add_argument("--score-precision", choices=PRECISIONS, default=config.SCORE_PRECISION)
+    parser.add_argument("--embedding-precision", choices=PRECISIONS, default=config.EMBEDDING_PRECISION)
+    parser.add_argument("--max-drift", type=float, default=config.QUANTIZATION_MAX_DRIFT,
+                        help="recall@K a quantized build may lose before it is refused")
+    parser.add_argument("--max-score-error", type=float, default=config.QUANTIZATION_MAX_SCORE_ERROR,
+                        help="largest neighbor score error of a quantized build before it is refused")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    try:
+        build(
+            args.movies_csv, args.credits_csv, args.output_dir,
+            k=args.k, block_size=args.block_size, chunk_size=args.chunk_size,
+            workers=args.workers, stem=args.stem, ann=args.ann,
+            score_precision=args.score_precision,
+            embedding_precision=args.embedding_precision, max_drift=args.max_drift,
+            max_score_error=args.max_score_error,
+        )
+    except QuantizationDriftError as e:
+        raise SystemExit(f"Not published: {e}")
+
+
+if __name__ == "__main__":
+    main()
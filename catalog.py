@@ -0,0 +1,398 @@
+"""
+Movie catalog lookups for CineMatch.
+
+The serving catalog is a handful of flat arrays kept in an artifact store
+(``catalog.store``, see :mod:`artifact_store`) rather than a pickled pandas
+DataFrame:
+
+* ``catalog.movie_ids``     int32 TMDB id of every row;
+* ``catalog.title_bytes``   all titles as one packed UTF-8 buffer, sliced by
+  ``catalog.title_offsets`` (int64, N + 1 entries);
+* ``catalog.title_hashes``  sorted 64-bit title hashes, with the rows they
+  belong to in ``catalog.title_order``, for O(log N) title lookups;
+* ``catalog.id_order``      rows ordered by TMDB id, for id lookups;
+* ``field.<name>``          optional per-movie columns, mapped only when used.
+
+Next to it, ``titles.json`` holds the display labels, most popular first when
+the catalog has a popularity field (recorded as ``ranked``), so a UI can build
+its title search (see :mod:`search`) before any other artifact has been loaded.
+
+Loading is a memory map of those arrays: no pandas import, no unpickling and no
+per-row Python objects, so every worker process shares the same pages. Titles
+are decoded only for the rows a query returns.
+
+The TMDB 5000 data contains several titles shared by different movies (remakes,
+and rows duplicated by the credits merge). Every row therefore also gets a
+unique display label; duplicated titles are disambiguated with their TMDB id.
+
+Usage:
+    python catalog.py --movies movie_list.pkl --output artifacts/catalog.store \
+        --titles-output artifacts/titles.json
+"""
+
+from functools import cached_property
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import pickle
+import time
+
+import numpy as np
+
+import config
+from artifact_store import open_store, write_store
+
+logger = logging.getLogger(__name__)
+
+_FIELD_PREFIX = "field."
+
+
+class AmbiguousTitleError(LookupError):
+    """Raised when a title matches several distinct movies and no id was given."""
+
+    def __init__(self, title: str, movie_ids: List[int]) -> None:
+        super().__init__(f"'{title}' matches {len(movie_ids)} movies: {movie_ids}")
+        self.title = title
+        self.movie_ids = movie_ids
+
+
+def title_hash(title: bytes) -> int:
+    """Stable 64-bit hash of a UTF-8 title (Python's ``hash`` is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(title, digest_size=8).digest(), "little")
+
+
+def pack_catalog(
+    titles: Sequence[str],
+    movie_ids: Sequence[int],
+    fields: Optional[Mapping[str, np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Pack titles and TMDB ids into the flat arrays of a catalog store.
+
+    Args:
+        titles (Sequence[str]): Title of every movie, by row position.
+        movie_ids (Sequence[int]): TMDB id of every movie, by row position.
+        fields (Optional[Mapping[str, np.ndarray]]): Optional per-movie columns.
+
+    Returns:
+        Dict[str, np.ndarray]: Arrays keyed by their store names.
+
+    Raises:
+        ValueError: If lengths differ or an id does not fit in int32.
+    """
+    movie_ids = np.asarray(movie_ids, dtype=np.int64)
+    if len(movie_ids) != len(titles):
+        raise ValueError(f"{len(titles)} titles for {len(movie_ids)} movie ids")
+    if len(movie_ids) and (movie_ids.min() < 0 or movie_ids.max() > np.iinfo(np.int32).max):
+        raise ValueError("TMDB ids must fit in int32")
+
+    encoded = [str(title).encode("utf-8") for title in titles]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(title) for title in encoded], out=offsets[1:])
+    hashes = np.fromiter((title_hash(title) for title in encoded), dtype=np.uint64, count=len(encoded))
+    title_order = np.argsort(hashes, kind="stable")
+
+    arrays = {
+        "catalog.movie_ids": movie_ids.astype(np.int32),
+        "catalog.title_offsets": offsets,
+        "catalog.title_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "catalog.title_hashes": hashes[title_order],
+        "catalog.title_order": title_order.astype(np.int32),
+        "catalog.id_order": np.argsort(movie_ids, kind="stable").astype(np.int32),
+    }
+    for name, values in (fields or {}).items():
+        values = np.asarray(values)
+        if len(values) != len(movie_ids):
+            raise ValueError(f"Field '{name}' has {len(values)} values for {len(movie_ids)} movies")
+        arrays[f"{_FIELD_PREFIX}{name}"] = values
+    return arrays
+
+
+class MovieCatalog:
+    """
+    Read-only movie table with fast title/id lookups.
+
+    Args:
+        arrays (Mapping[str, np.ndarray]): Arrays from :func:`pack_catalog`, or
+            an open catalog store.
+
+    Attributes:
+        movie_ids (np.ndarray): int32 TMDB id of every movie, by row position.
+        fields (Tuple[str, ...]): Names of the optional per-movie columns.
+    """
+
+    def __init__(self, arrays: Mapping[str, np.ndarray]) -> None:
+        # Plain ndarray views of the mapped pages: np.memmap adds per-call overhead
+        self._arrays = arrays
+        self.movie_ids: np.ndarray = arrays["catalog.movie_ids"].view(np.ndarray)
+        self._offsets: np.ndarray = arrays["catalog.title_offsets"].view(np.ndarray)
+        self._buffer = memoryview(arrays["catalog.title_bytes"].view(np.ndarray))
+        self._title_hashes: np.ndarray = arrays["catalog.title_hashes"].view(np.ndarray)
+        self._title_order: np.ndarray = arrays["catalog.title_order"].view(np.ndarray)
+        self._id_order: np.ndarray = arrays["catalog.id_order"].view(np.ndarray)
+        self._sorted_ids = self.movie_ids[self._id_order]
+        self.fields: Tuple[str, ...] = tuple(
+            name[len(_FIELD_PREFIX):] for name in arrays if name.startswith(_FIELD_PREFIX)
+        )
+
+        # Only rows whose title is shared need a label other than the title
+        hashes = self._title_hashes
+        shared = np.zeros(len(hashes), dtype=bool)
+        if len(hashes) > 1:
+            equal = hashes[1:] == hashes[:-1]
+            shared[1:] |= equal
+            shared[:-1] |= equal
+        groups: Dict[str, List[int]] = {}
+        for row in np.sort(self._title_order[shared]).tolist():
+            groups.setdefault(self.title(row), []).append(row)
+
+        self._labels: Dict[int, str] = {}
+        self._label_rows: Dict[str, int] = {}
+        for title, rows in groups.items():
+            if len(rows) < 2:
+                continue  # hash collision between different titles
+            for row in rows:
+                self._labels[row] = f"{title} (TMDB {self.movie_ids[row]})"
+        for row in sorted(self._labels):
+            # Rows duplicated outright (same title and id) still need distinct labels
+            label, copy = self._labels[row], 1
+            while self._labels[row] in self._label_rows or self.rows_for_title(self._labels[row]):
+                copy += 1
+                self._labels[row] = f"{label} [{copy}]"
+            self._label_rows[self._labels[row]] = row
+
+        if self._labels:
+            logger.info(f"Catalog has {len(self._labels)} movies sharing a title with another")
+
+    @classmethod
+    def from_frame(cls, movies: Any) -> "MovieCatalog":
+        """Build an in-memory catalog from a DataFrame with ``title`` and ``movie_id`` columns."""
+        return cls(pack_catalog(movies["title"].tolist(), movies["movie_id"].to_numpy()))
+
+    def __len__(self) -> int:
+        return len(self.movie_ids)
+
+    def title(self, row: int) -> str:
+        """Decode the title of one row."""
+        return str(self._buffer[int(self._offsets[row]):int(self._offsets[row + 1])], "utf-8")
+
+    def label(self, row: int) -> str:
+        """Unique display label of one row (its title unless the title is shared)."""
+        return self._labels.get(row) or self.title(row)
+
+    @cached_property
+    def titles(self) -> List[str]:
+        """Every title, by row position (decoded on first access)."""
+        return [self.title(row) for row in range(len(self))]
+
+    @cached_property
+    def labels(self) -> np.ndarray:
+        """Every display label, by row position (decoded on first access)."""
+        labels = np.empty(len(self), dtype=object)
+        labels[:] = [self.label(row) for row in range(len(self))]
+        return labels
+
+    @cached_property
+    def sorted_labels(self) -> List[str]:
+        """Labels in alphabetical order, for pickers."""
+        return sorted(self.labels.tolist())
+
+    @cached_property
+    def ranked_labels(self) -> List[str]:
+        """Labels by descending ``popularity`` field, alphabetical without one or on ties."""
+        if "popularity" not in self.fields:
+            return self.sorted_labels
+        labels = self.labels
+        order = np.lexsort((labels.astype(str), -self.field("popularity")))
+        return labels[order].tolist()
+
+    def field(self, name: str) -> np.ndarray:
+        """
+        Optional per-movie column, memory-mapped on first use.
+
+        Raises:
+            KeyError: If the catalog has no such field.
+        """
+        if name not in self.fields:
+            raise KeyError(f"Catalog has no field '{name}'")
+        return self._arrays[f"{_FIELD_PREFIX}{name}"]
+
+    def rows_for_title(self, title: str) -> Tuple[int, ...]:
+        """Return the row positions of every movie with exactly this title."""
+        h = np.uint64(title_hash(title.encode("utf-8")))
+        start = int(self._title_hashes.searchsorted(h))
+        rows = []
+        # Rows sharing a hash are adjacent; almost always zero or one of them
+        while start < len(self._title_hashes) and self._title_hashes[start] == h:
+            row = int(self._title_order[start])
+            if self.title(row) == title:
+                rows.append(row)
+            start += 1
+        return tuple(sorted(rows))
+
+    def rows_for_id(self, movie_id: int) -> Tuple[int, ...]:
+        """Return the row positions of every movie with this TMDB id."""
+        return tuple(self.rows_for_ids(np.array([movie_id]))[1].tolist())
+
+    def rows_for_ids(self, movie_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorised :meth:`rows_for_id` for many TMDB ids.
+
+        Args:
+            movie_ids (np.ndarray): TMDB ids; unknown ids are skipped.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Parallel arrays of positions into
+                ``movie_ids`` and the matching row positions (an id shared by
+                several rows appears once per row).
+        """
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        left = np.searchsorted(self._sorted_ids, movie_ids, side="left")
+        counts = np.searchsorted(self._sorted_ids, movie_ids, side="right") - left
+        positions = np.repeat(np.arange(len(movie_ids)), counts)
+        offsets = np.arange(len(positions)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return positions, self._id_order[np.repeat(left, counts) + offsets].astype(np.int64)
+
+    def resolve(self, query: str, movie_id: Optional[int] = None) -> Optional[int]:
+        """
+        Resolve a display label or title to a single row position.
+
+        Args:
+            query (str): A display label from :attr:`labels`, or a plain title.
+            movie_id (Optional[int]): TMDB id used to pick between movies that
+                share the title.
+
+        Returns:
+            Optional[int]: The row position, or None if nothing matches.
+
+        Raises:
+            AmbiguousTitleError: If the title matches movies with different
+                TMDB ids and ``movie_id`` does not single one out.
+        """
+        row = self._label_rows.get(query)
+        if row is not None and movie_id is None:
+            return row
+
+        rows = self.rows_for_title(query)
+        if movie_id is not None:
+            rows = tuple(r for r in rows if self.movie_ids[r] == movie_id)
+        if not rows:
+            return row
+
+        movie_ids = sorted({int(self.movie_ids[r]) for r in rows})
+        if len(movie_ids) > 1:
+            raise AmbiguousTitleError(query, movie_ids)
+        return rows[0]
+
+    def take(self, rows: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """
+        Fetch titles and TMDB ids for many rows.
+
+        Args:
+            rows (np.ndarray): Row positions.
+
+        Returns:
+            Tuple[List[str], np.ndarray]: Titles and TMDB ids, in ``rows`` order.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        buffer = self._buffer
+        titles = [
+            str(buffer[start:stop], "utf-8")
+            for start, stop in zip(self._offsets[rows].tolist(), self._offsets[rows + 1].tolist())
+        ]
+        return titles, self.movie_ids.take(rows)
+
+
+def save_catalog(
+    path: str,
+    titles: Sequence[str],
+    movie_ids: Sequence[int],
+    fields: Optional[Mapping[str, np.ndarray]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> MovieCatalog:
+    """
+    Write a catalog store.
+
+    Args:
+        path (str): Destination store path.
+        titles (Sequence[str]): Title of every movie, by row position.
+        movie_ids (Sequence[int]): TMDB id of every movie, by row position.
+        fields (Optional[Mapping[str, np.ndarray]]): Optional per-movie columns.
+        meta (Optional[Dict[str, Any]]): Extra build metadata to record.
+
+    Returns:
+        MovieCatalog: In-memory catalog over the arrays that were written.
+    """
+    arrays = pack_catalog(titles, movie_ids, fields)
+    write_store(path, arrays, {"kind": "catalog", "n_movies": len(titles), **(meta or {})})
+    return MovieCatalog(arrays)
+
+
+def save_title_list(catalog: MovieCatalog, path: str) -> None:
+    """
+    Write the catalog's display labels as JSON, most popular first.
+
+    ``ranked`` records whether the order comes from a popularity field; without
+    one the labels are alphabetical.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"ranked": "popularity" in catalog.fields, "titles": catalog.ranked_labels},
+            f, ensure_ascii=False,
+        )
+
+
+def load_title_list(path: str) -> Tuple[List[str], bool]:
+    """
+    Read a title list written by :func:`save_title_list` (a plain JSON read, no store needed).
+
+    Returns:
+        Tuple[List[str], bool]: The labels, and whether they are listed most
+            popular first. Older files hold a bare list of unknown order.
+    """
+    with open(path, encoding="utf-8") as f:
+        titles = json.load(f)
+    if isinstance(titles, list):
+        return titles, False
+    return titles["titles"], bool(titles["ranked"])
+
+
+def load_catalog(path: str) -> MovieCatalog:
+    """
+    Memory-map a catalog written by :func:`save_catalog`.
+
+    Args:
+        path (str): Path to the catalog store.
+
+    Returns:
+        MovieCatalog: The catalog, backed by read-only memory-mapped arrays.
+    """
+    return MovieCatalog(open_store(path))
+
+
+def main() -> None:
+    """Convert the pickled movie list into a catalog store."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--movies", default=config.MOVIE_LIST_FILE)
+    parser.add_argument("--output", default=config.CATALOG_FILE)
+    parser.add_argument("--titles-output", default=config.TITLES_FILE)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    started = time.perf_counter()
+    with open(args.movies, "rb") as f:
+        movies = pickle.load(f)
+    catalog = save_catalog(args.output, movies["title"].tolist(), movies["movie_id"].to_numpy(),
+                           meta={"source": args.movies})
+    save_title_list(catalog, args.titles_output)
+    logger.info(f"Wrote {len(movies)} movies in {time.perf_counter() - started:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
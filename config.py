@@ -6,7 +6,7 @@ parameters used throughout the application.
 """
 
 import os
-from typing import Final
+from typing import Final, Tuple
 
 # ─────────────────────────────────────────────────────────────────────────────
 # API Configuration
@@ -17,21 +17,131 @@ BASE_URL: Final[str] = "https://api.themoviedb.org/3/movie/"
 IMAGE_BASE_URL: Final[str] = "https://image.tmdb.org/t/p/w500/"
 PLACEHOLDER_IMAGE: Final[str] = "https://via.placeholder.com/500x750/100e1a/c084fc?text=No+Image"
 API_TIMEOUT: Final[int] = 6
+POSTER_MAX_WORKERS: Final[int] = 8  # concurrent TMDB requests per process
+POSTER_DEADLINE: Final[float] = 8.0  # overall budget for one batch of posters
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Data Files
 # ─────────────────────────────────────────────────────────────────────────────
 
+ARTIFACT_DIR: Final[str] = "artifacts"
 MOVIE_LIST_FILE: Final[str] = "movie_list.pkl"
 SIMILARITY_FILE: Final[str] = "similarity.pkl"
+INDEX_FILE: Final[str] = os.path.join(ARTIFACT_DIR, "index.store")
+CATALOG_FILE: Final[str] = os.path.join(ARTIFACT_DIR, "catalog.store")
+TITLES_FILE: Final[str] = os.path.join(ARTIFACT_DIR, "titles.json")
+ANN_FILE: Final[str] = os.path.join(ARTIFACT_DIR, "ann.store")
+MANIFEST_FILE: Final[str] = "manifest.json"  # inside ARTIFACT_DIR
+RELOAD_INTERVAL: Final[float] = 5.0  # seconds between manifest checks by running servers
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Recommendation Settings
 # ─────────────────────────────────────────────────────────────────────────────
 
 NUM_RECOMMENDATIONS: Final[int] = 5
+MAX_RECOMMENDATIONS: Final[int] = 100  # upper bound on k for any query
+MAX_BLEND_SEEDS: Final[int] = 10  # seed movies combined by one blend query
+BLEND_AGGREGATION: Final[str] = "sum"  # "sum" (weighted mean) or "max"
 CACHE_TTL: Final[int] = 86_400  # 24 hours in seconds
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Poster Cache
+# ─────────────────────────────────────────────────────────────────────────────
+
+CACHE_DIR: Final[str] = "cache"
+POSTER_CACHE_FILE: Final[str] = os.path.join(CACHE_DIR, "posters.sqlite3")
+POSTER_NEGATIVE_TTL: Final[int] = 21_600  # 6 hours for "no poster" answers
+POSTER_CACHE_MAX_ENTRIES: Final[int] = 100_000
+PREFETCH_BATCH_SIZE: Final[int] = 40  # movies per prefetch batch
+PREFETCH_RATE: Final[float] = 40.0  # TMDB requests per second during prefetch
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Result Cache
+# ─────────────────────────────────────────────────────────────────────────────
+
+RESULT_CACHE_MAX_ENTRIES: Final[int] = 2048  # responses kept in process memory
+RESULT_CACHE_FILE: Final[str] = os.path.join(CACHE_DIR, "results.sqlite3")  # shared tier
+RESULT_CACHE_DISK_MAX_ENTRIES: Final[int] = 100_000
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Neighbor Index Build
+# ─────────────────────────────────────────────────────────────────────────────
+
+VECTORIZER_MAX_FEATURES: Final[int] = 5000
+NEIGHBOR_K: Final[int] = 50  # neighbors stored per movie
+NEIGHBOR_BLOCK_SIZE: Final[int] = 1024  # query rows scored per block
+NEIGHBOR_COLUMN_BLOCK_SIZE: Final[int] = 4096  # catalog rows scored per block
+BUILD_WORKERS: Final[int] = 1  # processes used to score row blocks
+BUILD_CHUNK_SIZE: Final[int] = 1000  # CSV rows parsed at once by build_index.py
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Approximate Search
+# ─────────────────────────────────────────────────────────────────────────────
+
+RECOMMENDATION_MODE: Final[str] = "exact"  # "exact" or "approx" (needs the ANN index)
+ANN_COMPONENTS: Final[int] = 256  # TruncatedSVD dimensions
+ANN_LISTS: Final[int] = 64  # IVF clusters
+ANN_PROBES: Final[int] = 16  # clusters scanned per query
+ANN_REFINE: Final[int] = 5  # candidates re-scored exactly, as a multiple of N
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Re-ranking
+# ─────────────────────────────────────────────────────────────────────────────
+
+RERANK_RESULTS: Final[bool] = True  # re-rank the app's recommendations (API: ?rerank=1)
+RERANK_CANDIDATES: Final[int] = 50  # similar movies re-scored per query; up to NEIGHBOR_K are precomputed
+RERANK_SIMILARITY_WEIGHT: Final[float] = 1.0  # relative to the most similar candidate
+RERANK_POPULARITY_WEIGHT: Final[float] = 0.2
+RERANK_RATING_WEIGHT: Final[float] = 0.2
+RERANK_RECENCY_WEIGHT: Final[float] = 0.1
+RERANK_DIVERSITY: Final[float] = 0.2  # MMR trade-off: 0 ranks by the weighted blend alone
+RERANK_MIN_VOTES: Final[int] = 200  # votes at which a rating counts as much as the catalog mean
+RERANK_RECENCY_HALF_LIFE: Final[float] = 15.0  # years
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Storage Precision
+# ─────────────────────────────────────────────────────────────────────────────
+
+SCORE_PRECISION: Final[str] = "uint8"  # neighbor scores: "float32", "float16" or "uint8"
+EMBEDDING_PRECISION: Final[str] = "uint8"  # ANN embeddings, same choices
+QUANTIZATION_SAMPLE: Final[int] = 1000  # movies whose rankings are checked before publishing
+QUANTIZATION_RECALL_K: Final[int] = 10  # depth of the rankings compared
+QUANTIZATION_MAX_DRIFT: Final[float] = 0.01  # recall@K a build may lose to quantization
+QUANTIZATION_MAX_SCORE_ERROR: Final[float] = 0.005  # largest neighbor score error a build may have
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Title Search
+# ─────────────────────────────────────────────────────────────────────────────
+
+SEARCH_RESULTS: Final[int] = 20  # matches offered per query
+SEARCH_MAX_RESULTS: Final[int] = 100  # upper bound for the API's limit
+SEARCH_MIN_COVERAGE: Final[float] = 0.5  # share of query trigrams a fuzzy match must contain
+SEARCH_PREFIX_BONUS: Final[float] = 0.5  # added when a title starts with the query
+SEARCH_POPULARITY_WEIGHT: Final[float] = 0.2  # weight of the popularity rank prior
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Telemetry
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Latency histogram bucket bounds, in seconds (5 us to 10 s)
+TELEMETRY_BUCKETS: Final[Tuple[float, ...]] = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+PROFILE_INTERVAL: Final[float] = 0.001  # seconds between profiler stack samples
+PROFILE_TOP: Final[int] = 15  # functions and stacks listed in a profile summary
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HTTP API
+# ─────────────────────────────────────────────────────────────────────────────
+
+API_HOST: Final[str] = "127.0.0.1"
+API_PORT: Final[int] = 8000
+API_MAX_BATCH: Final[int] = 256  # queries per /recommend/batch request
+API_LATENCY_WINDOW: Final[int] = 10_000  # recent requests kept for percentiles
+API_ALLOW_PROFILING: Final[bool] = False  # honour ?profile=1 on API requests
+API_WORKERS: Final[int] = 1  # pre-forked server processes sharing one load (0 = one per CPU)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # UI Configuration
 # ─────────────────────────────────────────────────────────────────────────────
@@ -40,6 +150,7 @@ APP_TITLE: Final[str] = "CineMatch · Movie Recommender"
 APP_ICON: Final[str] = "🎬"
 PAGE_LAYOUT: Final[str] = "wide"
 SIDEBAR_STATE: Final[str] = "collapsed"
+STREAM_RESULTS: Final[bool] = True  # show cards at once and fill in posters as they resolve
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Error Messages
@@ -51,7 +162,7 @@ ERROR_MISSING_API_KEY: Final[str] = (
 )
 ERROR_MISSING_DATA_FILE: Final[str] = (
     "Missing data file: `{file}`. "
-    "Please ensure both `movie_list.pkl` and `similarity.pkl` are in the app directory."
+    "Run `python build_index.py` (or `python neighbors.py`) to build the artifacts."
 )
 ERROR_CORRUPT_DATA_FILE: Final[str] = (
     "Failed to load data file: `{file}`. The file may be corrupted or invalid."
@@ -59,6 +170,10 @@ ERROR_CORRUPT_DATA_FILE: Final[str] = (
 ERROR_MOVIE_NOT_FOUND: Final[str] = (
     "'{movie}' not found in the dataset. Please try another movie."
 )
+ERROR_AMBIGUOUS_TITLE: Final[str] = (
+    "'{movie}' matches several movies (TMDB ids: {ids}). "
+    "Please pick the one you mean from the list."
+)
 ERROR_API_FETCH: Final[str] = (
     "Unable to fetch movie details from TMDB API. Using placeholder image."
 )
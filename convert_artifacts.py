@@ -0,0 +1,120 @@
+"""
+Convert legacy pickle artifacts into the memory-mapped artifact store.
+
+Earlier releases shipped ``movie_list.pkl`` together with a pickled dense
+similarity matrix (``similarity.pkl``, optionally zipped as ``similarity.zip``).
+This script reads those once, keeps the top-K neighbors of every movie from the
+existing similarity rows, re-derives the normalised tag vectors from the movie list
+and writes everything to the store that ``app.py`` maps at startup.
+
+Usage:
+    python convert_artifacts.py --similarity similarity.zip
+"""
+
+import argparse
+import logging
+import pickle
+import time
+import zipfile
+
+import numpy as np
+
+import config
+from neighbors import (
+    NeighborIndex,
+    normalize_vectors,
+    save_neighbor_index,
+    top_k_block,
+    vectorize_tags,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_legacy_similarity(path: str) -> np.ndarray:
+    """
+    Unpickle the legacy dense similarity matrix.
+
+    Args:
+        path (str): Path to ``similarity.pkl`` or a zip archive containing it.
+
+    Returns:
+        np.ndarray: The dense ``(N, N)`` similarity matrix.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path, "r") as z:
+            with z.open(config.SIMILARITY_FILE) as f:
+                return pickle.load(f)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def neighbors_from_dense(
+    similarity: np.ndarray,
+    k: int = config.NEIGHBOR_K,
+    block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+) -> NeighborIndex:
+    """
+    Keep the top-K entries of every row of a dense similarity matrix.
+
+    Args:
+        similarity (np.ndarray): Dense ``(N, N)`` similarity matrix.
+        k (int): Number of neighbors to keep per movie.
+        block_size (int): Number of rows processed at once.
+
+    Returns:
+        NeighborIndex: Neighbor ids and scores, self-matches excluded.
+    """
+    n_rows = similarity.shape[0]
+    k = min(k, n_rows - 1)
+
+    ids = np.empty((n_rows, k), dtype=np.int32)
+    scores = np.empty((n_rows, k), dtype=np.float32)
+    for start in range(0, n_rows, block_size):
+        stop = min(start + block_size, n_rows)
+        block = np.array(similarity[start:stop], dtype=np.float32)
+        ids[start:stop], scores[start:stop] = top_k_block(block, start, k)
+
+    return NeighborIndex(ids=ids, scores=scores)
+
+
+def main() -> None:
+    """Convert ``movie_list.pkl`` + ``similarity.pkl`` into an artifact store."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--movies", default=config.MOVIE_LIST_FILE)
+    parser.add_argument("--similarity", default=config.SIMILARITY_FILE)
+    parser.add_argument("--output", default=config.INDEX_FILE)
+    parser.add_argument("--k", type=int, default=config.NEIGHBOR_K)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    started = time.perf_counter()
+    with open(args.movies, "rb") as f:
+        movies = pickle.load(f)
+    similarity = load_legacy_similarity(args.similarity)
+    if similarity.shape != (len(movies), len(movies)):
+        raise SystemExit(
+            f"{args.similarity} has shape {similarity.shape}, "
+            f"expected ({len(movies)}, {len(movies)}) for {args.movies}"
+        )
+
+    index = neighbors_from_dense(similarity, k=args.k)
+    del similarity
+    index = NeighborIndex(index.ids, index.scores, normalize_vectors(vectorize_tags(movies["tags"])))
+    save_neighbor_index(
+        index, args.output,
+        meta={"source": "convert_artifacts", "similarity": args.similarity},
+    )
+
+    logger.info(
+        f"Converted {len(index)} movies (top-{index.k}) "
+        f"in {time.perf_counter() - started:.1f}s -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
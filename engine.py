@@ -0,0 +1,492 @@
+"""
+Recommendation engine for CineMatch.
+
+Holds the loaded artifacts (movie catalog, neighbor index and optional ANN
+index) and answers recommendation queries. It has no Streamlit dependency, so
+the web UI, the HTTP API (:mod:`api`) and offline jobs all share the same code
+path; errors are raised as exceptions for the caller to present. Single and
+blend queries can re-rank a larger candidate pool with popularity, rating,
+recency and diversity (see :mod:`rerank`). The load, lookup, score, top-K,
+rerank and materialize stages are timed into :mod:`telemetry`.
+
+Usage:
+    engine = RecommendationEngine.from_artifacts()
+    for rec in engine.recommend("Avatar", k=5):
+        print(rec.title, rec.score)
+"""
+
+from functools import cached_property
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+import logging
+import os
+import pickle
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+import config
+from ann import AnnIndex, load_ann_index
+from catalog import AmbiguousTitleError, MovieCatalog, load_catalog
+from manifest import artifact_paths
+from neighbors import NeighborIndex, blend_weights, exclusion_pairs, load_neighbor_index
+from rerank import Reranker, ranking_features
+from search import TitleSearchIndex
+from telemetry import registry, stage
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "AmbiguousTitleError",
+    "ArtifactLoadError",
+    "MovieNotFoundError",
+    "Recommendation",
+    "RecommendationEngine",
+]
+
+
+class MovieNotFoundError(LookupError):
+    """Raised when a title or TMDB id matches no movie in the catalog."""
+
+    def __init__(self, query: str) -> None:
+        super().__init__(f"Movie not found: '{query}'")
+        self.query = query
+
+
+class ArtifactLoadError(RuntimeError):
+    """Raised when an artifact file is missing or cannot be read."""
+
+    def __init__(self, path: str, missing: bool, reason: str = "") -> None:
+        super().__init__(f"{'Missing' if missing else 'Unreadable'} artifact {path}"
+                         + (f": {reason}" if reason else ""))
+        self.path = path
+        self.missing = missing
+
+
+class Recommendation(NamedTuple):
+    """One recommended movie."""
+
+    movie_id: int
+    title: str
+    score: float
+
+
+def _check_query(k: int, mode: str) -> None:
+    if not 1 <= k <= config.MAX_RECOMMENDATIONS:
+        raise ValueError(f"k must be between 1 and {config.MAX_RECOMMENDATIONS}, got {k}")
+    if mode not in ("exact", "approx"):
+        raise ValueError(f"Unknown recommendation mode '{mode}'")
+
+
+class RecommendationEngine:
+    """
+    Read-only recommendation service over one artifact version.
+
+    Attributes:
+        catalog (MovieCatalog): Title/id lookups.
+        neighbors (NeighborIndex): Precomputed top-K neighbors of every movie.
+        ann (Optional[AnnIndex]): Approximate-search index, if one was built.
+        version (str): Artifact version the engine was loaded from.
+        paths (Dict[str, str]): Files of that version, by artifact role (see
+            :func:`manifest.artifact_paths`); empty for engines built in memory.
+    """
+
+    def __init__(
+        self,
+        catalog: MovieCatalog,
+        neighbors: NeighborIndex,
+        ann: Optional[AnnIndex] = None,
+        version: str = "unknown",
+        paths: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if len(neighbors) != len(catalog):
+            raise ValueError(
+                f"neighbor index covers {len(neighbors)} movies, "
+                f"movie list has {len(catalog)}"
+            )
+        self.catalog = catalog
+        self.neighbors = neighbors
+        self.ann = ann
+        self.version = version
+        self.paths = paths or {}
+
+    @classmethod
+    def from_artifacts(cls, root: str = config.ARTIFACT_DIR) -> "RecommendationEngine":
+        """
+        Load the current artifact version (see :func:`manifest.artifact_paths`).
+
+        Args:
+            root (str): Artifact root directory.
+
+        Returns:
+            RecommendationEngine: Engine over the memory-mapped artifacts.
+
+        Raises:
+            ArtifactLoadError: If a required file is missing or unreadable.
+        """
+        started = time.perf_counter()
+        paths = artifact_paths(root)
+        # Versions built before catalog.store existed still carry the pickled movie list
+        compact = os.path.exists(paths.get("catalog", ""))
+        for path in (paths["catalog"] if compact else paths["movies"], paths["index"]):
+            if not os.path.exists(path):
+                raise ArtifactLoadError(path, missing=True)
+
+        try:
+            if compact:
+                path = paths["catalog"]
+                catalog = load_catalog(path)
+            else:
+                path = paths["movies"]
+                with open(path, "rb") as f:
+                    catalog = MovieCatalog.from_frame(pickle.load(f))
+
+            path = paths["index"]
+            neighbors = load_neighbor_index(path)
+
+            ann = None
+            if os.path.exists(paths.get("ann", "")):
+                path = paths["ann"]
+                ann = load_ann_index(path, vectors=neighbors.vectors)
+
+            engine = cls(catalog, neighbors, ann, version=paths["version"], paths=paths)
+        except Exception as exc:
+            raise ArtifactLoadError(path, missing=False, reason=str(exc)) from exc
+
+        registry.observe("stage_seconds", time.perf_counter() - started, stage="load")
+        logger.info(
+            f"Loaded {len(engine.catalog)} movies with top-{neighbors.k} neighbors "
+            f"{'and an ANN index ' if ann is not None else ''}"
+            f"(artifact version {engine.version})"
+        )
+        return engine
+
+    @cached_property
+    def title_index(self) -> TitleSearchIndex:
+        """Typeahead index over the catalog labels, built on first search."""
+        return TitleSearchIndex(self.catalog.ranked_labels, ranked="popularity" in self.catalog.fields)
+
+    @cached_property
+    def reranker(self) -> Reranker:
+        """
+        Re-ranking stage over the catalog's numeric fields, built on first use.
+
+        Diversity compares candidates by their exact sparse vectors, or by
+        their ANN embeddings when the neighbor index carries no vectors.
+        """
+        vectors = self.neighbors.vectors
+        if vectors is None and self.ann is not None:
+            vectors = self.ann.embeddings
+        return Reranker(ranking_features(self.catalog), vectors)
+
+    def warm(self) -> "RecommendationEngine":
+        """
+        Build every structure that is otherwise derived on first use.
+
+        A pre-fork server calls this before forking, so its workers share one
+        copy of the title index and re-ranking priors instead of each building
+        its own.
+
+        Returns:
+            RecommendationEngine: The engine itself.
+        """
+        with stage("warm"):
+            self.title_index
+            self.reranker
+            self.catalog.sorted_labels
+        return self
+
+    def _pool(self, k: int, rerank: bool) -> int:
+        """Candidates to retrieve for ``k`` results."""
+        return max(k, self.reranker.weights.candidates) if rerank else k
+
+    def _rerank(self, rows: np.ndarray, scores: np.ndarray, k: int, rerank: bool) -> Tuple[np.ndarray, np.ndarray]:
+        if not rerank:
+            return rows, scores
+        with stage("rerank"):
+            return self.reranker.rerank(rows, scores, k)
+
+    def search_titles(self, query: str, limit: int = config.SEARCH_RESULTS) -> List[str]:
+        """
+        Display labels best matching a partial, misspelt or accent-free query.
+
+        Args:
+            query (str): What the user typed so far.
+            limit (int): Maximum number of labels to return.
+
+        Returns:
+            List[str]: Matching labels, best first; the most popular for an empty query.
+        """
+        return self.title_index.search(query, limit=limit)
+
+    def resolve(self, title: str, movie_id: Optional[int] = None) -> int:
+        """
+        Resolve a title or display label to a row position.
+
+        Args:
+            title (str): Title or display label of the movie.
+            movie_id (Optional[int]): TMDB id to pick between movies sharing a title.
+
+        Returns:
+            int: The movie's row position.
+
+        Raises:
+            MovieNotFoundError: If nothing matches.
+            AmbiguousTitleError: If the title matches several distinct movies.
+        """
+        with stage("lookup"):
+            row = self.catalog.resolve(title, movie_id=movie_id)
+        if row is None:
+            raise MovieNotFoundError(title if movie_id is None else f"{title} (TMDB {movie_id})")
+        return row
+
+    def neighbors_of(
+        self,
+        row: int,
+        k: int = config.NUM_RECOMMENDATIONS,
+        mode: str = config.RECOMMENDATION_MODE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-``k`` neighbor rows and scores of a movie, never including itself
+        or other rows sharing its TMDB id.
+
+        Args:
+            row (int): Row position of the seed movie.
+            k (int): Number of neighbors, at most ``config.MAX_RECOMMENDATIONS``.
+            mode (str): ``"exact"`` or ``"approx"``; approximate search falls
+                back to exact when no ANN index is loaded.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row positions and cosine scores, best-first.
+
+        Raises:
+            ValueError: If ``k`` or ``mode`` is invalid.
+        """
+        _check_query(k, mode)
+        return self._neighbors(row, k, mode)
+
+    def _neighbors(self, row: int, n: int, mode: str) -> Tuple[np.ndarray, np.ndarray]:
+        with stage("lookup"):
+            twins = self.catalog.rows_for_ids(self.catalog.movie_ids[[row]])[1]
+        # Other rows sharing the seed's TMDB id are the same movie: fetch past
+        # them and drop them
+        extra = len(twins) - 1
+        if mode == "approx" and self.ann is not None:
+            rows, scores = self.ann.query(row, n + extra)
+        else:
+            if mode == "approx":
+                logger.warning("Recommendation mode 'approx' unavailable, using exact")
+            rows, scores = self.neighbors.query(row, n + extra)
+        if extra:
+            keep = ~np.isin(rows, twins)
+            rows, scores = rows[keep][:n], scores[keep][:n]
+        return rows, scores
+
+    def recommend(
+        self,
+        title: str,
+        k: int = config.NUM_RECOMMENDATIONS,
+        mode: str = config.RECOMMENDATION_MODE,
+        movie_id: Optional[int] = None,
+        rerank: bool = False,
+    ) -> List[Recommendation]:
+        """
+        Recommend movies similar to the given one.
+
+        The seed, and any other rows sharing its TMDB id, are never recommended.
+
+        Args:
+            title (str): Title or display label of the seed movie.
+            k (int): Number of recommendations.
+            mode (str): ``"exact"`` or ``"approx"``.
+            movie_id (Optional[int]): TMDB id to pick between movies sharing a title.
+            rerank (bool): Re-rank the ``RERANK_CANDIDATES`` most similar
+                movies (see :attr:`reranker`); scores are then the re-ranking scores
+                (see :meth:`rerank.Reranker.rerank`).
+
+        Returns:
+            List[Recommendation]: Recommendations, best-first.
+
+        Raises:
+            MovieNotFoundError: If the seed movie is unknown.
+            AmbiguousTitleError: If the title matches several distinct movies.
+            ValueError: If ``k`` or ``mode`` is invalid.
+        """
+        _check_query(k, mode)
+        rows, scores = self._neighbors(self.resolve(title, movie_id), self._pool(k, rerank), mode)
+        rows, scores = self._rerank(rows, scores, k, rerank)
+        with stage("materialize"):
+            titles, movie_ids = self.catalog.take(rows)
+            return [
+                Recommendation(int(movie_id), title, float(score))
+                for movie_id, title, score in zip(movie_ids, titles, scores)
+            ]
+
+    def recommend_blend(
+        self,
+        titles: Sequence[str],
+        k: int = config.NUM_RECOMMENDATIONS,
+        weights: Optional[Sequence[float]] = None,
+        aggregate: str = config.BLEND_AGGREGATION,
+        mode: str = config.RECOMMENDATION_MODE,
+        rerank: bool = False,
+    ) -> List[Recommendation]:
+        """
+        Recommend movies similar to several seed movies at once.
+
+        The seeds' similarities are combined with a weighted sum (mean) or max
+        and ranked in one vectorised pass (see
+        :meth:`neighbors.NeighborIndex.query_blend`). The seeds, and any other
+        rows sharing their TMDB ids, are never recommended.
+
+        Args:
+            titles (Sequence[str]): Titles or display labels of the seeds.
+            k (int): Number of recommendations.
+            weights (Optional[Sequence[float]]): Non-negative weight per seed.
+            aggregate (str): ``"sum"`` or ``"max"``.
+            mode (str): ``"exact"`` or ``"approx"``; the ANN index answers
+                ``"sum"`` blends only, ``"max"`` always runs exactly.
+            rerank (bool): Re-rank the ``RERANK_CANDIDATES`` best blended
+                movies, as for :meth:`recommend`.
+
+        Returns:
+            List[Recommendation]: Recommendations, best-first.
+
+        Raises:
+            MovieNotFoundError: If a seed movie is unknown.
+            AmbiguousTitleError: If a seed title matches several distinct movies.
+            ValueError: If there are no/too many seeds, or ``k``, ``mode``,
+                ``weights`` or ``aggregate`` is invalid.
+        """
+        _check_query(k, mode)
+        if not 1 <= len(titles) <= config.MAX_BLEND_SEEDS:
+            raise ValueError(f"A blend needs 1 to {config.MAX_BLEND_SEEDS} seed movies")
+
+        n = self._pool(k, rerank)
+        rows = np.array([self.resolve(title) for title in titles], dtype=np.int64)
+        with stage("lookup"):
+            seed_rows = self.catalog.rows_for_ids(self.catalog.movie_ids[rows])[1]
+
+        if mode == "approx" and self.ann is not None and aggregate == "sum":
+            # Same scaling and validation as the exact path
+            weights = blend_weights(weights, len(rows), aggregate)
+            vectors = self.ann.vectors
+            neighbor_rows, scores = self.ann.search(
+                weights @ self.ann.embeddings[rows], n, exclude=seed_rows,
+                sparse_query=(
+                    sp.csr_matrix(weights) @ vectors[rows] if vectors is not None else None
+                ),
+            )
+        else:
+            neighbor_rows, scores = self.neighbors.query_blend(
+                rows, n, weights=weights, aggregate=aggregate, exclude=seed_rows
+            )
+        neighbor_rows, scores = self._rerank(neighbor_rows, scores, k, rerank)
+
+        with stage("materialize"):
+            titles, movie_ids = self.catalog.take(neighbor_rows)
+            return [
+                Recommendation(int(movie_id), title, float(score))
+                for movie_id, title, score in zip(movie_ids, titles, scores)
+            ]
+
+    def recommend_batch(
+        self,
+        queries: Sequence[Union[str, int]],
+        k: int = config.NUM_RECOMMENDATIONS,
+        mode: str = config.RECOMMENDATION_MODE,
+        exclude: Optional[Sequence[Iterable[int]]] = None,
+    ) -> List[Union[List[Recommendation], LookupError]]:
+        """
+        Recommend movies for many seed movies with one vectorised top-K.
+
+        Every query is resolved to a row first; the neighbor rows of all
+        resolvable queries are then selected as one ``(Q, k)`` block (see
+        :meth:`neighbors.NeighborIndex.query_batch`) and materialised with a
+        single catalog ``take``. As in :meth:`recommend`, no query is answered
+        with its own seed under another row.
+
+        Args:
+            queries (Sequence[Union[str, int]]): Titles/display labels, or TMDB ids.
+            k (int): Number of recommendations per query.
+            mode (str): ``"exact"`` or ``"approx"``; approximate queries are
+                answered one by one by the ANN index.
+            exclude (Optional[Sequence[Iterable[int]]]): TMDB ids to leave out of
+                each query's results (e.g. movies already watched), one
+                iterable per query.
+
+        Returns:
+            List[Union[List[Recommendation], LookupError]]: Per query, in order,
+                its recommendations or the :class:`MovieNotFoundError` /
+                :class:`AmbiguousTitleError` that prevented resolving it.
+
+        Raises:
+            ValueError: If ``k``, ``mode`` or the number of exclusion lists is invalid.
+        """
+        _check_query(k, mode)
+        if exclude is not None and len(exclude) != len(queries):
+            raise ValueError(f"Got {len(exclude)} exclusion lists for {len(queries)} queries")
+
+        results: List[Union[List[Recommendation], LookupError]] = [None] * len(queries)
+        positions, rows = [], []
+        for position, query in enumerate(queries):
+            try:
+                if isinstance(query, str):
+                    rows.append(self.resolve(query))
+                else:
+                    rows.append(self._row_for_id(int(query)))
+                positions.append(position)
+            except LookupError as e:
+                results[position] = e
+
+        # Map each query's excluded TMDB ids, and its seed's own id (shared by
+        # any duplicate rows of the seed), to (query, row) pairs at once
+        with stage("lookup"):
+            seed_rows = np.array(rows, dtype=np.int64)
+            queries_of, excluded_rows = self.catalog.rows_for_ids(self.catalog.movie_ids[seed_rows])
+            twins = excluded_rows != seed_rows[queries_of]
+            queries_of, excluded_rows = queries_of[twins], excluded_rows[twins]
+            if exclude is not None:
+                user_queries, excluded_ids = exclusion_pairs([exclude[p] for p in positions])
+                matched, user_rows = self.catalog.rows_for_ids(excluded_ids)
+                queries_of = np.concatenate([queries_of, user_queries[matched]])
+                excluded_rows = np.concatenate([excluded_rows, user_rows])
+            excluded = (queries_of, excluded_rows) if len(queries_of) else None
+
+        if mode == "approx" and self.ann is not None:
+            ids, scores = [], []
+            for i, row in enumerate(rows):
+                skip = excluded[1][excluded[0] == i] if excluded is not None else ()
+                row_ids, row_scores = self.ann.search(
+                    self.ann.embeddings[row], k, exclude=[row, *skip],
+                    sparse_query=self.ann.vectors[row] if self.ann.vectors is not None else None,
+                )
+                ids.append(row_ids)
+                scores.append(row_scores)
+        else:
+            if mode == "approx":
+                logger.warning("Recommendation mode 'approx' unavailable, using exact")
+            ids, scores = self.neighbors.query_batch(np.array(rows, dtype=np.int64), k, excluded)
+
+        with stage("materialize"):
+            flat_ids = np.concatenate([row_ids[row_ids >= 0] for row_ids in ids]) if rows else []
+            titles, movie_ids = self.catalog.take(np.asarray(flat_ids, dtype=np.int64))
+            offset = 0
+            for position, row_ids, row_scores in zip(positions, ids, scores):
+                count = int(np.count_nonzero(row_ids >= 0))
+                results[position] = [
+                    Recommendation(int(movie_id), title, float(score))
+                    for movie_id, title, score in zip(
+                        movie_ids[offset:offset + count], titles[offset:offset + count], row_scores[:count]
+                    )
+                ]
+                offset += count
+        return results
+
+    def _row_for_id(self, movie_id: int) -> int:
+        """Row position of a TMDB id (its first row if the id is duplicated)."""
+        with stage("lookup"):
+            rows = self.catalog.rows_for_id(movie_id)
+        if not rows:
+            raise MovieNotFoundError(f"TMDB {movie_id}")
+        return rows[0]
@@ -0,0 +1,319 @@
+"""
+Incremental catalog ingest for CineMatch.
+
+Adds new TMDB movies to the current artifact version without a full rebuild:
+
+1. new movies are vectorized with the *frozen* vocabulary of the current
+   version (``vocabulary.json``), so existing vectors stay valid;
+2. only the new rows are scored against the whole catalog, giving their
+   top-K lists;
+3. every existing top-K list is patched by merging in its similarities to
+   the new movies;
+4. the result is written to a fresh version directory, checked for
+   quantization drift like a full build, and published through the manifest,
+   so readers switch atomically.
+
+Scoring costs O(new × N) instead of the O(N²) of a rebuild; copying the
+existing neighbor table into the new version is a linear pass. Movies whose
+TMDB id is already in the catalog are skipped, so the full, updated TMDB CSVs
+can be passed as-is.
+
+Usage:
+    python ingest.py --movies-csv tmdb_movies.csv --credits-csv tmdb_credits.csv
+"""
+
+from typing import Any, Dict, Optional
+import argparse
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import config
+from ann import load_ann_index, save_ann_index
+from artifact_store import StoreWriter, csr_meta, pack_csr
+from build_index import (
+    catalog_fields,
+    check_ranking_drift,
+    iter_movie_chunks,
+    load_stemmer,
+    read_credit_tags,
+)
+from catalog import save_catalog, save_title_list
+from manifest import artifact_paths, file_sha256, new_version, read_manifest, write_manifest
+from neighbors import (
+    NeighborIndex,
+    load_neighbor_index,
+    merge_top_k,
+    normalize_vectors,
+    score_rows,
+)
+from quantize import PRECISIONS, Matrix, QuantizationDriftError, matrix_specs, open_matrix
+
+logger = logging.getLogger(__name__)
+
+
+def vectorize_frozen(tags: pd.Series, vocabulary: Dict[str, Any]) -> sp.csr_matrix:
+    """
+    Vectorize tags with the vocabulary saved by :mod:`build_index`.
+
+    Args:
+        tags (pd.Series): Tag strings of the new movies.
+        vocabulary (Dict[str, Any]): Contents of ``vocabulary.json``.
+
+    Returns:
+        sp.csr_matrix: Count vectors in the existing column order.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(
+        vocabulary=vocabulary["vocabulary"],
+        stop_words=vocabulary["stop_words"],
+    )
+    return vectorizer.transform(tags).tocsr()
+
+
+def patch_neighbor_lists(
+    index: NeighborIndex,
+    new_vectors: sp.csr_matrix,
+    ids: np.ndarray,
+    scores: Matrix,
+    block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+) -> int:
+    """
+    Copy the existing top-K lists and merge in the movies appended after them.
+
+    Args:
+        index (NeighborIndex): Current index, with normalised vectors.
+        new_vectors (sp.csr_matrix): Normalised vectors of the new movies, which
+            take row positions ``len(index)`` onwards.
+        ids (np.ndarray): Output ids, at least ``len(index)`` rows of width K.
+        scores (np.ndarray): Output scores, same shape as ``ids``.
+        block_size (int): Existing rows patched at once.
+
+    Returns:
+        int: Number of existing lists that gained a new neighbor.
+    """
+    n_old = len(index)
+    new_t = new_vectors.toarray().T
+    new_ids = np.arange(n_old, n_old + new_vectors.shape[0], dtype=np.int32)
+    changed = 0
+    for start in range(0, n_old, block_size):
+        stop = min(start + block_size, n_old)
+        block = index.vectors[start:stop] @ new_t
+        ids[start:stop], scores[start:stop] = index.ids[start:stop], index.scores[start:stop]
+        # Only lists where a new movie beats the current K-th neighbor change
+        hit = np.flatnonzero(block.max(axis=1) > scores[start:stop, -1])
+        if len(hit):
+            rows = start + hit
+            ids[rows], scores[rows] = merge_top_k(
+                ids[rows], scores[rows], np.broadcast_to(new_ids, (len(hit), len(new_ids))),
+                block[hit], index.k,
+            )
+            changed += len(hit)
+    return changed
+
+
+def ingest(
+    movies_csv: str,
+    credits_csv: str,
+    root: str = config.ARTIFACT_DIR,
+    block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+    chunk_size: int = config.BUILD_CHUNK_SIZE,
+    score_precision: str = config.SCORE_PRECISION,
+    embedding_precision: str = config.EMBEDDING_PRECISION,
+    max_drift: float = config.QUANTIZATION_MAX_DRIFT,
+    max_score_error: float = config.QUANTIZATION_MAX_SCORE_ERROR,
+) -> Optional[str]:
+    """
+    Add the movies of the given CSVs that are not yet in the catalog.
+
+    Args:
+        movies_csv (str): TMDB movies CSV (new or all movies).
+        credits_csv (str): Matching TMDB credits CSV.
+        root (str): Artifact root directory.
+        block_size (int): Rows scored or patched at once.
+        chunk_size (int): CSV rows parsed at once.
+        score_precision (str): Storage precision of the neighbor scores.
+        embedding_precision (str): Storage precision of the ANN embeddings.
+        max_drift (float): Largest recall@K loss to quantization accepted.
+        max_score_error (float): Largest quantization error of a neighbor
+            score accepted.
+
+    Returns:
+        Optional[str]: The published version, or None if there was nothing new.
+
+    Raises:
+        SystemExit: If the current version has no frozen vocabulary.
+        QuantizationDriftError: If the new version drifts too far from the
+            float64 baseline; nothing is published.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    manifest = read_manifest(root)
+    paths = artifact_paths(root)
+    if manifest is None or "vocabulary" not in paths:
+        raise SystemExit(
+            "Incremental ingest needs a version built by build_index.py "
+            "(with vocabulary.json); run a full build first."
+        )
+
+    with open(paths["vocabulary"]) as f:
+        vocabulary = json.load(f)
+    with open(paths["movies"], "rb") as f:
+        movies = pickle.load(f)
+    index = load_neighbor_index(paths["index"])
+    n_old, k = len(index), index.k
+
+    stem = load_stemmer() if vocabulary.get("stem") else None
+    known = set(movies["movie_id"].astype("int64"))
+    credit_tags = {
+        movie_id: tags for movie_id, tags in read_credit_tags(credits_csv, chunk_size).items()
+        if movie_id not in known
+    }
+    chunks = list(iter_movie_chunks(movies_csv, credit_tags, chunk_size, stem))
+    added = pd.concat(chunks, ignore_index=True) if chunks else movies.iloc[:0]
+    added = added.drop_duplicates("movie_id")
+    if added.empty:
+        logger.info(f"No new movies in {movies_csv}; {paths['version']} is current")
+        return None
+    timings["parse_s"] = time.perf_counter() - started
+
+    new_vectors = normalize_vectors(vectorize_frozen(added["tags"], vocabulary))
+    vectors = sp.vstack([index.vectors, new_vectors], format="csr")
+    n_rows = vectors.shape[0]
+    timings["vectorize_s"] = time.perf_counter() - started - timings["parse_s"]
+
+    version = new_version()
+    version_dir = os.path.join(root, version)
+    os.makedirs(version_dir)
+
+    # Nothing is published until the manifest is replaced; drop partial versions
+    try:
+        packed = pack_csr("vectors", vectors)
+        specs = {
+            "neighbors.ids": (np.int32, (n_rows, k)),
+            **matrix_specs("neighbors.scores", (n_rows, k), score_precision),
+            **{name: (arr.dtype, arr.shape) for name, arr in packed.items()},
+        }
+        store_meta = {
+            "kind": "neighbors", "n_movies": n_rows, "k": k, "version": version,
+            "parent": paths["version"], "score_precision": score_precision,
+            **csr_meta("vectors", vectors),
+        }
+
+        index_path = os.path.join(version_dir, "index.store")
+        with StoreWriter(index_path, specs, store_meta) as writer:
+            for name, arr in packed.items():
+                writer[name][...] = arr
+            ids = writer["neighbors.ids"]
+            scores = open_matrix(writer, "neighbors.scores", score_precision)
+
+            changed = patch_neighbor_lists(index, new_vectors, ids, scores, block_size)
+            timings["patch_s"] = time.perf_counter() - started - sum(timings.values())
+
+            # Score only the new rows against the whole catalog
+            for start, block_ids, block_scores in score_rows(vectors, n_old, k, block_size):
+                ids[start:start + len(block_ids)] = block_ids
+                scores[start:start + len(block_ids)] = block_scores
+            timings["score_s"] = time.perf_counter() - started - sum(timings.values())
+
+        files = {role: os.path.basename(entry["path"]) for role, entry in manifest["files"].items()}
+        ann_indexes = None
+        if "ann" in paths:
+            ann = load_ann_index(paths["ann"]).extend(new_vectors)
+            ann_path = os.path.join(version_dir, files["ann"])
+            save_ann_index(ann, ann_path, precision=embedding_precision)
+            ann_indexes = (ann, load_ann_index(ann_path))
+            timings["ann_s"] = time.perf_counter() - started - sum(timings.values())
+
+        quantization = check_ranking_drift(
+            vectors, load_neighbor_index(index_path), ann_indexes,
+            max_drift=max_drift, max_score_error=max_score_error,
+        )
+        timings["check_s"] = time.perf_counter() - started - sum(timings.values())
+
+        movies = pd.concat([movies, added], ignore_index=True)
+        with open(os.path.join(version_dir, files["movies"]), "wb") as f:
+            pickle.dump(movies, f)
+        files.setdefault("catalog", "catalog.store")
+        files.setdefault("titles", "titles.json")
+        catalog = save_catalog(
+            os.path.join(version_dir, files["catalog"]),
+            movies["title"].tolist(), movies["movie_id"].to_numpy(), catalog_fields(movies),
+            meta={"version": version, "parent": paths["version"]},
+        )
+        save_title_list(catalog, os.path.join(version_dir, files["titles"]))
+        shutil.copyfile(paths["vocabulary"], os.path.join(version_dir, files["vocabulary"]))
+
+        write_manifest(
+            version,
+            files,
+            meta={
+                "builder": "ingest",
+                "parent": paths["version"],
+                "n_movies": n_rows,
+                "n_added": len(added),
+                "n_patched": changed,
+                "k": k,
+                "vocabulary_size": manifest.get("vocabulary_size"),
+                "inputs": {
+                    os.path.basename(path): file_sha256(path) for path in (movies_csv, credits_csv)
+                },
+                "quantization": quantization,
+                "timings": {name: round(value, 3) for name, value in timings.items()},
+            },
+            root=root,
+        )
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+    logger.info(
+        f"Published {version}: added {len(added)} movies to {n_old}, "
+        f"patched {changed} neighbor lists in {time.perf_counter() - started:.1f}s"
+    )
+    return version
+
+
+def main() -> None:
+    """Ingest new movies from TMDB CSV files."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--movies-csv", required=True)
+    parser.add_argument("--credits-csv", required=True)
+    parser.add_argument("--artifacts", default=config.ARTIFACT_DIR)
+    parser.add_argument("--block-size", type=int, default=config.NEIGHBOR_BLOCK_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=config.BUILD_CHUNK_SIZE)
+    parser.add_argument("--score-precision", choices=PRECISIONS, default=config.SCORE_PRECISION)
+    parser.add_argument("--embedding-precision", choices=PRECISIONS, default=config.EMBEDDING_PRECISION)
+    parser.add_argument("--max-drift", type=float, default=config.QUANTIZATION_MAX_DRIFT,
+                        help="recall@K a quantized version may lose before it is refused")
+    parser.add_argument("--max-score-error", type=float, default=config.QUANTIZATION_MAX_SCORE_ERROR,
+                        help="largest neighbor score error of a quantized version before it is refused")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    try:
+        ingest(
+            args.movies_csv, args.credits_csv, args.artifacts,
+            block_size=args.block_size, chunk_size=args.chunk_size,
+            score_precision=args.score_precision,
+            embedding_precision=args.embedding_precision, max_drift=args.max_drift,
+            max_score_error=args.max_score_error,
+        )
+    except QuantizationDriftError as e:
+        raise SystemExit(f"Not published: {e}")
+
+
+if __name__ == "__main__":
+    main()
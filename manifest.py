@@ -0,0 +1,157 @@
+"""
+Versioned artifact manifest for CineMatch.
+
+Every build writes its files into a fresh version directory under
+``config.ARTIFACT_DIR`` and then atomically replaces ``manifest.json``, which
+points at the current version::
+
+    artifacts/
+        manifest.json
+        20261017T060500Z-1a2b3c4d/
+            movie_list.pkl
+            catalog.store
+            titles.json
+            index.store
+            vocabulary.json
+
+Readers only ever follow the manifest, so they see either the old version or
+the complete new one. Without a manifest the app falls back to the legacy
+``movie_list.pkl`` + ``artifacts/index.store`` layout.
+
+``movie_list.pkl`` (with the tag strings) is kept for rebuilds and ingest;
+servers only read the compact ``catalog.store`` (see :mod:`catalog`).
+"""
+
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import time
+
+import config
+
+MANIFEST_VERSION: int = 1
+
+
+def new_version() -> str:
+    """Return a unique, chronologically sortable artifact version string."""
+    return f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{secrets.token_hex(4)}"
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(
+    version: str,
+    files: Dict[str, str],
+    meta: Optional[Dict[str, Any]] = None,
+    root: str = config.ARTIFACT_DIR,
+) -> Dict[str, Any]:
+    """
+    Publish a version by atomically replacing the manifest.
+
+    Args:
+        version (str): Version directory name under ``root``.
+        files (Dict[str, str]): Artifact role (``"movies"``, ``"index"``, ...)
+            to file name inside the version directory.
+        meta (Optional[Dict[str, Any]]): Extra build information to record.
+        root (str): Artifact root directory.
+
+    Returns:
+        Dict[str, Any]: The manifest that was written.
+    """
+    version_dir = os.path.join(root, version)
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "files": {
+            role: {
+                "path": os.path.join(version, name),
+                "sha256": file_sha256(os.path.join(version_dir, name)),
+                "bytes": os.path.getsize(os.path.join(version_dir, name)),
+            }
+            for role, name in files.items()
+        },
+        **(meta or {}),
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, os.path.join(root, config.MANIFEST_FILE))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return manifest
+
+
+def read_manifest(root: str = config.ARTIFACT_DIR) -> Optional[Dict[str, Any]]:
+    """
+    Read the current manifest.
+
+    Args:
+        root (str): Artifact root directory.
+
+    Returns:
+        Optional[Dict[str, Any]]: The manifest, or None if there is none.
+    """
+    path = os.path.join(root, config.MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def artifact_paths(root: str = config.ARTIFACT_DIR) -> Dict[str, str]:
+    """
+    Resolve the files of the current artifact version.
+
+    Without a manifest, ``root`` is read as a legacy layout: the stores sit
+    directly in it and ``movie_list.pkl`` next to it, in its parent directory
+    (``movie_list.pkl`` + ``artifacts/index.store`` for the default root).
+
+    Args:
+        root (str): Artifact root directory.
+
+    Returns:
+        Dict[str, str]: Path per artifact role, plus the ``"version"`` string
+            (``"legacy"`` when no manifest exists).
+    """
+    manifest = read_manifest(root)
+    if manifest is None:
+        return {
+            "version": "legacy",
+            "movies": os.path.join(
+                os.path.dirname(os.path.normpath(root)), os.path.basename(config.MOVIE_LIST_FILE)
+            ),
+            **{
+                role: os.path.join(root, os.path.basename(path))
+                for role, path in (
+                    ("catalog", config.CATALOG_FILE),
+                    ("titles", config.TITLES_FILE),
+                    ("index", config.INDEX_FILE),
+                    ("ann", config.ANN_FILE),
+                )
+            },
+        }
+
+    paths = {
+        role: os.path.join(root, entry["path"])
+        for role, entry in manifest["files"].items()
+    }
+    paths["version"] = manifest["version"]
+    return paths
@@ -0,0 +1,716 @@
+"""
+Top-K neighbor index for CineMatch.
+
+Instead of materialising the dense N×N cosine similarity matrix, the index keeps
+only the K most similar movies for every movie: an ``(N, K)`` int32 array of row
+positions and an ``(N, K)`` array of scores, both ordered from most to least
+similar. Memory therefore grows as N·K rather than N². Scores are stored in
+``SCORE_PRECISION`` (uint8 with a per-row scale by default, see
+:mod:`quantize`); the ranking itself is fixed at build time in float32.
+
+The index is built from the same bag-of-words vectors as notebook.ipynb
+(``CountVectorizer`` over the ``tags`` column). Query rows are processed in
+blocks, optionally on a process pool, and each block is scored against the
+catalog one column block at a time, so the peak working set is
+``block_size × column_block_size`` scores per worker instead of the full matrix.
+
+Usage:
+    python neighbors.py --movies movie_list.pkl --output artifacts/index.store
+"""
+
+from typing import Any, Dict, NamedTuple, Iterable, Iterator, Optional, Sequence, Tuple
+import argparse
+import logging
+import pickle
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+import config
+from artifact_store import StoreWriter, csr_meta, open_store, pack_csr, write_store
+from quantize import PRECISIONS, Matrix, matrix_specs, open_matrix, pack_matrix
+from telemetry import stage
+
+logger = logging.getLogger(__name__)
+
+
+class NeighborIndex(NamedTuple):
+    """
+    Precomputed top-K neighbors for every movie in the catalog.
+
+    Attributes:
+        ids (np.ndarray): Row positions of the neighbors, shape ``(N, K)``, int32.
+        scores (Matrix): Cosine similarity of each neighbor, shape ``(N, K)``,
+            sorted in descending order along each row; a float32 array or a
+            :class:`~quantize.QuantizedMatrix` that decodes to float32.
+        vectors (Optional[sp.csr_matrix]): L2-normalised movie vectors, used to
+            score queries that need more than K neighbors.
+    """
+
+    ids: np.ndarray
+    scores: Matrix
+    vectors: Optional[sp.csr_matrix] = None
+
+    @property
+    def k(self) -> int:
+        """Number of neighbors stored per movie."""
+        return self.ids.shape[1]
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    def query(self, movie_idx: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the ``n`` movies most similar to the movie at ``movie_idx``.
+
+        Up to K results are read straight from the precomputed table. Larger
+        requests score the movie against the whole catalog from ``vectors``.
+
+        Args:
+            movie_idx (int): Row position of the query movie.
+            n (int): Number of neighbors wanted.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Neighbor row positions and scores,
+                best-first, never including ``movie_idx`` itself.
+        """
+        if n <= self.k:
+            with stage("topk"):
+                return self.ids[movie_idx, :n], self.scores[movie_idx, :n]
+
+        if self.vectors is None:
+            logger.warning(
+                f"Requested {n} neighbors but only {self.k} are stored "
+                f"and no vectors are available; returning {self.k}"
+            )
+            return self.ids[movie_idx], self.scores[movie_idx]
+
+        with stage("score"):
+            row_scores = (self.vectors @ self.vectors[movie_idx].T).toarray().ravel()
+        with stage("topk"):
+            return top_n(row_scores, n, exclude=(movie_idx,))
+
+    def query_blend(
+        self,
+        rows: np.ndarray,
+        n: int,
+        weights: Optional[np.ndarray] = None,
+        aggregate: str = "sum",
+        exclude: Iterable[int] = (),
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the ``n`` movies most similar to a blend of several seed movies.
+
+        ``"sum"`` ranks by the weighted mean of the seeds' cosine similarities,
+        computed as one sparse mat-vec against the weighted sum of the seed
+        vectors. ``"max"`` ranks by each movie's best weighted similarity to
+        any seed, from one ``(N, S)`` sparse × dense product. Without
+        ``vectors`` the seeds' stored top-K lists are aggregated instead, so
+        only movies in some seed's list can be returned.
+
+        Args:
+            rows (np.ndarray): Row positions of the seed movies, shape ``(S,)``.
+            n (int): Number of neighbors wanted.
+            weights (Optional[np.ndarray]): Non-negative weight per seed;
+                equal weights when omitted.
+            aggregate (str): ``"sum"`` or ``"max"``.
+            exclude (Iterable[int]): Further row positions never returned; the
+                seeds themselves are always excluded.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Neighbor row positions and blended
+                scores, best-first.
+
+        Raises:
+            ValueError: If ``aggregate`` or ``weights`` is invalid.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        weights = blend_weights(weights, len(rows), aggregate)
+
+        with stage("score"):
+            if self.vectors is not None and aggregate == "sum":
+                blend = np.asarray(self.vectors[rows].T @ weights).ravel()
+                scores = self.vectors @ blend
+            elif self.vectors is not None:
+                scores = (self.vectors @ self.vectors[rows].toarray().T * weights).max(axis=1)
+            else:
+                scores = np.full(len(self), -np.inf if aggregate == "max" else 0.0, dtype=np.float32)
+                weighted = self.scores[rows] * weights[:, None]
+                if aggregate == "sum":
+                    np.add.at(scores, self.ids[rows], weighted)
+                else:
+                    np.maximum.at(scores, self.ids[rows], weighted)
+        with stage("topk"):
+            return top_n(scores, n, exclude=np.concatenate([rows, np.fromiter(exclude, dtype=np.int64)]))
+
+    def query_batch(
+        self,
+        rows: np.ndarray,
+        n: int,
+        exclude: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the ``n`` most similar movies for many query movies at once.
+
+        When the stored table is deep enough (``n`` plus the longest exclusion
+        list fits in K), the ``(Q, K)`` rows are gathered with one fancy index
+        and the first ``n`` entries that are not excluded are kept. Otherwise the queries are scored
+        against the whole catalog from ``vectors`` in blocks of ``block_size``
+        rows, each block a single sparse × dense product.
+
+        Args:
+            rows (np.ndarray): Row positions of the query movies, shape ``(Q,)``.
+            n (int): Number of neighbors wanted per query.
+            exclude (Optional[Tuple[np.ndarray, np.ndarray]]): Parallel arrays
+                of query positions (into ``rows``) and row positions to drop
+                from that query's results; see :func:`exclusion_pairs`.
+            block_size (int): Queries scored at once on the exact path.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: ``(Q, n)`` neighbor row positions and
+                scores, best-first. Queries with fewer than ``n`` eligible
+                neighbors are padded with id ``-1`` and score ``-inf``.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        excluded = exclusion_pairs([[]] * len(rows)) if exclude is None else exclude
+        longest = int(np.bincount(excluded[0], minlength=1).max()) if len(excluded[0]) else 0
+
+        if n + longest <= self.k or self.vectors is None:
+            if n > self.k:
+                logger.warning(
+                    f"Requested {n} neighbors but only {self.k} are stored "
+                    f"and no vectors are available; returning {self.k}"
+                )
+            with stage("score"):
+                ids = np.asarray(self.ids[rows])
+                scores = np.asarray(self.scores[rows], dtype=np.float32)
+                if not len(excluded[0]):
+                    return ids[:, :n], scores[:, :n]
+                keys = np.arange(len(rows))[:, None] * len(self) + ids
+                dropped = np.isin(keys, excluded[0] * len(self) + excluded[1])
+            with stage("topk"):
+                # Rows are stored best-first: keep the first n survivors in
+                # stored order rather than re-ranking scores that may tie once
+                # quantized
+                order = np.argsort(dropped, axis=1, kind="stable")[:, :n]
+                top_ids = np.take_along_axis(ids, order, axis=1)
+                top_scores = np.take_along_axis(scores, order, axis=1)
+                padding = np.take_along_axis(dropped, order, axis=1)
+                top_ids[padding], top_scores[padding] = -1, -np.inf
+                return top_ids, top_scores
+
+        out_ids = np.empty((len(rows), min(n, len(self))), dtype=np.int32)
+        out_scores = np.empty(out_ids.shape, dtype=np.float32)
+        for start in range(0, len(rows), block_size):
+            stop = min(start + block_size, len(rows))
+            with stage("score"):
+                block = (self.vectors @ self.vectors[rows[start:stop]].toarray().T).T
+                block[np.arange(stop - start), rows[start:stop]] = -np.inf
+                in_block = (excluded[0] >= start) & (excluded[0] < stop)
+                block[excluded[0][in_block] - start, excluded[1][in_block]] = -np.inf
+            with stage("topk"):
+                out_ids[start:stop], out_scores[start:stop] = top_n_batch(block, n)
+        return out_ids, out_scores
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Build
+# ─────────────────────────────────────────────────────────────────────────────
+
+def vectorize_tags(tags: Iterable[str]) -> sp.csr_matrix:
+    """
+    Turn movie tag strings into sparse bag-of-words count vectors.
+
+    Args:
+        tags (Iterable[str]): One space-separated tag string per movie.
+
+    Returns:
+        sp.csr_matrix: Sparse count matrix of shape ``(N, vocabulary size)``.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(
+        max_features=config.VECTORIZER_MAX_FEATURES,
+        stop_words="english",
+    )
+    return vectorizer.fit_transform(tags).tocsr()
+
+
+def build_neighbor_index(
+    vectors: sp.spmatrix,
+    k: int = config.NEIGHBOR_K,
+    block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+    column_block_size: int = config.NEIGHBOR_COLUMN_BLOCK_SIZE,
+    workers: int = 1,
+    out: Optional[Tuple[np.ndarray, Matrix]] = None,
+) -> NeighborIndex:
+    """
+    Compute the top-K cosine neighbors of every row of ``vectors``.
+
+    Query rows are processed in blocks of ``block_size``; each block is scored
+    against ``column_block_size`` catalog rows at a time and the per-block top-K
+    lists are merged, so the working set is ``block_size × column_block_size``
+    scores per worker whatever the catalog size. With ``workers > 1`` the row
+    blocks are spread over a process pool.
+
+    Args:
+        vectors (sp.spmatrix): Sparse movie vectors, one row per movie.
+        k (int): Number of neighbors to keep per movie.
+        block_size (int): Number of query rows scored at once.
+        column_block_size (int): Number of catalog rows scored at once.
+        workers (int): Number of worker processes.
+        out (Optional[Tuple[np.ndarray, Matrix]]): Preallocated ``(N, K)``
+            ids and scores arrays (e.g. memory maps from a
+            :class:`~artifact_store.StoreWriter`, scores possibly quantized)
+            that blocks are streamed into.
+
+    Returns:
+        NeighborIndex: Neighbor ids and scores (self-matches excluded) together
+            with the normalised vectors.
+    """
+    normed = normalize_vectors(vectors)
+    n_rows = normed.shape[0]
+    k = min(k, n_rows - 1)
+
+    if out is None:
+        out = (np.empty((n_rows, k), dtype=np.int32), np.empty((n_rows, k), dtype=np.float32))
+    ids, scores = out
+
+    starts = range(0, n_rows, block_size)
+    started = time.perf_counter()
+
+    if workers <= 1:
+        _init_worker(normed, k, block_size, column_block_size)
+        results = map(_score_rows, starts)
+        _finish = _release_worker
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(normed, k, block_size, column_block_size),
+        )
+        results = executor.map(_score_rows, starts)
+        _finish = executor.shutdown
+
+    try:
+        for done, (start, block_ids, block_scores) in enumerate(results, 1):
+            ids[start:start + len(block_ids)] = block_ids
+            scores[start:start + len(block_ids)] = block_scores
+            if done % 50 == 0:
+                logger.info(
+                    f"Scored {min(done * block_size, n_rows)}/{n_rows} movies "
+                    f"in {time.perf_counter() - started:.1f}s"
+                )
+    finally:
+        _finish()
+
+    return NeighborIndex(ids=ids, scores=scores, vectors=normed)
+
+
+# Per-process state for build workers, set once by the pool initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(
+    normed: sp.csr_matrix,
+    k: int,
+    block_size: int,
+    column_block_size: int,
+) -> None:
+    _worker.update(
+        normed=normed,
+        k=k,
+        block_size=block_size,
+        column_block_size=column_block_size,
+    )
+
+
+def _release_worker() -> None:
+    _worker.clear()
+
+
+def _score_rows(start: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Score one block of query rows against the catalog, column block by block."""
+    normed, k = _worker["normed"], _worker["k"]
+    n_rows = normed.shape[0]
+    stop = min(start + _worker["block_size"], n_rows)
+    # Dense query rows make each block a sparse × dense product with a dense
+    # result, instead of a sparse × sparse product with a large sparse result.
+    rows_t = normed[start:stop].toarray().T
+
+    best_ids = np.full((stop - start, k), -1, dtype=np.int32)
+    best_scores = np.full((stop - start, k), -np.inf, dtype=np.float32)
+
+    for col_start in range(0, n_rows, _worker["column_block_size"]):
+        col_stop = min(col_start + _worker["column_block_size"], n_rows)
+        block = (normed[col_start:col_stop] @ rows_t).T
+
+        # A movie is never its own neighbor, whatever its score ties with.
+        own = np.arange(max(start, col_start), min(stop, col_stop))
+        block[own - start, own - col_start] = -np.inf
+
+        best_ids, best_scores = merge_top_k(
+            best_ids, best_scores,
+            np.broadcast_to(np.arange(col_start, col_stop, dtype=np.int32), block.shape), block,
+            k, ordered=False,
+        )
+
+    return (start, *merge_top_k(best_ids, best_scores, best_ids[:, :0], best_scores[:, :0], k))
+
+
+def merge_top_k(
+    ids: np.ndarray,
+    scores: np.ndarray,
+    candidate_ids: np.ndarray,
+    candidate_scores: np.ndarray,
+    k: int,
+    ordered: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge candidate neighbors into existing top-K lists, row by row.
+
+    Args:
+        ids (np.ndarray): Current neighbor ids, shape ``(R, K0)``.
+        scores (np.ndarray): Current neighbor scores, shape ``(R, K0)``.
+        candidate_ids (np.ndarray): New candidate ids, shape ``(R, C)``.
+        candidate_scores (np.ndarray): New candidate scores, shape ``(R, C)``.
+        k (int): Neighbors kept per row (at most ``K0 + C``).
+        ordered (bool): Sort each row best-first; skip when merging repeatedly.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The ``(R, k)`` merged ids and scores.
+    """
+    merged_scores = np.hstack([scores, candidate_scores])
+    merged_ids = np.hstack([ids, candidate_ids])
+    if k < merged_scores.shape[1]:
+        top = np.argpartition(merged_scores, -k, axis=1)[:, -k:]
+        merged_scores = np.take_along_axis(merged_scores, top, axis=1)
+        merged_ids = np.take_along_axis(merged_ids, top, axis=1)
+    if ordered:
+        order = np.argsort(-merged_scores, axis=1, kind="stable")
+        merged_scores = np.take_along_axis(merged_scores, order, axis=1)
+        merged_ids = np.take_along_axis(merged_ids, order, axis=1)
+    return merged_ids, merged_scores
+
+
+def score_rows(
+    normed: sp.csr_matrix,
+    start: int,
+    k: int = config.NEIGHBOR_K,
+    block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+    column_block_size: int = config.NEIGHBOR_COLUMN_BLOCK_SIZE,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Top-K neighbors of the rows from ``start`` onwards against all of ``normed``.
+
+    Used to score only the rows appended to an existing catalog; the blocks are
+    computed exactly as :func:`build_neighbor_index` computes them.
+
+    Args:
+        normed (sp.csr_matrix): L2-normalised vectors of the whole catalog.
+        start (int): First row to score.
+        k (int): Neighbors kept per row.
+        block_size (int): Query rows scored at once.
+        column_block_size (int): Catalog rows scored at once.
+
+    Yields:
+        Tuple[int, np.ndarray, np.ndarray]: Block start row, ``(B, k)`` ids and scores.
+    """
+    _init_worker(normed, k, block_size, column_block_size)
+    try:
+        for block_start in range(start, normed.shape[0], block_size):
+            yield _score_rows(block_start)
+    finally:
+        _release_worker()
+
+
+def build_neighbor_store(
+    vectors: sp.spmatrix,
+    path: str,
+    k: int = config.NEIGHBOR_K,
+    block_size: int = config.NEIGHBOR_BLOCK_SIZE,
+    column_block_size: int = config.NEIGHBOR_COLUMN_BLOCK_SIZE,
+    workers: int = 1,
+    meta: Optional[Dict[str, Any]] = None,
+    precision: str = config.SCORE_PRECISION,
+) -> NeighborIndex:
+    """
+    Build a neighbor index straight into an artifact store on disk.
+
+    Same as :func:`build_neighbor_index` followed by :func:`save_neighbor_index`,
+    except that neighbor blocks are written to the store's memory maps as they
+    complete instead of being accumulated in memory first.
+
+    Args:
+        vectors (sp.spmatrix): Sparse movie vectors, one row per movie.
+        path (str): Destination store path.
+        k (int): Number of neighbors to keep per movie.
+        block_size (int): Number of query rows scored at once.
+        column_block_size (int): Number of catalog rows scored at once.
+        workers (int): Number of worker processes.
+        meta (Optional[Dict[str, Any]]): Extra build metadata to record.
+        precision (str): Storage precision of the scores (see :mod:`quantize`).
+
+    Returns:
+        NeighborIndex: The index, backed by read-only maps of the written store.
+    """
+    normed = normalize_vectors(vectors)
+    n_rows = normed.shape[0]
+    k = min(k, n_rows - 1)
+
+    packed = pack_csr("vectors", normed)
+    specs = {
+        "neighbors.ids": (np.int32, (n_rows, k)),
+        **matrix_specs("neighbors.scores", (n_rows, k), precision),
+        **{name: (arr.dtype, arr.shape) for name, arr in packed.items()},
+    }
+    store_meta = {
+        "kind": "neighbors", "n_movies": n_rows, "k": k, "score_precision": precision,
+        **csr_meta("vectors", normed),
+    }
+    store_meta.update(meta or {})
+
+    with StoreWriter(path, specs, store_meta) as writer:
+        for name, arr in packed.items():
+            writer[name][...] = arr
+        build_neighbor_index(
+            normed, k=k, block_size=block_size, column_block_size=column_block_size,
+            workers=workers,
+            out=(writer["neighbors.ids"], open_matrix(writer, "neighbors.scores", precision)),
+        )
+
+    return load_neighbor_index(path)
+
+
+def top_n(
+    scores: np.ndarray,
+    n: int,
+    exclude: Iterable[int] = (),
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the ``n`` highest scores of a 1-D score vector.
+
+    Uses ``argpartition`` to find the top slice in O(N), then sorts only that
+    slice. Excluded positions are masked out before selection, so they are
+    never returned whatever their score or ties.
+
+    Args:
+        scores (np.ndarray): One score per movie.
+        n (int): Number of results wanted.
+        exclude (Iterable[int]): Row positions that must not be returned.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: int32 row positions and float32 scores,
+            sorted best-first.
+    """
+    scores = np.array(scores, dtype=np.float32)
+    excluded = np.unique(np.fromiter(exclude, dtype=np.intp))
+    scores[excluded] = -np.inf
+
+    n = max(0, min(n, len(scores) - len(excluded)))
+    if n == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    top = np.argpartition(scores, -n)[-n:]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top.astype(np.int32), scores[top]
+
+
+def top_n_batch(
+    scores: np.ndarray,
+    n: int,
+    ids: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise :func:`top_n` over a ``(Q, N)`` score block in one vectorised pass.
+
+    Args:
+        scores (np.ndarray): Scores, one row per query; ``-inf`` marks entries
+            that must not be returned.
+        n (int): Number of results wanted per row.
+        ids (Optional[np.ndarray]): ``(Q, N)`` ids matching ``scores``; column
+            positions are returned when omitted.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: ``(Q, n)`` int32 ids and float32 scores,
+            sorted best-first, padded with ``-1``/``-inf`` where a row has
+            fewer than ``n`` eligible entries.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    n = min(n, scores.shape[1])
+    if n < scores.shape[1]:
+        top = np.argpartition(scores, -n, axis=1)[:, -n:]
+    else:
+        top = np.broadcast_to(np.arange(n), scores.shape)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    top_ids = (top if ids is None else np.take_along_axis(ids, top, axis=1)).astype(np.int32)
+    top_ids[np.isneginf(top_scores)] = -1
+    return top_ids, top_scores
+
+
+def blend_weights(weights: Optional[np.ndarray], n_seeds: int, aggregate: str) -> np.ndarray:
+    """Validate seed weights and scale them for the chosen aggregation."""
+    if aggregate not in ("sum", "max"):
+        raise ValueError(f"Unknown blend aggregation '{aggregate}'")
+    weights = np.ones(n_seeds) if weights is None else np.asarray(weights, dtype=np.float64)
+    if weights.shape != (n_seeds,) or (weights < 0).any() or not weights.any():
+        raise ValueError("Blend weights must be non-negative, one per seed, and not all zero")
+    # A weighted mean for "sum"; the heaviest seed counts fully for "max"
+    return (weights / (weights.sum() if aggregate == "sum" else weights.max())).astype(np.float32)
+
+
+def exclusion_pairs(exclude: Sequence[Iterable[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten per-query exclusion lists into parallel ``(query, value)`` arrays.
+
+    Args:
+        exclude (Sequence[Iterable[int]]): One iterable of values per query.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: int64 query positions and values.
+    """
+    excluded = [np.fromiter(values, dtype=np.int64) for values in exclude]
+    return (
+        np.repeat(np.arange(len(excluded)), [len(values) for values in excluded]),
+        np.concatenate(excluded) if excluded else np.empty(0, dtype=np.int64),
+    )
+
+
+def normalize_vectors(vectors: sp.spmatrix) -> sp.csr_matrix:
+    """
+    L2-normalise movie vectors so that dot products are cosine similarities.
+
+    Args:
+        vectors (sp.spmatrix): Sparse movie vectors, one row per movie.
+
+    Returns:
+        sp.csr_matrix: float32 CSR matrix with unit-length (or empty) rows.
+    """
+    from sklearn.preprocessing import normalize
+
+    return normalize(sp.csr_matrix(vectors, dtype=np.float32), norm="l2", copy=True)
+
+
+def top_k_block(block: np.ndarray, start: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the best ``k`` columns of each row of a block of similarity rows.
+
+    Args:
+        block (np.ndarray): Dense scores of shape ``(rows, N)`` for the movies at
+            positions ``start .. start + rows``. Modified in place.
+        start (int): Row position of the first movie in the block.
+        k (int): Number of neighbors to keep.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: int32 neighbor ids and float32 scores,
+            each of shape ``(rows, k)`` and sorted best-first.
+    """
+    # A movie is never its own neighbor, whatever its score ties with.
+    local_rows = np.arange(block.shape[0])
+    block[local_rows, local_rows + start] = -np.inf
+
+    top = np.argpartition(block, -k, axis=1)[:, -k:]
+    top_scores = np.take_along_axis(block, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+
+    return (
+        np.take_along_axis(top, order, axis=1).astype(np.int32),
+        np.take_along_axis(top_scores, order, axis=1).astype(np.float32),
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Persistence
+# ─────────────────────────────────────────────────────────────────────────────
+
+def save_neighbor_index(
+    index: NeighborIndex,
+    path: str,
+    meta: Optional[Dict[str, Any]] = None,
+    precision: str = config.SCORE_PRECISION,
+) -> None:
+    """
+    Write a neighbor index (and its vectors, if present) to an artifact store.
+
+    Args:
+        index (NeighborIndex): The index to save.
+        path (str): Destination store path.
+        meta (Optional[Dict[str, Any]]): Extra build metadata to record.
+        precision (str): Storage precision of the scores (see :mod:`quantize`).
+    """
+    arrays = {"neighbors.ids": index.ids, **pack_matrix("neighbors.scores", index.scores, precision)}
+    store_meta = {"kind": "neighbors", "n_movies": len(index), "k": index.k, "score_precision": precision}
+    if index.vectors is not None:
+        arrays.update(pack_csr("vectors", index.vectors))
+        store_meta.update(csr_meta("vectors", index.vectors))
+    store_meta.update(meta or {})
+    write_store(path, arrays, store_meta)
+
+
+def load_neighbor_index(path: str) -> NeighborIndex:
+    """
+    Memory-map a neighbor index written by :func:`save_neighbor_index`.
+
+    Args:
+        path (str): Path to the artifact store.
+
+    Returns:
+        NeighborIndex: The index, backed by read-only memory-mapped arrays.
+    """
+    store = open_store(path)
+    return NeighborIndex(
+        ids=store["neighbors.ids"],
+        scores=open_matrix(store, "neighbors.scores"),
+        vectors=store.csr("vectors") if "vectors.data" in store else None,
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Command Line
+# ─────────────────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    """Build the neighbor index from the pickled movie list."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--movies", default=config.MOVIE_LIST_FILE)
+    parser.add_argument("--output", default=config.INDEX_FILE)
+    parser.add_argument("--k", type=int, default=config.NEIGHBOR_K)
+    parser.add_argument("--block-size", type=int, default=config.NEIGHBOR_BLOCK_SIZE)
+    parser.add_argument("--column-block-size", type=int,
+                        default=config.NEIGHBOR_COLUMN_BLOCK_SIZE)
+    parser.add_argument("--workers", type=int, default=config.BUILD_WORKERS)
+    parser.add_argument("--precision", choices=PRECISIONS, default=config.SCORE_PRECISION)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    with open(args.movies, "rb") as f:
+        movies = pickle.load(f)
+
+    started = time.perf_counter()
+    vectors = vectorize_tags(movies["tags"])
+    index = build_neighbor_store(
+        vectors, args.output, k=args.k, block_size=args.block_size,
+        column_block_size=args.column_block_size, workers=args.workers,
+        precision=args.precision,
+    )
+
+    logger.info(
+        f"Built top-{index.k} neighbors for {len(index)} movies "
+        f"in {time.perf_counter() - started:.1f}s -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
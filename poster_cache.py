@@ -0,0 +1,173 @@
+"""
+Persistent poster cache for CineMatch.
+
+Stores TMDB poster paths in a small SQLite database (WAL mode) keyed by
+``movie_id``, so cached posters survive restarts and are shared by every
+process and replica that mounts the same file.
+
+Movies TMDB has no poster for (404 or an empty ``poster_path``) are cached
+negatively with a shorter TTL. Transient failures such as timeouts are never
+cached. The table is bounded: once it holds more than ``max_entries`` rows, the
+least recently read entries are evicted.
+
+The cache is an optimisation: a locked or corrupt database file is logged and
+counted (``poster_cache_errors``), reads then miss and writes are dropped.
+"""
+
+from typing import Dict, Iterable, Mapping, Optional
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import config
+from telemetry import incr
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posters (
+    movie_id     INTEGER PRIMARY KEY,
+    poster_path  TEXT,
+    fetched_at   REAL NOT NULL,
+    last_access  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posters_last_access ON posters (last_access);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_MAX_PARAMS = 500
+
+
+class PosterCache:
+    """
+    SQLite-backed poster path cache with TTL, negative caching and LRU eviction.
+
+    Connections are opened per thread, so one instance can be shared by the
+    poster fetch pool.
+
+    Attributes:
+        path (str): Database file path.
+        ttl (float): Lifetime of a cached poster path, in seconds.
+        negative_ttl (float): Lifetime of a cached "no poster" entry, in seconds.
+        max_entries (int): Number of rows kept before evicting.
+    """
+
+    def __init__(
+        self,
+        path: str = config.POSTER_CACHE_FILE,
+        ttl: float = config.CACHE_TTL,
+        negative_ttl: float = config.POSTER_NEGATIVE_TTL,
+        max_entries: int = config.POSTER_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            self._connect().executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            self._error(e)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _error(self, e: sqlite3.Error) -> None:
+        # A busy or broken file must not fail a request: callers fall back to TMDB
+        incr("poster_cache_errors")
+        logger.warning(f"Poster cache file {self.path} unavailable: {e}")
+
+    def get_many(self, movie_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """
+        Look up fresh cache entries.
+
+        Args:
+            movie_ids (Iterable[int]): TMDB movie IDs.
+
+        Returns:
+            Dict[int, Optional[str]]: Poster path for each fresh hit; ``None``
+                marks a fresh negative entry. Misses and stale rows are absent,
+                and every movie misses if the database is locked or unreadable.
+        """
+        movie_ids = list(dict.fromkeys(int(movie_id) for movie_id in movie_ids))
+        now = time.time()
+        hits: Dict[int, Optional[str]] = {}
+        try:
+            conn = self._connect()
+            for start in range(0, len(movie_ids), _MAX_PARAMS):
+                chunk = movie_ids[start:start + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT movie_id, poster_path, fetched_at FROM posters "
+                    f"WHERE movie_id IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for movie_id, poster_path, fetched_at in rows:
+                    ttl = self.ttl if poster_path else self.negative_ttl
+                    if now - fetched_at < ttl:
+                        hits[movie_id] = poster_path
+        except sqlite3.Error as e:
+            self._error(e)
+            return {}
+
+        if hits:
+            try:
+                conn.executemany(
+                    "UPDATE posters SET last_access = ? WHERE movie_id = ?",
+                    [(now, movie_id) for movie_id in hits],
+                )
+            except sqlite3.OperationalError as e:
+                # Recency is best-effort; a busy writer must not fail a read
+                logger.debug(f"Could not update poster cache recency: {e}")
+        return hits
+
+    def put_many(self, entries: Mapping[int, Optional[str]]) -> None:
+        """
+        Store fetched poster paths, evicting old rows if the cache is full.
+
+        Nothing is stored if the database is locked or unreadable.
+
+        Args:
+            entries (Mapping[int, Optional[str]]): Poster path per movie id;
+                ``None`` records that TMDB has no poster for the movie.
+        """
+        if not entries:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO posters "
+                    "(movie_id, poster_path, fetched_at, last_access) VALUES (?, ?, ?, ?)",
+                    [(int(movie_id), path, now, now) for movie_id, path in entries.items()],
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM posters").fetchone()
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM posters WHERE movie_id IN ("
+                        "SELECT movie_id FROM posters ORDER BY last_access LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+                    logger.debug(f"Evicted {count - self.max_entries} poster cache entries")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._error(e)
+
+    def __len__(self) -> int:
+        (count,) = self._connect().execute("SELECT COUNT(*) FROM posters").fetchone()
+        return count
@@ -0,0 +1,263 @@
+"""
+TMDB poster fetching for CineMatch.
+
+Resolves the posters for a whole recommendation list at once: requests run
+concurrently on a bounded thread pool over one shared keep-alive
+``requests.Session``, the batch as a whole has a single deadline, and any movie
+whose poster cannot be resolved in time falls back to the placeholder image.
+:func:`iter_poster_paths` hands out each answer as soon as it arrives, so a
+page can show the posters that are ready instead of waiting for the slowest.
+
+Answers are read from and written to an optional persistent
+:class:`~poster_cache.PosterCache`; only movies missing from it hit TMDB. The
+TMDB endpoint is a parameter, so the fetcher can be pointed at a local stub
+server.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as DeadlineExceeded
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from poster_cache import PosterCache
+from telemetry import incr, stage
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide TMDB session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=config.POSTER_MAX_WORKERS,
+            )
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.POSTER_MAX_WORKERS,
+                thread_name_prefix="poster-fetch",
+            )
+        return _executor
+
+
+def poster_url(poster_path: Optional[str]) -> str:
+    """Turn a TMDB ``poster_path`` into an image URL, or the placeholder if None."""
+    if poster_path:
+        return f"{config.IMAGE_BASE_URL}{poster_path}"
+    incr("placeholder_fallbacks")
+    return config.PLACEHOLDER_IMAGE
+
+
+def fetch_poster_path(
+    movie_id: int,
+    api_key: str,
+    base_url: str = config.BASE_URL,
+    timeout: float = config.API_TIMEOUT,
+    session: Optional[requests.Session] = None,
+) -> Optional[str]:
+    """
+    Fetch the poster path of one movie from TMDB.
+
+    Args:
+        movie_id (int): The TMDB movie ID.
+        api_key (str): TMDB API key.
+        base_url (str): Movie details endpoint; the id is appended to it.
+        timeout (float): Request timeout in seconds.
+        session (Optional[requests.Session]): Session to use; defaults to the
+            shared one.
+
+    Returns:
+        Optional[str]: The ``poster_path``, or None if TMDB does not know the
+            movie (404) or has no poster for it.
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails for any
+            other reason (timeouts, connection errors, 5xx, rate limiting).
+    """
+    session = session or get_session()
+    response = session.get(
+        f"{base_url}{movie_id}",
+        params={"api_key": api_key, "language": "en-US"},
+        timeout=timeout,
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json().get("poster_path") or None
+
+
+def _fetch_outcome(
+    movie_id: int,
+    api_key: str,
+    base_url: str,
+    deadline: float,
+    session: Optional[requests.Session],
+) -> Tuple[bool, Optional[str]]:
+    """Return ``(cacheable, poster_path)``; transient failures are not cacheable."""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return False, None
+    incr("tmdb_requests")
+    try:
+        poster_path = fetch_poster_path(
+            movie_id, api_key, base_url,
+            timeout=min(config.API_TIMEOUT, remaining),
+            session=session,
+        )
+        if poster_path:
+            logger.debug(f"Successfully fetched poster for movie ID {movie_id}")
+        else:
+            logger.debug(f"TMDB has no poster for movie ID {movie_id}")
+        return True, poster_path
+    except requests.exceptions.Timeout:
+        incr("tmdb_timeouts")
+        logger.warning(f"Timeout fetching poster for movie ID {movie_id}")
+    except requests.exceptions.HTTPError as e:
+        incr("tmdb_errors")
+        logger.warning(f"HTTP error fetching poster for movie ID {movie_id}: {e}")
+    except Exception as e:
+        incr("tmdb_errors")
+        logger.warning(f"Error fetching poster for movie ID {movie_id}: {e}")
+    return False, None
+
+
+def resolve_poster_paths(
+    movie_ids: Iterable[int],
+    api_key: str,
+    base_url: str = config.BASE_URL,
+    deadline: float = config.POSTER_DEADLINE,
+    session: Optional[requests.Session] = None,
+    cache: Optional[PosterCache] = None,
+) -> Tuple[Dict[int, Optional[str]], List[int]]:
+    """
+    Resolve poster paths for several movies, from the cache or TMDB concurrently.
+
+    Args:
+        movie_ids (Iterable[int]): TMDB movie IDs.
+        api_key (str): TMDB API key.
+        base_url (str): Movie details endpoint; the id is appended to it.
+        deadline (float): Overall time budget for the batch, in seconds.
+        session (Optional[requests.Session]): Session to use; defaults to the
+            shared one.
+        cache (Optional[PosterCache]): Persistent cache consulted before TMDB
+            and updated with every definitive answer.
+
+    Returns:
+        Tuple[Dict[int, Optional[str]], List[int]]: Poster path (or None when
+            TMDB has none) for every movie that was resolved, and the ids that
+            failed transiently or missed the deadline.
+    """
+    with stage("posters"):
+        return _resolve_poster_paths(movie_ids, api_key, base_url, deadline, session, cache)
+
+
+def _resolve_poster_paths(
+    movie_ids: Iterable[int],
+    api_key: str,
+    base_url: str,
+    deadline: float,
+    session: Optional[requests.Session],
+    cache: Optional[PosterCache],
+) -> Tuple[Dict[int, Optional[str]], List[int]]:
+    paths: Dict[int, Optional[str]] = {}
+    failed: List[int] = []
+    for movie_id, poster_path, resolved in iter_poster_paths(
+        movie_ids, api_key, base_url, deadline, session, cache
+    ):
+        if resolved:
+            paths[movie_id] = poster_path
+        else:
+            failed.append(movie_id)
+    return paths, failed
+
+
+def iter_poster_paths(
+    movie_ids: Iterable[int],
+    api_key: str,
+    base_url: str = config.BASE_URL,
+    deadline: float = config.POSTER_DEADLINE,
+    session: Optional[requests.Session] = None,
+    cache: Optional[PosterCache] = None,
+) -> Iterator[Tuple[int, Optional[str], bool]]:
+    """
+    Resolve poster paths for several movies, yielding each one as it arrives.
+
+    Cached movies come first, in input order, then TMDB answers in the order
+    they complete. Once the deadline has passed, every fetch still pending is
+    cancelled and yielded as unresolved. Definitive answers are written to the
+    cache when the iteration ends.
+
+    Args:
+        movie_ids (Iterable[int]): TMDB movie IDs.
+        api_key (str): TMDB API key.
+        base_url (str): Movie details endpoint; the id is appended to it.
+        deadline (float): Overall time budget for the batch, in seconds,
+            counted from the first ``next()``.
+        session (Optional[requests.Session]): Session to use; defaults to the
+            shared one.
+        cache (Optional[PosterCache]): Persistent cache consulted before TMDB
+            and updated with every definitive answer.
+
+    Yields:
+        Tuple[int, Optional[str], bool]: The movie id, its poster path (None
+            when TMDB has none or it was not resolved), and whether it was
+            resolved, as opposed to failing transiently or missing the deadline.
+    """
+    movie_ids = list(dict.fromkeys(int(movie_id) for movie_id in movie_ids))
+    cached: Dict[int, Optional[str]] = cache.get_many(movie_ids) if cache is not None else {}
+    missing = [movie_id for movie_id in movie_ids if movie_id not in cached]
+    incr("poster_cache_hits", len(cached))
+    incr("poster_cache_misses", len(missing))
+    for movie_id in movie_ids:
+        if movie_id in cached:
+            yield movie_id, cached[movie_id], True
+    if not missing:
+        return
+
+    expires = time.monotonic() + deadline
+    executor = _get_executor()
+    futures: Dict[Future, int] = {
+        executor.submit(_fetch_outcome, movie_id, api_key, base_url, expires, session): movie_id
+        for movie_id in missing
+    }
+    pending = set(futures)
+    fetched: Dict[int, Optional[str]] = {}
+    try:
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                pending.discard(future)
+                cacheable, poster_path = future.result()
+                if cacheable:
+                    fetched[futures[future]] = poster_path
+                yield futures[future], poster_path, cacheable
+        except DeadlineExceeded:
+            for future in pending:
+                future.cancel()
+            incr("tmdb_deadline_misses", len(pending))
+            logger.warning(f"{len(pending)} poster fetches missed the {deadline}s deadline")
+            for future in [f for f in futures if f in pending]:
+                yield futures[future], None, False
+    finally:
+        if cache is not None and fetched:
+            cache.put_many(fetched)
@@ -0,0 +1,155 @@
+"""
+Bulk poster prefetch for CineMatch.
+
+Walks every movie in ``movie_list.pkl`` and stores its TMDB poster path in the
+persistent poster cache, so the app can render recommendations for known movies
+without any TMDB request.
+
+Requests run in rate-limited parallel batches and every batch is committed to
+the cache as it completes, so an interrupted run simply resumes where it
+stopped. Movies with a fresh cache entry are skipped; ``--max-age`` controls how
+old an entry may be before it is refreshed.
+
+Usage:
+    TMDB_API_KEY=... python prefetch_posters.py --rate 40
+"""
+
+from typing import List
+import argparse
+import logging
+import math
+import os
+import pickle
+import sys
+import time
+
+import config
+from poster_cache import PosterCache
+from posters import resolve_poster_paths
+
+logger = logging.getLogger(__name__)
+
+
+def load_movie_ids(path: str) -> List[int]:
+    """
+    Read the distinct TMDB ids of every movie in the pickled movie list.
+
+    Args:
+        path (str): Path to ``movie_list.pkl``.
+
+    Returns:
+        List[int]: Distinct movie ids, in catalog order.
+    """
+    with open(path, "rb") as f:
+        movies = pickle.load(f)
+    return list(dict.fromkeys(int(movie_id) for movie_id in movies["movie_id"]))
+
+
+def prefetch(
+    movie_ids: List[int],
+    api_key: str,
+    cache: PosterCache,
+    base_url: str = config.BASE_URL,
+    batch_size: int = config.PREFETCH_BATCH_SIZE,
+    rate: float = config.PREFETCH_RATE,
+) -> List[int]:
+    """
+    Fetch and cache the posters of every movie without a fresh cache entry.
+
+    Args:
+        movie_ids (List[int]): TMDB movie IDs to warm.
+        api_key (str): TMDB API key.
+        cache (PosterCache): Cache to fill; its TTLs decide what is stale.
+        base_url (str): Movie details endpoint; the id is appended to it.
+        batch_size (int): Movies fetched concurrently per batch.
+        rate (float): Maximum TMDB requests per second.
+
+    Returns:
+        List[int]: Movie ids that could not be fetched.
+    """
+    fresh = cache.get_many(movie_ids)
+    todo = [movie_id for movie_id in movie_ids if movie_id not in fresh]
+    logger.info(
+        f"{len(fresh)} of {len(movie_ids)} movies already cached, fetching {len(todo)}"
+    )
+
+    # Enough time for every request of a batch to use its full timeout
+    deadline = config.API_TIMEOUT * math.ceil(batch_size / config.POSTER_MAX_WORKERS) + 1
+    started = time.monotonic()
+    fetched = with_poster = 0
+    failed: List[int] = []
+
+    for start in range(0, len(todo), batch_size):
+        batch = todo[start:start + batch_size]
+        batch_started = time.monotonic()
+
+        paths, batch_failed = resolve_poster_paths(
+            batch, api_key, base_url, deadline=deadline, cache=cache
+        )
+        failed.extend(batch_failed)
+        fetched += len(batch) - len(batch_failed)
+        with_poster += sum(1 for movie_id in batch if paths.get(movie_id))
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"{start + len(batch)}/{len(todo)} processed, {len(failed)} failed, "
+            f"{(start + len(batch)) / elapsed:.1f} movies/s"
+        )
+
+        # Pace batches so the average request rate stays under the limit
+        min_duration = len(batch) / rate
+        batch_elapsed = time.monotonic() - batch_started
+        if batch_elapsed < min_duration:
+            time.sleep(min_duration - batch_elapsed)
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Done in {elapsed:.1f}s: {fetched} fetched ({with_poster} with a poster, "
+        f"{fetched - with_poster} without), {len(failed)} failed, "
+        f"{len(todo) / elapsed if elapsed else 0:.1f} movies/s"
+    )
+    return failed
+
+
+def main() -> None:
+    """Warm the poster cache for the whole catalog."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--movies", default=config.MOVIE_LIST_FILE)
+    parser.add_argument("--cache", default=config.POSTER_CACHE_FILE)
+    parser.add_argument("--api-key", default=os.environ.get("TMDB_API_KEY"))
+    parser.add_argument("--base-url", default=config.BASE_URL)
+    parser.add_argument("--batch-size", type=int, default=config.PREFETCH_BATCH_SIZE)
+    parser.add_argument("--rate", type=float, default=config.PREFETCH_RATE,
+                        help="maximum TMDB requests per second")
+    parser.add_argument("--max-age", type=float, default=config.CACHE_TTL,
+                        help="refresh cache entries older than this many seconds")
+    parser.add_argument("--failures", help="write ids that could not be fetched here")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    if not args.api_key:
+        sys.exit("Set TMDB_API_KEY or pass --api-key.")
+
+    cache = PosterCache(
+        args.cache,
+        ttl=args.max_age,
+        negative_ttl=min(args.max_age, config.POSTER_NEGATIVE_TTL),
+    )
+    failed = prefetch(
+        load_movie_ids(args.movies), args.api_key, cache,
+        base_url=args.base_url, batch_size=args.batch_size, rate=args.rate,
+    )
+
+    if args.failures:
+        with open(args.failures, "w") as f:
+            f.writelines(f"{movie_id}\n" for movie_id in failed)
+    if failed:
+        logger.warning(f"{len(failed)} movies failed; re-run to retry them")
+
+
+if __name__ == "__main__":
+    main()
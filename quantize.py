@@ -0,0 +1,269 @@
+"""
+Low-precision storage of score and embedding matrices for CineMatch.
+
+Neighbor scores and ANN embeddings are only ever ranked, so they do not need
+float32. A matrix can be stored in one of three precisions:
+
+* ``"float32"``: as is;
+* ``"float16"``: half the size, about three significant digits;
+* ``"uint8"``: a quarter of the size. Each row keeps a float32 ``scale`` and
+  ``offset`` and its values are rounded to 256 evenly spaced levels between the
+  row's minimum and maximum (``value ≈ code * scale + offset``).
+
+Quantisation is monotone within a row, so the order of a row's own entries
+never changes; what can drift is anything that compares or combines rows
+(blended scores, ANN dot products). :func:`ranking_recall` measures that drift,
+and ``build_index.py`` refuses to publish artifacts that lose too much.
+
+:class:`QuantizedMatrix` wraps the stored arrays (usually memory-mapped) and
+decodes only the entries that are indexed, so callers use it like the float32
+array it replaces.
+"""
+
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+PRECISIONS: Tuple[str, ...] = ("float32", "float16", "uint8")
+
+# uint8 codes span 0..255
+_LEVELS = 255
+
+
+class QuantizationDriftError(ValueError):
+    """Raised when quantised artifacts rank too differently from full precision."""
+
+
+def _check_precision(precision: str) -> None:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}' (expected one of {', '.join(PRECISIONS)})")
+
+
+def quantize_rows(
+    matrix: np.ndarray,
+    precision: str,
+) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Encode the rows of a 2-D matrix in a storage precision.
+
+    Args:
+        matrix (np.ndarray): Finite values, shape ``(R, D)``.
+        precision (str): One of :data:`PRECISIONS`.
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]: The
+            stored values (or codes), and the per-row scale and offset for
+            ``"uint8"`` (None otherwise).
+
+    Raises:
+        ValueError: If ``precision`` is unknown.
+    """
+    _check_precision(precision)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if precision != "uint8":
+        return matrix.astype(precision, copy=False), None, None
+
+    low = matrix.min(axis=1)
+    scale = (matrix.max(axis=1) - low) / _LEVELS
+    # Constant rows decode to their offset whatever the scale
+    scale[scale == 0] = 1.0
+    codes = np.rint((matrix - low[:, None]) / scale[:, None])
+    return np.clip(codes, 0, _LEVELS).astype(np.uint8), scale, low
+
+
+def _plain(array: np.ndarray) -> np.ndarray:
+    return array.view(np.ndarray) if isinstance(array, np.memmap) else array
+
+
+class QuantizedMatrix:
+    """
+    float32 view of a matrix stored as float16 values or uint8 codes.
+
+    Indexing decodes just the selected entries, so ``m[rows]``,
+    ``m[row, :n]`` and ``m[start:stop, -1]`` return what the float32 array
+    would (up to rounding). Over writable arrays, whole rows can be assigned
+    (``m[start:stop] = block``); they are re-encoded on the way in.
+
+    Attributes:
+        codes (np.ndarray): float16 values or uint8 codes, shape ``(N, D)``.
+        scale (Optional[np.ndarray]): Per-row float32 step between uint8 levels.
+        offset (Optional[np.ndarray]): Per-row float32 value of code 0.
+    """
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        scale: Optional[np.ndarray] = None,
+        offset: Optional[np.ndarray] = None,
+    ) -> None:
+        # Plain views of the (usually memory-mapped) arrays: slicing an
+        # np.memmap costs microseconds of subclass bookkeeping per access
+        self.codes = _plain(codes)
+        self.scale = None if scale is None else _plain(scale)
+        self.offset = None if offset is None else _plain(offset)
+
+    @property
+    def precision(self) -> str:
+        return "uint8" if self.scale is not None else str(self.codes.dtype)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.codes.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes actually stored, including per-row scales and offsets."""
+        extra = 0 if self.scale is None else self.scale.nbytes + self.offset.nbytes
+        return self.codes.nbytes + extra
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        codes = self.codes[key]
+        if self.scale is None:
+            return codes.astype(np.float32)
+        rows = key[0] if isinstance(key, tuple) else key
+        scale, offset = self.scale[rows], self.offset[rows]
+        # Several rows with their columns: broadcast each row's scale over its columns
+        if codes.ndim > scale.ndim > 0:
+            scale, offset = scale[:, None], offset[:, None]
+        return codes * scale + offset
+
+    def __setitem__(self, rows: Any, values: np.ndarray) -> None:
+        if isinstance(rows, tuple):
+            raise TypeError("Quantized rows are re-scaled as a whole; assign complete rows")
+        if isinstance(rows, (int, np.integer)):
+            rows = [rows]
+        codes, scale, offset = quantize_rows(np.atleast_2d(values), self.precision)
+        self.codes[rows] = codes
+        if self.scale is not None:
+            self.scale[rows] = scale
+            self.offset[rows] = offset
+
+    def __array__(self, dtype: Any = None) -> np.ndarray:
+        values = self[:]
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+    def dot(self, rows: np.ndarray, vector: np.ndarray) -> np.ndarray:
+        """
+        ``self[rows] @ vector`` without decoding the rows first.
+
+        With uint8 codes, ``(code * scale + offset) · v`` is computed as
+        ``scale * (code · v) + offset * sum(v)``, so the scan costs one
+        matrix-vector product over the codes.
+
+        Args:
+            rows (np.ndarray): Row positions to score.
+            vector (np.ndarray): float32 vector of length ``D``.
+
+        Returns:
+            np.ndarray: One float32 dot product per row.
+        """
+        products = self.codes[rows].astype(np.float32) @ vector
+        if self.scale is None:
+            return products
+        return products * self.scale[rows] + self.offset[rows] * np.float32(vector.sum())
+
+
+Matrix = Union[np.ndarray, QuantizedMatrix]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Persistence
+# ─────────────────────────────────────────────────────────────────────────────
+
+def matrix_specs(name: str, shape: Tuple[int, int], precision: str) -> Dict[str, Tuple[Any, Tuple[int, ...]]]:
+    """
+    Array specs of a matrix for a :class:`~artifact_store.StoreWriter`.
+
+    Args:
+        name (str): Array name of the values; uint8 adds ``<name>.scale`` and
+            ``<name>.offset``.
+        shape (Tuple[int, int]): Matrix shape.
+        precision (str): One of :data:`PRECISIONS`.
+
+    Returns:
+        Dict[str, Tuple[Any, Tuple[int, ...]]]: ``(dtype, shape)`` per array.
+    """
+    _check_precision(precision)
+    specs = {name: (np.dtype(precision), tuple(shape))}
+    if precision == "uint8":
+        specs[f"{name}.scale"] = (np.float32, (shape[0],))
+        specs[f"{name}.offset"] = (np.float32, (shape[0],))
+    return specs
+
+
+def pack_matrix(name: str, matrix: Matrix, precision: str) -> Dict[str, np.ndarray]:
+    """
+    Encode a matrix into the arrays described by :func:`matrix_specs`.
+
+    Args:
+        name (str): Array name of the values.
+        matrix (Matrix): Matrix to store.
+        precision (str): One of :data:`PRECISIONS`.
+
+    Returns:
+        Dict[str, np.ndarray]: Arrays to write.
+    """
+    codes, scale, offset = quantize_rows(np.asarray(matrix), precision)
+    if scale is None:
+        return {name: codes}
+    return {name: codes, f"{name}.scale": scale, f"{name}.offset": offset}
+
+
+def open_matrix(arrays: Any, name: str, precision: Optional[str] = None) -> Matrix:
+    """
+    Access a matrix stored by :func:`pack_matrix` or :func:`matrix_specs`.
+
+    Args:
+        arrays (Any): An :class:`~artifact_store.ArtifactStore`, or a
+            :class:`~artifact_store.StoreWriter` being filled.
+        name (str): Array name of the values.
+        precision (Optional[str]): Stored precision; detected from the store
+            when omitted (required for a writer).
+
+    Returns:
+        Matrix: The float32 array itself, or a :class:`QuantizedMatrix` over
+            the stored arrays.
+    """
+    if precision is None:
+        precision = "uint8" if f"{name}.scale" in arrays else str(arrays[name].dtype)
+    if precision == "float32":
+        return arrays[name]
+    if precision == "uint8":
+        return QuantizedMatrix(arrays[name], arrays[f"{name}.scale"], arrays[f"{name}.offset"])
+    return QuantizedMatrix(arrays[name])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Accuracy
+# ─────────────────────────────────────────────────────────────────────────────
+
+def ranking_recall(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """
+    Mean share of each reference top-K list that a candidate list recovers.
+
+    Order within the lists is ignored (top-K overlap); padding ids (``-1``)
+    never match.
+
+    Args:
+        reference (np.ndarray): Reference ids, shape ``(Q, K)``.
+        candidate (np.ndarray): Candidate ids, shape ``(Q, K')``.
+
+    Returns:
+        float: Recall in ``[0, 1]`` (1.0 for no queries).
+    """
+    reference = np.asarray(reference, dtype=np.int64)
+    candidate = np.asarray(candidate, dtype=np.int64)
+    if not reference.size:
+        return 1.0
+    # One key per (query, id) pair, so a single isin compares every list at once
+    width = int(max(reference.max(), candidate.max(initial=0))) + 2
+    queries = np.arange(len(reference))[:, None] * width
+    found = np.isin(reference + 1 + queries, candidate + 1 + queries) & (reference >= 0)
+    return float(found.sum() / max((reference >= 0).sum(), 1))
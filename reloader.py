@@ -0,0 +1,158 @@
+"""
+Hot reload of CineMatch artifacts.
+
+:class:`EngineReloader` owns the :class:`engine.RecommendationEngine` of a
+process and watches the artifact manifest (or, for the legacy layout, the
+artifact files) for changes. When a new version is published it is loaded on
+a background thread while the old engine keeps serving, then swapped in with a
+single reference assignment:
+
+* callers take ``reloader.current`` once per request, so in-flight requests
+  finish on the engine they started with;
+* the old engine's memory maps are released as soon as the last such request
+  drops its reference;
+* a version that fails to load is logged and skipped, and the old engine stays.
+
+Usage:
+    reloader = EngineReloader()
+    reloader.start()
+    engine = reloader.current
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import gc
+import logging
+import os
+import threading
+import time
+import weakref
+
+import config
+from engine import ArtifactLoadError, RecommendationEngine
+from manifest import artifact_paths
+
+logger = logging.getLogger(__name__)
+
+
+class EngineReloader:
+    """
+    Serve the current artifact version and swap in new ones as they appear.
+
+    Args:
+        root (str): Artifact root directory.
+        interval (float): Seconds between checks of the manifest.
+
+    Raises:
+        ArtifactLoadError: If the initial version cannot be loaded.
+    """
+
+    def __init__(self, root: str = config.ARTIFACT_DIR, interval: float = config.RELOAD_INTERVAL) -> None:
+        self.root = root
+        self.interval = interval
+        self.reloads = 0
+        self.reload_failures = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failed: Optional[Tuple] = None
+
+        self._signature = self._current_signature()
+        self._engine = RecommendationEngine.from_artifacts(root)
+        self.loaded_at = time.time()
+
+    @property
+    def current(self) -> RecommendationEngine:
+        """The engine serving new requests; hold on to it for a whole request."""
+        return self._engine
+
+    def _current_signature(self) -> Tuple:
+        """Cheap change detector: (path, mtime, size) of the watched files."""
+        manifest = os.path.join(self.root, config.MANIFEST_FILE)
+        if os.path.exists(manifest):
+            watched = (manifest,)
+        else:
+            paths = artifact_paths(self.root)
+            watched = (paths["movies"], paths["index"])
+        signature = []
+        for path in watched:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def check(self) -> bool:
+        """
+        Load and swap in a new artifact version if one was published.
+
+        Returns:
+            bool: True if a new engine was swapped in.
+        """
+        with self._lock:
+            signature = self._current_signature()
+            if signature in (self._signature, self._failed):
+                return False
+
+            # A touched manifest that still points at the same version is no change
+            version = artifact_paths(self.root)["version"]
+            if version == self._engine.version:
+                self._signature = signature
+                return False
+
+            started = time.perf_counter()
+            try:
+                engine = RecommendationEngine.from_artifacts(self.root)
+            except ArtifactLoadError as e:
+                self.reload_failures += 1
+                self._failed = signature
+                logger.error(f"Keeping version {self._engine.version}; reload failed: {e}")
+                return False
+
+            old, self._engine = self._engine, engine
+            self._signature = signature
+            self._failed = None
+            self.reloads += 1
+            self.loaded_at = time.time()
+
+        weakref.finalize(old, logger.info, f"Released artifact version {old.version}")
+        logger.info(
+            f"Swapped artifact version {old.version} -> {engine.version} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        del old
+        # Break reference cycles so the old memory maps are unmapped promptly
+        gc.collect()
+        return True
+
+    def start(self) -> "EngineReloader":
+        """Start checking for new versions on a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="artifact-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Artifact reload check failed: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """Which version this process serves, and reload counters."""
+        return {
+            "version": self._engine.version,
+            "pid": os.getpid(),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.loaded_at)),
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+        }
@@ -0,0 +1,262 @@
+"""
+Hybrid re-ranking of recommendation candidates for CineMatch.
+
+Bag-of-words similarity alone happily recommends obscure near-duplicates of the
+seed movie. After retrieval, the top-M similar candidates are therefore
+re-scored with a weighted blend of their similarity and three per-movie priors,
+each scaled to ``[0, 1]`` once per catalog from its numeric fields (see
+:meth:`catalog.MovieCatalog.field`):
+
+* ``popularity``: ``log1p`` of TMDB popularity over the catalog maximum;
+* ``rating``: ``vote_average`` shrunk towards the catalog mean by
+  ``vote_count`` (a Bayesian average, so a 10/10 from three votes does not
+  outrank an 8/10 from thousands), over 10;
+* ``recency``: halves every ``RERANK_RECENCY_HALF_LIFE`` years before the
+  newest release in the catalog (not the wall clock, so cached results stay
+  valid).
+
+Similarity is taken relative to the best candidate, so the weights compare
+like with like whatever the absolute cosine range of a query. Catalogs without
+a field get a zero prior for it.
+
+Diversity is then enforced with maximal marginal relevance (MMR) over the
+candidates' vectors: each pick maximises ``(1 - d) * relevance - d * (highest
+similarity to a movie already picked)``, and that marginal score is the score
+reported for it.
+
+Everything is vectorised over the candidates: one gather of their features,
+one matrix-vector product, and per pick one product against the candidate
+vectors. Candidates too far below the ``k``-th best to ever be picked by MMR
+are dropped before their vectors are read (:func:`mmr_pool`).
+"""
+
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+import config
+
+FEATURES: Tuple[str, ...] = ("popularity", "rating", "recency")
+
+
+class RerankWeights(NamedTuple):
+    """
+    Weights of the re-ranking blend.
+
+    Attributes:
+        similarity (float): Weight of the similarity to the query, relative
+            to the best candidate.
+        popularity (float): Weight of the popularity prior.
+        rating (float): Weight of the rating prior.
+        recency (float): Weight of the recency prior.
+        diversity (float): MMR trade-off in ``[0, 1]``; 0 ranks by the blend alone.
+        candidates (int): Similar movies retrieved and re-scored per query.
+    """
+
+    similarity: float = config.RERANK_SIMILARITY_WEIGHT
+    popularity: float = config.RERANK_POPULARITY_WEIGHT
+    rating: float = config.RERANK_RATING_WEIGHT
+    recency: float = config.RERANK_RECENCY_WEIGHT
+    diversity: float = config.RERANK_DIVERSITY
+    candidates: int = config.RERANK_CANDIDATES
+
+    @property
+    def signature(self) -> str:
+        """Compact description of the weights, for result cache keys."""
+        return ",".join(f"{name}={value:g}" for name, value in self._asdict().items())
+
+
+def ranking_features(
+    catalog: Any,
+    min_votes: float = config.RERANK_MIN_VOTES,
+    half_life: float = config.RERANK_RECENCY_HALF_LIFE,
+) -> np.ndarray:
+    """
+    Scale a catalog's numeric fields into the :data:`FEATURES` priors.
+
+    Args:
+        catalog (Any): A :class:`~catalog.MovieCatalog`.
+        min_votes (float): Votes at which a movie's own rating and the
+            catalog mean count equally.
+        half_life (float): Years over which the recency prior halves.
+
+    Returns:
+        np.ndarray: float32 priors in ``[0, 1]``, shape ``(N, len(FEATURES))``.
+    """
+    def field(name: str) -> Optional[np.ndarray]:
+        if name not in catalog.fields:
+            return None
+        return np.nan_to_num(np.asarray(catalog.field(name), dtype=np.float64))
+
+    features = np.zeros((len(catalog), len(FEATURES)), dtype=np.float32)
+
+    popularity = field("popularity")
+    if popularity is not None and popularity.max(initial=0) > 0:
+        popularity = np.log1p(np.maximum(popularity, 0))
+        features[:, 0] = popularity / popularity.max()
+
+    votes, average = field("vote_count"), field("vote_average")
+    if votes is not None and average is not None and votes.sum() > 0:
+        votes = np.maximum(votes, 0)
+        mean = float((average * votes).sum() / votes.sum())
+        features[:, 1] = np.clip((votes * average + min_votes * mean) / (votes + min_votes) / 10, 0, 1)
+
+    year = field("release_year")
+    if year is not None and (year > 0).any():
+        age = year[year > 0].max() - year
+        features[:, 2] = np.where(year > 0, np.exp2(-age / half_life), 0)
+    return features
+
+
+def mmr_pool(relevance: np.ndarray, k: int, diversity: float) -> np.ndarray:
+    """
+    Candidates that MMR could still pick.
+
+    Similarities of unit vectors are at most 1, so every pick's marginal gain
+    is at least the ``k``-th best gain minus ``diversity``, while no
+    candidate's marginal gain exceeds its own gain. Candidates below that
+    bound can never be picked and need not be compared.
+
+    Args:
+        relevance (np.ndarray): Score of every candidate, shape ``(M,)``.
+        k (int): Number of candidates to pick.
+        diversity (float): Trade-off in ``[0, 1]``.
+
+    Returns:
+        np.ndarray: Positions of the candidates worth comparing, ascending.
+    """
+    gain = (1 - diversity) * relevance
+    if k >= len(gain):
+        return np.arange(len(gain))
+    kth = np.partition(gain, len(gain) - k)[len(gain) - k]
+    return np.flatnonzero(gain >= kth - diversity)
+
+
+def mmr(
+    relevance: np.ndarray,
+    similarity: Optional[Callable[[int], np.ndarray]],
+    k: int,
+    diversity: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pick ``k`` candidates by maximal marginal relevance.
+
+    Args:
+        relevance (np.ndarray): Score of every candidate, shape ``(M,)``.
+        similarity (Optional[Callable[[int], np.ndarray]]): Similarity of
+            candidate ``j`` to every candidate, shape ``(M,)``; unused without
+            diversity.
+        k (int): Number of candidates to pick.
+        diversity (float): Trade-off in ``[0, 1]``; 0 ranks by relevance alone.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Positions of the picked candidates, in
+            pick order, and the marginal score each was picked with. The
+            scores never increase along the picks.
+    """
+    k = min(k, len(relevance))
+    if diversity <= 0 or k <= 1:
+        picked = np.argsort(-relevance, kind="stable")[:k]
+        return picked, relevance[picked]
+
+    gain = (1 - diversity) * relevance
+    closest = np.zeros(len(relevance), dtype=np.float32)
+    picked = np.empty(k, dtype=np.int64)
+    marginal = np.empty(k, dtype=np.float32)
+    for i in range(k):
+        objective = gain - diversity * closest
+        j = int(np.argmax(objective))
+        picked[i], marginal[i] = j, objective[j]
+        np.maximum(closest, similarity(j), out=closest)
+        # Never pick the same candidate twice
+        closest[j] = np.inf
+    return picked, marginal
+
+
+def _dense_similarity(vectors: Any, rows: np.ndarray) -> Callable[[int], np.ndarray]:
+    candidates = np.ascontiguousarray(vectors[rows], dtype=np.float32)
+    return lambda j: candidates @ candidates[j]
+
+
+def _sparse_similarity(vectors: sp.csr_matrix, rows: np.ndarray) -> Callable[[int], np.ndarray]:
+    candidates = vectors[rows]
+    dense = np.zeros(vectors.shape[1], dtype=np.float32)
+
+    def similarity(j: int) -> np.ndarray:
+        # Scatter the picked row into a dense vector: a sparse-dense product
+        # is several times cheaper than a sparse-sparse one
+        start, end = candidates.indptr[j], candidates.indptr[j + 1]
+        columns = candidates.indices[start:end]
+        dense[columns] = candidates.data[start:end]
+        sims = candidates @ dense
+        dense[columns] = 0
+        return sims
+
+    return similarity
+
+
+class Reranker:
+    """
+    Re-score retrieved candidates with popularity, rating and recency priors
+    and diversify them with MMR.
+
+    Args:
+        features (np.ndarray): Output of :func:`ranking_features`.
+        vectors (Optional[Any]): Unit-length movie vectors used for diversity:
+            sparse rows, or dense embeddings (an array or
+            :class:`~quantize.QuantizedMatrix`). Without them, diversity is
+            skipped.
+        weights (RerankWeights): Blend weights.
+    """
+
+    def __init__(
+        self,
+        features: np.ndarray,
+        vectors: Optional[Any] = None,
+        weights: RerankWeights = RerankWeights(),
+    ) -> None:
+        self.features = features
+        self.vectors = vectors
+        self.weights = weights
+        self._priors = np.array(
+            [weights.popularity, weights.rating, weights.recency], dtype=np.float32
+        )
+
+    def rerank(self, rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Re-rank retrieved candidates and keep the best ``k``.
+
+        Args:
+            rows (np.ndarray): Candidate row positions, best-first by similarity.
+            scores (np.ndarray): Their similarity to the query.
+            k (int): Number of results.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row positions, best first, and the
+                score that ranked each: the blend of similarity and priors,
+                less ``diversity`` times its similarity to the results above
+                it, so the scores descend. Without diversity it is the blend
+                itself.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float32)
+        if not len(rows):
+            return rows, scores
+
+        best = float(scores.max())
+        relevance = self.weights.similarity * (scores / best if best > 0 else scores)
+        relevance += self.features[rows] @ self._priors
+
+        diversity = self.weights.diversity if self.vectors is not None else 0.0
+        if diversity <= 0 or k <= 1:
+            picked, marginal = mmr(relevance, None, k, 0.0)
+        else:
+            pool = mmr_pool(relevance, k, diversity)
+            similarity = (_sparse_similarity if sp.issparse(self.vectors) else _dense_similarity)(
+                self.vectors, rows[pool]
+            )
+            picked, marginal = mmr(relevance[pool], similarity, k, diversity)
+            picked = pool[picked]
+        return rows[picked], marginal
+
@@ -0,0 +1,314 @@
+"""
+Two-level cache of recommendation responses for CineMatch.
+
+Popular seeds are asked for over and over. :class:`ResultCache` keeps their
+fully materialised responses (titles, scores, poster URLs), so a repeat costs a
+dictionary lookup instead of a neighbor query, a catalog take and poster
+lookups:
+
+* level 1 is an in-process LRU bounded by ``max_entries``;
+* level 2 is an optional SQLite file (WAL mode, like :mod:`poster_cache`)
+  shared by every process and replica that mounts it, bounded by
+  ``disk_max_entries`` and evicted least recently read first.
+
+Keys carry the artifact version (see :func:`result_key`). The first time a
+process sees a new version, it empties level 1 and deletes level-2 rows of
+other versions; requests still pinned to a retired version bypass the cache.
+:meth:`ResultCache.stats` reports hit, miss and eviction counters for sizing
+the cache from real traffic.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key          TEXT PRIMARY KEY,
+    namespace    TEXT NOT NULL,
+    version      TEXT NOT NULL,
+    value        TEXT NOT NULL,
+    created_at   REAL NOT NULL,
+    last_access  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+CREATE INDEX IF NOT EXISTS results_version ON results (namespace, version);
+"""
+
+ResultKey = Tuple[Any, ...]
+
+
+def result_key(
+    version: str,
+    seed_ids: Iterable[int],
+    k: int,
+    mode: str,
+    aggregate: Optional[str] = None,
+    weights: Optional[Sequence[float]] = None,
+    rerank: Optional[str] = None,
+) -> ResultKey:
+    """
+    Cache key of one recommendation query.
+
+    Seeds are identified by TMDB id, so every label or spelling of a movie
+    shares one entry.
+
+    Args:
+        version (str): Artifact version answering the query.
+        seed_ids (Iterable[int]): TMDB ids of the seed movies, in query order.
+        k (int): Number of recommendations.
+        mode (str): ``"exact"`` or ``"approx"``.
+        aggregate (Optional[str]): Blend aggregation; None for single-seed queries.
+        weights (Optional[Sequence[float]]): Blend weights, if any.
+        rerank (Optional[str]): Signature of the re-ranking weights
+            (:attr:`rerank.RerankWeights.signature`), or None if not re-ranked.
+
+    Returns:
+        ResultKey: A hashable, JSON-serialisable key.
+    """
+    return (
+        version,
+        tuple(int(seed_id) for seed_id in seed_ids),
+        int(k),
+        mode,
+        aggregate,
+        None if weights is None else tuple(float(weight) for weight in weights),
+        rerank,
+    )
+
+
+class ResultCache:
+    """
+    In-process LRU of responses in front of an optional shared SQLite tier.
+
+    Values must be JSON-serialisable when the SQLite tier is used, and are
+    returned as stored: callers must not mutate them.
+
+    Attributes:
+        max_entries (int): Responses kept in process memory (0 disables level 1).
+        path (Optional[str]): SQLite file of the shared tier, or None.
+        disk_max_entries (int): Rows kept in the shared tier before evicting.
+        ttl (float): Lifetime of a response, in seconds; bounds how stale the
+            poster URLs inside it can get.
+        namespace (str): Prefix keeping the responses of different callers
+            (app, API) apart in a shared file.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = config.RESULT_CACHE_MAX_ENTRIES,
+        path: Optional[str] = None,
+        disk_max_entries: int = config.RESULT_CACHE_DISK_MAX_ENTRIES,
+        ttl: float = config.CACHE_TTL,
+        namespace: str = "",
+    ) -> None:
+        self.max_entries = max_entries
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+        self.ttl = ttl
+        self.namespace = namespace
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._entries: "OrderedDict[ResultKey, Tuple[float, Any]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._retired: Set[str] = set()
+        self._counters = dict.fromkeys(
+            ("hits", "disk_hits", "misses", "bypassed", "evictions", "disk_evictions",
+             "invalidations", "disk_errors"),
+            0,
+        )
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            try:
+                self._connect().executescript(_SCHEMA)
+            except sqlite3.Error as e:
+                # Serve from level 1 alone rather than failing the app or API at startup
+                self._disk_error(e)
+                self.path = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _disk_key(self, key: ResultKey) -> str:
+        return json.dumps([self.namespace, *key], separators=(",", ":"))
+
+    def _admit(self, version: str) -> bool:
+        """
+        Track the current artifact version; False if ``version`` is retired.
+
+        The first key of a new version empties level 1 and purges level 2 of
+        other versions, so entries never outlive the artifacts they came from.
+        """
+        with self._lock:
+            if version == self._version:
+                return True
+            if version in self._retired:
+                return False
+            if self._version is not None:
+                self._retired.add(self._version)
+                self._counters["invalidations"] += len(self._entries)
+                self._entries.clear()
+                logger.info(f"Result cache moved from version {self._version} to {version}")
+            self._version = version
+
+        if self.path:
+            try:
+                deleted = self._connect().execute(
+                    "DELETE FROM results WHERE namespace = ? AND version != ?",
+                    (self.namespace, version),
+                ).rowcount
+            except sqlite3.Error as e:
+                self._disk_error(e)
+            else:
+                with self._lock:
+                    self._counters["invalidations"] += deleted
+        return True
+
+    def _disk_error(self, e: sqlite3.Error) -> None:
+        # The shared tier is an optimisation; a busy or broken file must not fail a request
+        with self._lock:
+            self._counters["disk_errors"] += 1
+        logger.warning(f"Result cache file {self.path} unavailable: {e}")
+
+    def get(self, key: ResultKey) -> Optional[Any]:
+        """
+        Look up a fresh response, in memory first, then in the shared tier.
+
+        Args:
+            key (ResultKey): Key from :func:`result_key`.
+
+        Returns:
+            Optional[Any]: The cached response, or None on a miss.
+        """
+        if not self._admit(key[0]):
+            with self._lock:
+                self._counters["bypassed"] += 1
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[1]
+
+        value = self._disk_get(key, now) if self.path else None
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+        self._remember(key, value[0], value[1])
+        return value[1]
+
+    def _disk_get(self, key: ResultKey, now: float) -> Optional[Tuple[float, Any]]:
+        disk_key = self._disk_key(key)
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (disk_key,)
+            ).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                return None
+            try:
+                conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, disk_key))
+            except sqlite3.OperationalError as e:
+                # Recency is best-effort; a busy writer must not fail a read
+                logger.debug(f"Could not update result cache recency: {e}")
+        except sqlite3.Error as e:
+            self._disk_error(e)
+            return None
+        return row[1], json.loads(row[0])
+
+    def put(self, key: ResultKey, value: Any) -> None:
+        """
+        Store a response in both tiers, evicting the least recently used.
+
+        Args:
+            key (ResultKey): Key from :func:`result_key`.
+            value (Any): The materialised response.
+        """
+        if not self._admit(key[0]):
+            return
+        now = time.time()
+        self._remember(key, now, value)
+        if self.path:
+            self._disk_put(key, now, value)
+
+    def _remember(self, key: ResultKey, created_at: float, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            # A reload may have landed since this key was admitted
+            if key[0] != self._version:
+                return
+            self._entries[key] = (created_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _disk_put(self, key: ResultKey, now: float, value: Any) -> None:
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results "
+                    "(key, namespace, version, value, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self._disk_key(key), self.namespace, key[0], json.dumps(value), now, now),
+                )
+                (count,) = conn.execute("SELECT COUNT(*) FROM results").fetchone()
+                evicted = max(count - self.disk_max_entries, 0)
+                if evicted:
+                    conn.execute(
+                        "DELETE FROM results WHERE key IN ("
+                        "SELECT key FROM results ORDER BY last_access LIMIT ?)",
+                        (evicted,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._disk_error(e)
+            return
+        if evicted:
+            with self._lock:
+                self._counters["disk_evictions"] += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, sizes and hit rate since the process started."""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["disk_hits"] + counters["misses"]
+        return {
+            "version": self._version,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "shared": self.path is not None,
+            **counters,
+            "hit_rate": round((counters["hits"] + counters["disk_hits"]) / lookups, 4) if lookups else None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,195 @@
+"""
+Typeahead title search for CineMatch.
+
+A trigram inverted index over the catalog's display labels, built once when the
+artifacts are loaded, so a picker can ask for the best few matches per
+keystroke instead of shipping every title to the browser:
+
+* titles and queries are normalised (case folded, accents stripped,
+  punctuation collapsed), so ``"amelie"`` finds ``"Amélie"``;
+* a title matches when it contains at least ``SEARCH_MIN_COVERAGE`` of the
+  query's trigrams, which tolerates typos and missing letters;
+* titles that start with the query get ``SEARCH_PREFIX_BONUS``, found by binary
+  search over the sorted normalised titles;
+* ties are broken by popularity, given explicitly or by the order of the
+  labels (``titles.json`` lists the most popular first when the catalog has
+  a popularity field); without either, by the share of the title the query
+  covers, so shorter titles come first.
+
+Postings are flat int32 arrays (CSR layout). Trigrams that occur in more than
+``_COMMON_SHARE`` of all titles (``" th"``, ``"the"``, ...) say little and have
+huge postings, so they are left out of queries that have rarer ones; the
+postings that remain are usually a few hundred rows. Coverage is measured
+against the trigrams that remain: a trigram the index does not contain at all
+is a typo, and is no more evidence against a title than a common one. Prefix
+matches always outrank fuzzy ones, so when there are enough of them the answer
+comes straight from the prefix range.
+"""
+
+from typing import Dict, List, Optional, Sequence
+import math
+import re
+import unicodedata
+
+import numpy as np
+
+import config
+
+_NON_WORD = re.compile(r"[\W_]+")
+# Sorts after every character, for the upper end of a prefix range
+_MAX_CHAR = chr(0x10FFFF)
+# Trigrams in more than this share of titles are ignored when a query has rarer ones
+_COMMON_SHARE = 0.05
+# Weight of the title-length tie-break when there is no popularity: far below
+# one trigram of coverage
+_LENGTH_WEIGHT = 1e-6
+
+
+def normalize_title(text: str) -> str:
+    """Fold case and accents and collapse punctuation (``"Amélie!"`` -> ``"amelie"``)."""
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def _trigrams(key: str, complete: bool = True) -> List[str]:
+    """
+    Distinct trigrams of a normalised title.
+
+    Words are padded with spaces so that word starts form their own trigrams.
+    A query is not padded at the end (``complete=False``): its last word may
+    still be half-typed.
+    """
+    padded = f"  {key} " if complete else f"  {key}"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+class TitleSearchIndex:
+    """
+    Trigram index for fuzzy, popularity-aware title lookups.
+
+    Args:
+        labels (Sequence[str]): Display labels to search.
+        popularity (Optional[Sequence[float]]): Popularity of every label.
+        ranked (bool): Without ``popularity``, whether the labels are listed
+            most popular first. If not, there is no popularity prior and ties
+            go to shorter titles.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        popularity: Optional[Sequence[float]] = None,
+        ranked: bool = True,
+    ) -> None:
+        self.labels: List[str] = list(labels)
+        n = len(self.labels)
+        keys = [normalize_title(label) for label in self.labels]
+
+        self._gram_ids: Dict[str, int] = {}
+        grams: List[int] = []
+        counts = np.empty(n, dtype=np.int64)
+        for row, key in enumerate(keys):
+            ids = [self._gram_ids.setdefault(gram, len(self._gram_ids)) for gram in _trigrams(key)]
+            grams.extend(ids)
+            counts[row] = len(ids)
+
+        gram_array = np.array(grams, dtype=np.int32)
+        order = np.argsort(gram_array, kind="stable")
+        self._postings = np.repeat(np.arange(n, dtype=np.int32), counts)[order]
+        self._indptr = np.zeros(len(self._gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_array, minlength=len(self._gram_ids)), out=self._indptr[1:])
+
+        key_order = sorted(range(n), key=keys.__getitem__)
+        self._sorted_keys = np.array([keys[row] for row in key_order], dtype=object)
+        self._key_order = np.array(key_order, dtype=np.int64)
+
+        # Popularity as a rank prior in [0, 1], so its weight is scale-free
+        if popularity is not None or ranked:
+            ranking = (
+                np.arange(n) if popularity is None
+                else np.argsort(-np.asarray(popularity, dtype=np.float64), kind="stable")
+            )
+            self._prior = np.empty(n, dtype=np.float64)
+            self._prior[ranking] = 1.0 - np.arange(n) / max(n, 1)
+            self._prior_weight = config.SEARCH_POPULARITY_WEIGHT
+        else:
+            # No popularity: a neutral tie-break towards titles the query covers more of
+            ranking = np.arange(n)
+            self._prior = 1.0 - counts / (counts.max(initial=0) + 1.0)
+            self._prior_weight = _LENGTH_WEIGHT
+        self._ranking = ranking
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def search(
+        self,
+        query: str,
+        limit: int = config.SEARCH_RESULTS,
+        min_coverage: float = config.SEARCH_MIN_COVERAGE,
+    ) -> List[str]:
+        """
+        Best matching labels for a (possibly partial or misspelt) query.
+
+        Args:
+            query (str): What the user typed so far.
+            limit (int): Maximum number of labels to return.
+            min_coverage (float): Share of the query's trigrams a title must contain.
+
+        Returns:
+            List[str]: Matching labels, best first; the most popular labels
+                for an empty query.
+        """
+        key = normalize_title(query)
+        if not key:
+            return [self.labels[row] for row in self._ranking[:limit]]
+
+        # Prefix matches contain every query trigram and get the bonus, so they
+        # outrank all fuzzy matches: with enough of them, rank by popularity alone
+        start = self._sorted_keys.searchsorted(key, side="left")
+        stop = self._sorted_keys.searchsorted(key + _MAX_CHAR, side="left")
+        prefixed = self._key_order[start:stop]
+        if len(prefixed) >= limit:
+            return self._top(prefixed, self._prior[prefixed], limit)
+
+        grams = _trigrams(key, complete=False)
+        postings = [
+            self._postings[self._indptr[g]:self._indptr[g + 1]]
+            for g in (self._gram_ids.get(gram) for gram in grams) if g is not None
+        ]
+        rare = [posting for posting in postings if len(posting) <= _COMMON_SHARE * len(self)]
+        if rare:
+            postings = rare
+        if not postings:
+            return []
+        n_grams = len(postings)
+        needed = max(1, math.ceil(min_coverage * n_grams - 1e-9))
+
+        hits = np.concatenate(postings)
+        if len(hits) * 8 > len(self):
+            counts = np.bincount(hits, minlength=len(self))
+            candidates = np.flatnonzero(counts >= needed)
+            counts = counts[candidates]
+        else:
+            candidates, counts = np.unique(hits, return_counts=True)
+            keep = counts >= needed
+            candidates, counts = candidates[keep], counts[keep]
+        if not len(candidates):
+            return []
+
+        scores = counts / n_grams + self._prior_weight * self._prior[candidates]
+        scores[np.isin(candidates, prefixed)] += config.SEARCH_PREFIX_BONUS
+        return self._top(candidates, scores, limit)
+
+    def _top(self, rows: np.ndarray, scores: np.ndarray, limit: int) -> List[str]:
+        """Labels of the ``limit`` best-scoring ``rows``, best first."""
+        if len(rows) > limit:
+            # Keep every row tied with the limit-th score, so ties are cut by label order
+            kth = -np.partition(-scores, limit - 1)[limit - 1]
+            top = np.flatnonzero(scores >= kth)
+        else:
+            top = np.arange(len(rows))
+        top = top[np.lexsort((rows[top], -scores[top]))][:limit]
+        return [self.labels[row] for row in rows[top].tolist()]
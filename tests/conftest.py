@@ -0,0 +1,23 @@
+"""Shared pytest setup: make the flat top-level modules importable, stub TMDB."""
+
+from typing import Iterator
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tmdb_stub import StubTMDB  # noqa: E402
+
+
+@pytest.fixture
+def tmdb() -> Iterator[StubTMDB]:
+    server = StubTMDB()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
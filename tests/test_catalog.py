@@ -0,0 +1,32 @@
+"""Title list written next to the catalog for the picker."""
+
+import json
+
+import numpy as np
+
+from catalog import load_title_list, save_catalog, save_title_list
+
+TITLES = ["Heat", "Alien", "Brazil"]
+IDS = [949, 348, 68]
+
+
+def test_title_list_records_popularity_order(tmp_path):
+    catalog = save_catalog(str(tmp_path / "catalog.store"), TITLES, IDS,
+                           fields={"popularity": np.array([1.0, 3.0, 2.0], dtype=np.float32)})
+    save_title_list(catalog, str(tmp_path / "titles.json"))
+
+    assert load_title_list(str(tmp_path / "titles.json")) == (["Alien", "Brazil", "Heat"], True)
+
+
+def test_title_list_without_popularity_is_unranked(tmp_path):
+    catalog = save_catalog(str(tmp_path / "catalog.store"), TITLES, IDS)
+    save_title_list(catalog, str(tmp_path / "titles.json"))
+
+    assert load_title_list(str(tmp_path / "titles.json")) == (["Alien", "Brazil", "Heat"], False)
+
+
+def test_bare_title_list_is_unranked(tmp_path):
+    path = tmp_path / "titles.json"
+    path.write_text(json.dumps(["Heat", "Alien"]))
+
+    assert load_title_list(str(path)) == (["Heat", "Alien"], False)
@@ -0,0 +1,37 @@
+"""Artifact file resolution with and without a manifest."""
+
+import os
+
+import config
+from manifest import artifact_paths, write_manifest
+
+
+def test_legacy_layout_resolves_inside_the_given_root(tmp_path):
+    root = tmp_path / "artifacts"
+    root.mkdir()
+
+    paths = artifact_paths(str(root))
+
+    assert paths["version"] == "legacy"
+    assert paths["index"] == os.path.join(str(root), "index.store")
+    assert paths["catalog"] == os.path.join(str(root), "catalog.store")
+    assert paths["movies"] == os.path.join(str(tmp_path), "movie_list.pkl")
+
+
+def test_default_root_keeps_the_configured_legacy_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    paths = artifact_paths()
+
+    assert paths["movies"] == config.MOVIE_LIST_FILE
+    assert paths["index"] == config.INDEX_FILE
+
+
+def test_manifest_files_resolve_under_the_version(tmp_path):
+    (tmp_path / "v1").mkdir()
+    (tmp_path / "v1" / "index.store").write_bytes(b"index")
+    write_manifest("v1", {"index": "index.store"}, root=str(tmp_path))
+
+    paths = artifact_paths(str(tmp_path))
+
+    assert paths == {"version": "v1", "index": os.path.join(str(tmp_path), "v1", "index.store")}
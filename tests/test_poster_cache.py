@@ -0,0 +1,21 @@
+"""Poster cache behaviour on a healthy and an unreadable database file."""
+
+from poster_cache import PosterCache
+
+
+def test_round_trip_with_negative_entries(tmp_path):
+    cache = PosterCache(str(tmp_path / "posters.sqlite3"))
+
+    cache.put_many({1: "/one.jpg", 2: None})
+
+    assert cache.get_many([1, 2, 3]) == {1: "/one.jpg", 2: None}
+
+
+def test_corrupt_file_misses_instead_of_raising(tmp_path):
+    path = tmp_path / "posters.sqlite3"
+    path.write_bytes(b"not a database" * 1000)
+    cache = PosterCache(str(path))
+
+    cache.put_many({1: "/one.jpg"})
+
+    assert cache.get_many([1]) == {}
@@ -0,0 +1,31 @@
+"""Concurrent poster resolution against a local stub of the TMDB endpoint."""
+
+import time
+
+import config
+from posters import iter_poster_paths, poster_url, resolve_poster_paths
+from tmdb_stub import DELAY_SECONDS, DELAYED, MISSING, POSTERS, SLOW
+
+
+def test_batch_fetches_run_concurrently(tmdb):
+    started = time.monotonic()
+    paths, failed = resolve_poster_paths(list(DELAYED), "key", tmdb.base_url, deadline=5.0)
+
+    # Serially this would take len(DELAYED) x DELAY_SECONDS
+    assert time.monotonic() - started < 3 * DELAY_SECONDS
+    assert failed == []
+    assert paths == DELAYED
+
+
+def test_answers_are_yielded_as_they_arrive(tmdb):
+    fast = next(iter(POSTERS))
+
+    answers = list(iter_poster_paths([SLOW, fast, MISSING], "key", tmdb.base_url, deadline=0.5))
+
+    assert answers[-1] == (SLOW, None, False)
+    assert sorted(answers[:2]) == [(fast, POSTERS[fast], True), (MISSING, None, True)]
+
+
+def test_unresolved_posters_fall_back_to_the_placeholder():
+    assert poster_url(None) == config.PLACEHOLDER_IMAGE
+    assert poster_url("/one.jpg") == f"{config.IMAGE_BASE_URL}/one.jpg"
@@ -0,0 +1,63 @@
+"""Poster prefetch against a local stub of the TMDB movie details endpoint."""
+
+import time
+
+import pytest
+
+from poster_cache import PosterCache
+from posters import get_session, resolve_poster_paths
+from prefetch_posters import prefetch
+from tmdb_stub import MISSING, NO_POSTER, POSTERS, SLOW, SLOW_SECONDS
+
+
+@pytest.fixture
+def cache(tmp_path) -> PosterCache:
+    return PosterCache(str(tmp_path / "posters.sqlite3"))
+
+
+def test_prefetch_caches_posters_and_negative_answers(tmdb, cache):
+    movie_ids = [*POSTERS, MISSING, NO_POSTER]
+
+    failed = prefetch(movie_ids, "key", cache, base_url=tmdb.base_url, batch_size=10, rate=1000)
+
+    assert failed == []
+    assert len(tmdb.paths) == len(movie_ids)
+    assert all("api_key=key" in path for path in tmdb.paths)
+    cached = cache.get_many(movie_ids)
+    assert {movie_id: cached[movie_id] for movie_id in POSTERS} == POSTERS
+    # 404 and "no poster" are cached negatively, as None
+    assert MISSING in cached and cached[MISSING] is None
+    assert NO_POSTER in cached and cached[NO_POSTER] is None
+
+
+def test_prefetch_resumes_without_refetching(tmdb, cache):
+    first = list(POSTERS)[:10]
+    prefetch(first, "key", cache, base_url=tmdb.base_url, rate=1000)
+    requests_before = len(tmdb.paths)
+
+    failed = prefetch(list(POSTERS), "key", cache, base_url=tmdb.base_url, rate=1000)
+
+    assert failed == []
+    assert len(tmdb.paths) - requests_before == len(POSTERS) - len(first)
+
+
+def test_deadline_cuts_off_slow_fetches_without_caching_them(tmdb, cache):
+    movie_ids = [*list(POSTERS)[:3], SLOW]
+
+    started = time.monotonic()
+    paths, failed = resolve_poster_paths(movie_ids, "key", tmdb.base_url, deadline=0.5, cache=cache)
+
+    assert time.monotonic() - started < SLOW_SECONDS
+    assert failed == [SLOW]
+    assert paths == {movie_id: POSTERS[movie_id] for movie_id in movie_ids[:3]}
+    # A missed deadline is transient: the movie is retried next time
+    assert SLOW not in cache.get_many([SLOW])
+
+
+def test_requests_reuse_the_pooled_session(tmdb, cache):
+    assert get_session() is get_session()
+
+    prefetch(list(POSTERS), "key", cache, base_url=tmdb.base_url, batch_size=8, rate=1000)
+
+    # Keep-alive connections from the shared pool serve many requests each
+    assert len(tmdb.connections) < len(tmdb.paths)
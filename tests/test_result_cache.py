@@ -0,0 +1,26 @@
+"""Result cache behaviour on a healthy and an unreadable database file."""
+
+from result_cache import ResultCache, result_key
+
+KEY = result_key("v1", [1], 10, "exact")
+
+
+def test_shared_tier_round_trip(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    ResultCache(path=path).put(KEY, [{"id": 2}])
+
+    # A second process finds the response in the shared file
+    assert ResultCache(path=path).get(KEY) == [{"id": 2}]
+
+
+def test_corrupt_file_misses_instead_of_raising(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    path.write_bytes(b"not a database" * 1000)
+    cache = ResultCache(path=str(path))
+
+    assert cache.path is None
+    assert cache.stats()["disk_errors"] == 1
+    assert cache.get(KEY) is None
+    # The in-process tier still works
+    cache.put(KEY, [{"id": 2}])
+    assert cache.get(KEY) == [{"id": 2}]
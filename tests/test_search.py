@@ -0,0 +1,43 @@
+"""Typeahead title search over a synthetic catalog."""
+
+import pytest
+
+from search import TitleSearchIndex
+
+LABELS = [f"Movie {i}" for i in range(5000)]
+
+
+@pytest.fixture(scope="module", params=[True, False], ids=["ranked", "unranked"])
+def index(request) -> TitleSearchIndex:
+    return TitleSearchIndex(LABELS, ranked=request.param)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("movi 60", "Movie 60"),
+    ("mvie 600", "Movie 600"),
+    ("moive 4321", "Movie 4321"),
+])
+def test_typo_query_finds_the_title(index, query, expected):
+    # Only common trigrams and ones missing from the index ("i 6") surround
+    # the rare ones; they must not count against coverage
+    assert index.search(query, 5)[0] == expected
+
+
+def test_prefix_matches_come_first(index):
+    assert index.search("movie 12", 5) == ["Movie 12", "Movie 120", "Movie 121", "Movie 122", "Movie 123"]
+
+
+def test_unknown_query_finds_nothing(index):
+    assert index.search("zzzz") == []
+
+
+def test_popularity_breaks_ties():
+    index = TitleSearchIndex(["Heat", "Heathers", "Heated"], popularity=[1.0, 3.0, 2.0])
+
+    assert index.search("hea") == ["Heathers", "Heated", "Heat"]
+
+
+def test_without_popularity_shorter_titles_win_ties():
+    index = TitleSearchIndex(["Heathers", "Heated", "Heat"], ranked=False)
+
+    assert index.search("hea") == ["Heat", "Heated", "Heathers"]
@@ -0,0 +1,73 @@
+"""
+Local stub of the TMDB movie details endpoint.
+
+The stub answers ``GET /3/movie/<id>`` over keep-alive HTTP/1.1:
+
+* ids in ``POSTERS`` return their poster path;
+* ``MISSING`` returns 404 (TMDB does not know the movie);
+* ``NO_POSTER`` returns a movie without a ``poster_path``;
+* ids in ``DELAYED`` return their poster path after ``DELAY_SECONDS``;
+* ``SLOW`` answers only after ``SLOW_SECONDS``, past any test deadline.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Set, Tuple
+import json
+import threading
+import time
+
+POSTERS = {movie_id: f"/poster-{movie_id}.jpg" for movie_id in range(100, 124)}
+DELAYED = {movie_id: f"/poster-{movie_id}.jpg" for movie_id in range(300, 308)}
+DELAY_SECONDS = 0.3
+MISSING = 404
+NO_POSTER = 204
+SLOW = 999
+SLOW_SECONDS = 2.0
+
+
+class StubTMDB(ThreadingHTTPServer):
+    """Stub server recording every request path and client connection."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.paths: List[str] = []
+        self.connections: Set[Tuple[str, int]] = set()
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/3/movie/"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.paths.append(self.path)
+            self.server.connections.add(self.client_address)
+        movie_id = int(self.path.split("?")[0].rsplit("/", 1)[1])
+        if movie_id == SLOW:
+            time.sleep(SLOW_SECONDS)
+        elif movie_id in DELAYED:
+            time.sleep(DELAY_SECONDS)
+        if movie_id == MISSING:
+            status, body = 404, {"status_message": "The resource you requested could not be found."}
+        elif movie_id in POSTERS or movie_id in DELAYED:
+            status, body = 200, {"id": movie_id, "poster_path": {**POSTERS, **DELAYED}[movie_id]}
+        else:
+            status, body = 200, {"id": movie_id, "poster_path": None}
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except OSError:
+            pass  # the client gave up on a slow answer
+
+    def log_message(self, *args: object) -> None:
+        pass